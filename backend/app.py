@@ -1,38 +1,114 @@
-from flask import Flask, jsonify, send_from_directory, request, g
+from flask import Flask, jsonify, request, g, Response
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 from datetime import datetime
-import yfinance as yf
-import numpy as np
-import pandas as pd
-from statsmodels.tsa.stattools import adfuller, coint
-from statsmodels.regression.linear_model import OLS
-from statsmodels.regression.rolling import RollingOLS
-from datetime import datetime, timedelta
 import logging
 from configuracoes.database import get_local_db_connection
 from configuracoes.config import Config
+from configuracoes.price_store import get_price_store, normalize_symbol, period_to_start
+from configuracoes.cache import TTLCache
+from configuracoes.b3_calendar import validade_dados
+from configuracoes.singleflight import get_flight_group
+from configuracoes.rsl_snapshot import get_rsl_snapshot_service, snapshot_age
+from configuracoes.quote_stream import get_quote_hub
+from configuracoes.indicators import parse_indicadores
+from configuracoes.serialization import chart_columns, render_chart, negotiate, encode, MIMETYPE_JSON
+from configuracoes.resampling import INTERVALOS, downsample
+from configuracoes.http_cache import http_cache, max_age_referencia, get_http_cache_stats
+from configuracoes.compression import compress_response, get_compression_stats
+from configuracoes.static_assets import get_static_assets
+from configuracoes.setor_index import get_setor_index, empresa_resumo
+from configuracoes.reference_data import get_reference_data, register_dataset
+from configuracoes.instrumentation import (
+    begin_request, finish_request, render_prometheus, get_metrics_summary, InstrumentedJSONProvider
+)
 
 # ===== IMPORTAÇÕES DE AUTENTICAÇÃO =====
 from auth.auth_service import AuthService
 from auth.middleware import require_auth, require_plan, optional_auth
 
 app = Flask(__name__)
+app.json = InstrumentedJSONProvider(app)
+if Config.PROXY_COUNT:
+    # request.remote_addr passa a ser o IP do cliente (limites por IP do streaming)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_COUNT, x_proto=Config.PROXY_COUNT)
 CORS(app)
 
+# Payloads de cotação (compartilhados entre workers conforme Config.CACHE_BACKEND)
+stock_payload_cache = TTLCache(
+    maxsize=Config.RSL_CACHE_MAXSIZE,
+    expires_at=lambda now: validade_dados(Config.MARKET_CACHE_TTL),
+    stale_seconds=Config.MARKET_CACHE_TTL,
+    name='stock_payload'
+)
+
+@app.before_request
+def iniciar_medicao():
+    begin_request()
+
+@app.after_request
+def registrar_metricas(response):
+    """Latência por rota (registrado antes da compressão, então roda depois dela e a inclui)"""
+    rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+    return finish_request(response, rota, request.method)
+
+@app.after_request
+def comprimir_resposta(response):
+    """gzip/brotli para respostas dinâmicas grandes, conforme o Accept-Encoding"""
+    return compress_response(response, request.accept_encodings)
+
+@app.before_request
+def iniciar_agendadores():
+    """
+    Agendador de snapshots do RSL setorial e LISTEN dos dados de referência: iniciados
+    no worker que atende a primeira requisição, nunca na importação (com preload_app
+    o master não deve rodar threads)
+    """
+    get_rsl_snapshot_service()
+    get_reference_data().start()
+
 # ✅ SUA FUNÇÃO YFINANCE ORIGINAL (mantida igual)
-def get_stock_data(symbol, period='1y'):
+def stock_payload_key(symbol, period='1y', grafico=None):
+    """Chave do payload; `grafico` é (interval, max_points) ou None para o gráfico padrão"""
+    key = (normalize_symbol(symbol), period)
+    return key if grafico is None else key + tuple(grafico)
+
+def get_stock_data(symbol, period='1y', grafico=None):
+    """Payload de uma ação (cópia: as rotas acrescentam campos por plano)"""
+    key = stock_payload_key(symbol, period, grafico)
+    # Chamadas simultâneas para o mesmo ticker esperam uma única busca
+    payload = get_flight_group('stock_payload').do(
+        key,
+        lambda: stock_payload_cache.get_or_compute(key, lambda: fetch_stock_data(symbol, period, grafico))
+    )
+    return dict(payload) if payload else None
+
+def fetch_stock_data(symbol, period='1y', grafico=None):
     try:
         # Adiciona .SA para ações brasileiras
         if not symbol.endswith('.SA'):
             symbol += '.SA'
         
-        stock = yf.Ticker(symbol)
-        data = stock.history(period=period)
+        data = get_price_store().get_history(symbol, period=period)
         
         if data.empty:
             return None
         
+        return build_stock_payload(symbol, data, period, grafico)
+    except Exception as e:
+        print(f"Erro ao buscar dados para {symbol}: {e}")
+        return None
+
+def build_stock_payload(symbol, data, period='1y', grafico=None):
+    """
+    Monta a resposta de uma ação a partir das barras diárias já carregadas.
+    Sem `grafico`, o gráfico são os últimos 30 pregões; com (interval, max_points),
+    o período inteiro em barras do intervalo, reduzido pelo LTTB a no máximo max_points.
+    """
+    from configuracoes.yfinance_service import YFinanceService
+    
+    try:
         # Pega o último preço
         current_price = data['Close'].iloc[-1]
         
@@ -41,77 +117,133 @@ def get_stock_data(symbol, period='1y'):
         change = current_price - previous_price
         change_percent = (change / previous_price) * 100
         
-        # Dados para gráfico (últimos 30 dias)
-        chart_data = []
-        for i, (date, row) in enumerate(data.tail(30).iterrows()):
-            chart_data.append({
-                'date': date.strftime('%d/%m'),
-                'price': round(row['Close'], 2),
-                'volume': int(row['Volume'])
-            })
-        
-        return {
+        payload = {
             'symbol': symbol.replace('.SA', ''),
             'current_price': round(current_price, 2),
             'change': round(change, 2),
             'change_percent': round(change_percent, 2),
             'volume': int(data['Volume'].iloc[-1]),
-            'chart_data': chart_data,
             'last_update': datetime.now().strftime('%d/%m/%Y %H:%M')
         }
+        
+        # Dados para gráfico em colunas: o layout sai na resposta (render_chart)
+        if grafico is None:
+            payload['chart'] = chart_columns(data, 30)
+        else:
+            interval, max_points = grafico
+            barras = YFinanceService.get_chart_bars(symbol, period, interval, data)
+            pontos = downsample(barras, max_points)
+            payload['chart'] = chart_columns(pontos, None, '%d/%m/%Y')
+            payload['chart_info'] = {
+                'period': period,
+                'interval': interval,
+                'barras': len(barras),
+                'pontos': len(pontos)
+            }
+        return payload
     except Exception as e:
-        print(f"Erro ao buscar dados para {symbol}: {e}")
+        print(f"Erro ao montar dados para {symbol}: {e}")
         return None
 
+def parametros_grafico():
+    """
+    period, interval e max_points da query: (period, (interval, max_points)).
+    Sem nenhum deles, ('1y', None): o gráfico padrão dos últimos 30 pregões.
+    """
+    args = request.args
+    if not any(nome in args for nome in ('period', 'interval', 'max_points')):
+        return '1y', None
+    
+    period = args.get('period', '1y')
+    period_to_start(period)  # ValueError se inválido
+    interval = args.get('interval', '1d')
+    if interval not in INTERVALOS:
+        raise ValueError(f"Intervalo inválido: {interval} (use {', '.join(INTERVALOS)})")
+    max_points = int(args.get('max_points', Config.CHART_DEFAULT_POINTS))
+    if not 3 <= max_points <= Config.CHART_MAX_POINTS:
+        raise ValueError(f'max_points deve estar entre 3 e {Config.CHART_MAX_POINTS}')
+    return period, (interval, max_points)
+
+def layout_colunar():
+    """Gráficos em colunas (arrays paralelos) com ?layout=colunas ou quando a resposta vai em msgpack"""
+    return request.args.get('layout') == 'colunas' or negotiate(request.accept_mimetypes) != MIMETYPE_JSON
+
+def resposta_serializada(body, status=200):
+    """Resposta em JSON (orjson quando instalado) ou em msgpack, conforme o Accept"""
+    content, mimetype = encode(body, negotiate(request.accept_mimetypes))
+    response = Response(content, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+def premium_indicators(symbols):
+    """Indicadores técnicos atuais dos tickers (todos de uma vez): {ticker: {...}}"""
+    from configuracoes.yfinance_service import YFinanceService
+    
+    try:
+        return YFinanceService.get_indicators(symbols, parse_indicadores(None))
+    except Exception as e:
+        print(f"⚠️ Erro ao calcular indicadores: {e}")
+        return {}
+
 # ===== ROTAS HTML (mantidas iguais) =====
 @app.route('/')
 def index():
-    return send_from_directory('../frontend', 'home.html')
+    return get_static_assets().response('home.html', request)
 
 @app.route('/home.html')
 def home():
-    return send_from_directory('../frontend', 'home.html')
+    return get_static_assets().response('home.html', request)
 
 @app.route('/monitor-basico.html')
 def monitor_basico():
-    return send_from_directory('../frontend', 'monitor-basico.html')
+    return get_static_assets().response('monitor-basico.html', request)
 
 @app.route('/radar-setores.html')
 def radar_setores():
-    return send_from_directory('../frontend', 'radar-setores.html')
+    return get_static_assets().response('radar-setores.html', request)
 
 @app.route('/planos.html')
 def planos():
-    return send_from_directory('../frontend', 'planos.html')
+    return get_static_assets().response('planos.html', request)
 
 @app.route('/planos')
 def planos_sem_extensao():
-    return send_from_directory('../frontend', 'planos.html')
+    return get_static_assets().response('planos.html', request)
 
 # ===== NOVAS ROTAS HTML PARA AUTH =====
 @app.route('/login.html')
 def login_page():
-    return send_from_directory('../frontend', 'login.html')
+    return get_static_assets().response('login.html', request)
 
 @app.route('/login')
 def login_page_sem_extensao():
-    return send_from_directory('../frontend', 'login.html')
+    return get_static_assets().response('login.html', request)
 
 @app.route('/register.html')
 def register_page():
-    return send_from_directory('../frontend', 'register.html')
+    return get_static_assets().response('register.html', request)
 
 @app.route('/register')
 def register_page_sem_extensao():
-    return send_from_directory('../frontend', 'register.html')
+    return get_static_assets().response('register.html', request)
 
 @app.route('/dashboard.html')
 def dashboard_page():
-    return send_from_directory('../frontend', 'dashboard.html')
+    return get_static_assets().response('dashboard.html', request)
 
 @app.route('/dashboard')
 def dashboard_page_sem_extensao():
-    return send_from_directory('../frontend', 'dashboard.html')
+    return get_static_assets().response('dashboard.html', request)
+
+@app.route('/assets/<hash_conteudo>/<nome>')
+def hashed_asset(hash_conteudo, nome):
+    """Arquivo do frontend numa URL com o hash do conteúdo (cache immutable)"""
+    return get_static_assets().hashed_response(hash_conteudo, nome, request)
+
+@app.route('/api/assets')
+def get_assets_manifest():
+    """URLs com hash de cada arquivo do frontend (para pré-carregar ou aquecer o CDN)"""
+    return jsonify({'success': True, 'data': get_static_assets().manifest()})
 
 # ===== ROTAS DE AUTENTICAÇÃO =====
 
@@ -281,16 +413,33 @@ def api_dashboard_stats():
 @app.route('/api/premium/advanced-charts')
 @require_plan(2)  # Exige plano ID >= 2
 def api_premium_charts():
-    """Gráficos avançados - funcionalidade premium"""
-    return jsonify({
-        'success': True,
-        'data': {
-            'message': 'Acesso liberado para gráficos avançados!',
-            'charts': ['Candlestick', 'Volume Profile', 'Fibonacci'],
-            'user': g.current_user['name'],
-            'plan': g.current_user['plan_name']
-        }
-    })
+    """
+    Gráficos avançados - funcionalidade premium.
+    Com ?symbol=PETR4 traz as séries dos indicadores (?indicators=rsi,macd,bollinger,atr,ema&points=120)
+    """
+    from configuracoes.yfinance_service import YFinanceService
+    
+    data = {
+        'message': 'Acesso liberado para gráficos avançados!',
+        'charts': ['Candlestick', 'Volume Profile', 'Fibonacci'],
+        'user': g.current_user['name'],
+        'plan': g.current_user['plan_name']
+    }
+    
+    symbol = request.args.get('symbol')
+    if symbol:
+        try:
+            nomes = parse_indicadores(request.args.get('indicators'))
+            points = min(max(int(request.args.get('points', 120)), 1), 500)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        indicadores = YFinanceService.get_indicator_series(symbol.upper(), nomes, points, colunar=layout_colunar())
+        if indicadores is None:
+            return jsonify({'success': False, 'error': f'Sem dados para {symbol}'}), 404
+        data['indicators'] = indicadores
+    
+    return resposta_serializada({'success': True, 'data': data})
 
 @app.route('/api/premium/ai-recommendations')
 @require_plan(3)  # Exige plano top (ID >= 3)
@@ -312,51 +461,103 @@ def api_ai_recommendations():
 
 # ===== ROTAS DE PLANOS (mantidas) =====
 
+def reference_response(nome, erro_sem_dados):
+    """Resposta pronta de um conjunto de dados de referência (ETag e 304 ficam com o http_cache)"""
+    entry = get_reference_data().get(nome)
+    if entry['body'] is None:
+        return jsonify({'success': False, 'error': erro_sem_dados}), 404
+    
+    response = Response(entry['body'], mimetype='application/json')
+    response.headers['X-Reference-Version'] = str(entry['versao'])
+    return response
+
+def versao_referencia(nome):
+    """ETag do conjunto de dados de referência (a resposta pronta não muda sem ele mudar)"""
+    return lambda **kwargs: get_reference_data().get(nome)['etag']
+
+def versao_setor_index(**kwargs):
+    return get_setor_index().versao
+
+def load_plans():
+    """Planos ativos no formato de /api/plans"""
+    conn = get_local_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT id, name, display_name, price_monthly, price_annual, 
+               description, features, is_active
+        FROM plans 
+        WHERE is_active = true
+        ORDER BY price_monthly
+    """)
+    
+    plans = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    
+    # Converter para formato JSON
+    result = []
+    for plan in plans:
+        result.append({
+            'id': plan[0],
+            'name': plan[1], 
+            'display_name': plan[2],
+            'price_monthly': float(plan[3]),
+            'price_annual': float(plan[4]),
+            'description': plan[5],
+            'features': plan[6],  # Array PostgreSQL
+            'is_active': plan[7],
+            'discount_percent': round(((plan[3] * 12 - plan[4]) / (plan[3] * 12)) * 100, 1)
+        })
+    
+    return {
+        'success': True,
+        'data': result,
+        'total_plans': len(result)
+    }
+
+register_dataset('plans', load_plans)
+
 @app.route('/api/plans')
+@http_cache(max_age=max_age_referencia, versao=versao_referencia('plans'))
 def get_plans():
-    """Buscar todos os planos do banco"""
+    """Buscar todos os planos (da memória; remontado quando a tabela plans muda)"""
     try:
-        conn = get_local_db_connection()
-        cursor = conn.cursor()
+        return reference_response('plans', 'Nenhum plano encontrado')
         
-        cursor.execute("""
-            SELECT id, name, display_name, price_monthly, price_annual, 
-                   description, features, is_active
-            FROM plans 
-            WHERE is_active = true
-            ORDER BY price_monthly
-        """)
-        
-        plans = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        # Converter para formato JSON
-        result = []
-        for plan in plans:
-            result.append({
-                'id': plan[0],
-                'name': plan[1], 
-                'display_name': plan[2],
-                'price_monthly': float(plan[3]),
-                'price_annual': float(plan[4]),
-                'description': plan[5],
-                'features': plan[6],  # Array PostgreSQL
-                'is_active': plan[7],
-                'discount_percent': round(((plan[3] * 12 - plan[4]) / (plan[3] * 12)) * 100, 1)
-            })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/reference-data/invalidate', methods=['POST'])
+@require_plan(3)  # Só admins (plano ID >= 3)
+def invalidate_reference_data():
+    """Descarta planos e/ou setores em todos os workers (após alterações manuais)"""
+    try:
+        nome = (request.get_json(silent=True) or {}).get('dataset')
+        if nome is not None and nome not in ('plans', 'setores'):
+            return jsonify({'success': False, 'error': f'Conjunto desconhecido: {nome}'}), 400
         
+        if nome in (None, 'setores'):
+            get_setor_index().invalidate()
         return jsonify({
             'success': True,
-            'data': result,
-            'total_plans': len(result)
+            'data': {'invalidados': get_reference_data().invalidate(nome)}
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/reference-data-info')
+@require_auth
+def get_reference_data_info():
+    """Informações sobre o cache de dados de referência"""
+    return jsonify({
+        'success': True,
+        'data': get_reference_data().get_info()
+    })
 
 @app.route('/api/plans/select', methods=['POST'])
 @require_auth  # Agora exige autenticação
@@ -405,16 +606,31 @@ def select_plan():
         cursor.close()
         conn.close()
         
+        # Sessões em cache ainda têm o plano antigo
+        AuthService.invalidate_user_sessions(g.current_user['user_id'])
+        
+        response_data = {
+            'plan_id': plan_id,
+            'plan_name': display_name,
+            'billing_cycle': billing_cycle,
+            'price': float(final_price),
+            'user': g.current_user['name'],
+            'message': f'Plano {display_name} ativado com sucesso!'
+        }
+        
+        # Token assinado carrega o plano: o antigo foi revogado acima, emitir um novo com o plano atualizado
+        if Config.AUTH_TOKEN_MODE == 'signed':
+            session_token, expires_at = AuthService.issue_signed_token({
+                **g.current_user,
+                'plan_id': plan_id,
+                'plan_name': display_name
+            })
+            response_data['session_token'] = session_token
+            response_data['expires_at'] = expires_at.isoformat()
+        
         return jsonify({
             'success': True,
-            'data': {
-                'plan_id': plan_id,
-                'plan_name': display_name,
-                'billing_cycle': billing_cycle,
-                'price': float(final_price),
-                'user': g.current_user['name'],
-                'message': f'Plano {display_name} ativado com sucesso!'
-            }
+            'data': response_data
         })
         
     except Exception as e:
@@ -426,44 +642,83 @@ def select_plan():
 # ===== ROTAS API - AÇÕES (com auth opcional) =====
 @app.route('/relatorios.html')
 def relatorios():
-    return send_from_directory('../frontend', 'relatorios.html')
+    return get_static_assets().response('relatorios.html', request)
 
 @app.route('/relatorios')
 def relatorios_sem_extensao():
-    return send_from_directory('../frontend', 'relatorios.html')
+    return get_static_assets().response('relatorios.html', request)
 
 
 @app.route('/api/stock/<symbol>')
 @optional_auth
+@http_cache()
 def get_stock(symbol):
-    data = get_stock_data(symbol)
+    """
+    Cotação e gráfico de uma ação
+    Query params: period (1mo, 1y, 5y, max...), interval (1d, 1wk, 1mo), max_points
+    """
+    try:
+        period, grafico = parametros_grafico()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    data = get_stock_data(symbol, period, grafico)
     if data:
         # Adicionar recursos extras para usuários logados
         if g.current_user and g.current_user.get('plan_id', 1) >= 2:
-            data['premium_indicators'] = {
-                'rsi': 65.2,
-                'macd': 1.45,
-                'bollinger_position': 'upper'
-            }
+            data['premium_indicators'] = premium_indicators([symbol]).get(data['symbol'])
         
-        return jsonify({'success': True, 'data': data})
+        return resposta_serializada({'success': True, 'data': render_chart(data, layout_colunar())})
     else:
         return jsonify({'success': False, 'error': 'Ação não encontrada'}), 404
 
 @app.route('/api/stocks')
 @optional_auth
+@http_cache()
 def get_stocks():
-    symbols = request.args.get('symbols', 'PETR4,VALE3,ITUB4').split(',')
+    """
+    Cotações e gráficos de várias ações
+    Query params: symbols, period, interval, max_points (como em /api/stock/<symbol>)
+    """
+    symbols = [s.strip() for s in request.args.get('symbols', 'PETR4,VALE3,ITUB4').split(',') if s.strip()]
     results = {}
     
+    try:
+        period, grafico = parametros_grafico()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Payloads em cache; os demais num único download agrupado
+    payloads = {}
     for symbol in symbols:
-        symbol = symbol.strip()
-        data = get_stock_data(symbol)
+        cached = stock_payload_cache.get(stock_payload_key(symbol, period, grafico))
+        if cached:
+            payloads[symbol] = dict(cached)
+    
+    missing = [symbol for symbol in symbols if symbol not in payloads]
+    frames, failures = get_price_store().get_history_many(missing, period=period) if missing else ({}, {})
+    errors = {symbol.replace('.SA', ''): error for symbol, error in failures.items()}
+    
+    for symbol in missing:
+        history = frames.get(normalize_symbol(symbol))
+        payload = build_stock_payload(symbol, history, period, grafico) if history is not None else None
+        if payload:
+            stock_payload_cache.set(stock_payload_key(symbol, period, grafico), payload)
+            payloads[symbol] = dict(payload)
+    
+    is_premium = bool(g.current_user and g.current_user.get('plan_id', 1) >= 2)
+    indicadores = premium_indicators(list(payloads)) if is_premium and payloads else {}
+    colunar = layout_colunar()
+    
+    for symbol in symbols:
+        data = payloads.get(symbol)
         if data:
+            render_chart(data, colunar)
             # Adicionar recursos extras para usuários premium
-            if g.current_user and g.current_user.get('plan_id', 1) >= 2:
+            if is_premium:
                 data['premium_data'] = True
                 data['analyst_rating'] = 'COMPRA'
+                data['premium_indicators'] = indicadores.get(data['symbol'])
             else:
                 data['premium_data'] = False
                 
@@ -482,144 +737,130 @@ def get_stocks():
             'enhanced_features': False
         }
     
-    return jsonify({
+    return resposta_serializada({
         'success': True, 
         'data': results,
+        'errors': errors,
         'extra': extra_info
     })
 
+@app.route('/api/stream/quotes')
+@optional_auth
+def stream_quotes():
+    """
+    Cotações em tempo real via Server-Sent Events: snapshot inicial e depois só o que mudou.
+    Conexões limitadas por usuário logado ou, sem login, por IP (Config.QUOTE_STREAM_MAX_PER_CLIENT).
+    """
+    symbols = [s.strip().upper() for s in request.args.get('symbols', 'PETR4,VALE3,ITUB4').split(',') if s.strip()]
+    symbols = list(dict.fromkeys(symbols))
+    
+    if not symbols or len(symbols) > Config.QUOTE_STREAM_MAX_SYMBOLS:
+        return jsonify({
+            'success': False,
+            'error': f'Informe de 1 a {Config.QUOTE_STREAM_MAX_SYMBOLS} símbolos'
+        }), 400
+    
+    usuario = g.current_user
+    cliente = f"usuario:{usuario['user_id']}" if usuario else f'ip:{request.remote_addr}'
+    
+    hub = get_quote_hub()
+    subscriber = hub.subscribe(symbols, cliente)
+    if subscriber is None:
+        response = jsonify({'success': False, 'error': 'Limite de conexões de streaming atingido'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    def eventos():
+        try:
+            yield 'retry: 5000\n\n'
+            yield from subscriber.events(Config.QUOTE_STREAM_HEARTBEAT)
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return Response(eventos(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx não deve segurar os eventos
+    })
+
+@app.route('/api/stream-info')
+@require_auth
+def get_stream_info():
+    """Informações sobre o streaming de cotações"""
+    return jsonify({
+        'success': True,
+        'data': get_quote_hub().get_info()
+    })
+
 # ===== ROTAS API - SETORES (mantidas iguais) =====
+def load_setores():
+    """Setores com quantidade de empresas, do índice do setor_b3 (None se a tabela não existe)"""
+    index = get_setor_index()
+    if not index.tabela_existe:
+        return None
+    
+    result = index.resumo_setores()
+    return {
+        'success': True, 
+        'data': result,
+        'total_setores': len(result)
+    }
+
+# Remontado quando o índice do setor_b3 muda de versão
+register_dataset('setores', load_setores, fonte=lambda: get_setor_index().versao)
+
 @app.route('/api/setores')
+@http_cache(max_age=max_age_referencia, versao=versao_referencia('setores'))
 def get_setores():
     """Lista todos os setores com quantidade de empresas"""
     try:
-        print("🔍 Conectando no banco para buscar setores...")
-        conn = get_local_db_connection()
-        cursor = conn.cursor()
-        
-        # Primeiro verificar se a tabela existe
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'setor_b3'
-            );
-        """)
-        
-        table_exists = cursor.fetchone()[0]
-        if not table_exists:
-            cursor.close()
-            conn.close()
-            return jsonify({'success': False, 'error': 'Tabela setor_b3 não encontrada'}), 404
-        
-        # Buscar setores
-        cursor.execute("""
-            SELECT 
-                setor_economico,
-                COUNT(*) as total_empresas
-            FROM setor_b3 
-            GROUP BY setor_economico 
-            ORDER BY total_empresas DESC
-        """)
-        
-        setores = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        result = []
-        for setor in setores:
-            result.append({
-                'setor_economico': setor[0],
-                'total_empresas': setor[1]
-            })
-        
-        print(f"✅ Encontrados {len(result)} setores")
-        
-        return jsonify({
-            'success': True, 
-            'data': result,
-            'total_setores': len(result)
-        })
+        return reference_response('setores', 'Tabela setor_b3 não encontrada')
         
     except Exception as e:
         print(f"❌ Erro na API setores: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/setor/<setor_nome>')
+@http_cache(max_age=max_age_referencia, versao=versao_setor_index)
 def get_empresas_setor(setor_nome):
-    """Buscar empresas por setor"""
+    """
+    Buscar empresas por setor (índice em memória do setor_b3)
+    Query params: modo (auto, exato, prefixo, trecho, trigram), limit
+    """
     try:
-        print(f"🔍 Buscando empresas do setor: {setor_nome}")
-        conn = get_local_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT acao, ticker, setor_economico, nivel_na_bolsa, tipo
-            FROM setor_b3 
-            WHERE setor_economico ILIKE %s 
-            ORDER BY acao
-            LIMIT 10
-        """, (f'%{setor_nome}%',))
-        
-        empresas = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        modo = request.args.get('modo', 'auto').lower()
+        limit = min(int(request.args.get('limit', 10)), 500)
         
-        result = []
-        for empresa in empresas:
-            result.append({
-                'empresa': empresa[0],  # acao
-                'ticker': empresa[1],
-                'setor_economico': empresa[2],
-                'nivel_bolsa': empresa[3],
-                'tipo_governanca': empresa[4]
-            })
+        index = get_setor_index()
+        if not index.tabela_existe:
+            return jsonify({'success': False, 'error': 'Tabela setor_b3 não encontrada'}), 404
         
-        print(f"✅ Encontradas {len(result)} empresas")
+        setores, empresas = index.buscar_empresas(setor_nome, modo)
+        result = [empresa_resumo(empresa) for empresa in empresas[:limit]]
         
         return jsonify({
             'success': True, 
             'data': result,
             'total_empresas': len(result),
-            'setor': setor_nome
+            'setor': setor_nome,
+            'setores_encontrados': setores,
+            'modo': modo
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Erro ao buscar empresas do setor {setor_nome}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/empresa/<ticker>')
+@http_cache(max_age=max_age_referencia, versao=versao_setor_index)
 def get_empresa_info(ticker):
     """Buscar informações completas de uma empresa"""
     try:
-        print(f"🔍 Buscando informações da empresa: {ticker}")
-        conn = get_local_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, setor_economico, setor, setor_puro, segmento, acao, ticker, nivel_na_bolsa, tipo
-            FROM setor_b3 
-            WHERE ticker = %s
-        """, (ticker.upper(),))
-        
-        empresa = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        empresa = get_setor_index().empresa(ticker)
         
         if empresa:
-            return jsonify({
-                'success': True, 
-                'data': {
-                    'id': empresa[0],
-                    'setor_economico': empresa[1],
-                    'setor': empresa[2],
-                    'setor_puro': empresa[3],
-                    'segmento': empresa[4],
-                    'empresa': empresa[5],  # acao
-                    'ticker': empresa[6],
-                    'nivel_bolsa': empresa[7],
-                    'tipo_governanca': empresa[8]
-                }
-            })
+            return jsonify({'success': True, 'data': empresa})
         else:
             return jsonify({
                 'success': False, 
@@ -630,6 +871,47 @@ def get_empresa_info(ticker):
         print(f"❌ Erro ao buscar empresa {ticker}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/empresas')
+@http_cache(max_age=max_age_referencia, versao=versao_setor_index)
+def get_empresas_info():
+    """
+    Buscar várias empresas de uma vez
+    Query params: tickers (separados por vírgula)
+    """
+    try:
+        tickers = [t.strip() for t in request.args.get('tickers', '').split(',') if t.strip()]
+        
+        if not tickers:
+            return jsonify({'success': False, 'error': 'Informe os tickers (ex: ?tickers=PETR4,VALE3)'}), 400
+        
+        if len(tickers) > Config.EMPRESAS_MAX_TICKERS:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo de {Config.EMPRESAS_MAX_TICKERS} tickers por chamada'
+            }), 400
+        
+        encontradas, faltando = get_setor_index().empresas(tickers)
+        
+        return jsonify({
+            'success': True,
+            'data': encontradas,
+            'total_empresas': len(encontradas),
+            'nao_encontrados': faltando
+        })
+        
+    except Exception as e:
+        print(f"❌ Erro ao buscar empresas: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/setor-index-info')
+@require_auth
+def get_setor_index_info():
+    """Informações sobre o índice em memória do setor_b3"""
+    return jsonify({
+        'success': True,
+        'data': get_setor_index().get_info()
+    })
+
 # ===== ROTAS RSL (protegidas por plano) =====
 
 @app.route('/api/rsl/<symbol>')
@@ -639,7 +921,7 @@ def get_rsl_ticker(symbol):
     from configuracoes.yfinance_service import YFinanceService
     
     try:
-        resultado = YFinanceService.get_rsl_data(symbol)
+        resultado = YFinanceService.get_rsl_data_incremental(symbol)
         
         if resultado:
             return jsonify({'success': True, 'data': resultado})
@@ -649,40 +931,114 @@ def get_rsl_ticker(symbol):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def snapshot_indisponivel():
+    """Resposta enquanto o primeiro snapshot de RSL ainda não foi materializado"""
+    response = jsonify({
+        'success': False,
+        'error': 'RSL setorial em preparação, tente novamente em instantes'
+    })
+    response.headers['Retry-After'] = str(Config.RSL_SNAPSHOT_POLL_SECONDS)
+    return response, 503
+
+def snapshot_meta(snapshot):
+    return {
+        'versao': snapshot['versao'],
+        'data_calculo': snapshot['data_calculo'],
+        'idade_segundos': snapshot_age(snapshot)
+    }
+
+def versao_snapshot(**kwargs):
+    """Versão do snapshot RSL (e do índice do setor_b3, que resolve o nome do setor)"""
+    snapshot = get_rsl_snapshot_service().get_latest()
+    return f"{snapshot['versao']}:{get_setor_index().versao}" if snapshot else None
+
 @app.route('/api/rsl-setor/<setor_nome>')
 @require_plan(2)  # RSL só para planos premium
+@http_cache(versao=versao_snapshot)
 def get_rsl_setor(setor_nome):
-    """Calcular RSL médio de um setor - FUNCIONALIDADE PREMIUM"""
+    """RSL médio de um setor a partir do último snapshot - FUNCIONALIDADE PREMIUM"""
+    try:
+        setores = get_setor_index().buscar_setores(setor_nome)
+        snapshot, resultado = get_rsl_snapshot_service().find_setor(setor_nome, setores)
+        
+        if snapshot is None:
+            return snapshot_indisponivel()
+        
+        if resultado:
+            return jsonify({'success': True, 'data': resultado, 'snapshot': snapshot_meta(snapshot)})
+        else:
+            return jsonify({'success': False, 'error': f'RSL não calculado para {setor_nome}'}), 404
+            
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+
+@app.route('/api/rsl-setores')
+@require_plan(2)  # RSL só para planos premium
+@http_cache(versao=versao_snapshot)
+def get_rsl_setores():
+    """RSL de todos os setores a partir do último snapshot - FUNCIONALIDADE PREMIUM"""
+    try:
+        snapshot = get_rsl_snapshot_service().get_latest()
+        
+        if snapshot is None:
+            return snapshot_indisponivel()
+        
+        execucao = snapshot['execucao']
+        return jsonify({
+            'success': True,
+            'data': snapshot['setores'],
+            'total_setores': execucao.get('total_setores', len(snapshot['setores'])),
+            'setores_com_dados': len(snapshot['setores']),
+            'parcial': execucao['falhas'] > 0,
+            'execucao': execucao,
+            'snapshot': snapshot_meta(snapshot)
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/pairs/<setor_nome>')
+@require_plan(2)  # Pairs trading só para planos premium
+def get_pairs_setor(setor_nome):
+    """Pares cointegrados de um setor, ordenados pelo p-valor - FUNCIONALIDADE PREMIUM"""
     from configuracoes.yfinance_service import YFinanceService
     
+    period = request.args.get('period', '1y')
     try:
-        # Buscar tickers do setor no banco
-        conn = get_local_db_connection()
-        cursor = conn.cursor()
+        period_to_start(period)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': f"Parâmetro limit inválido: {request.args.get('limit')}"}), 400
+    
+    try:
+        tickers = get_setor_index().tickers_do_setor(setor_nome)
         
-        cursor.execute("""
-            SELECT ticker FROM setor_b3 
-            WHERE setor_economico ILIKE %s
-        """, (f'%{setor_nome}%',))
+        if len(tickers) < 2:
+            return jsonify({'success': False, 'error': f'Setor {setor_nome} precisa de ao menos 2 tickers'}), 404
         
-        tickers = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
+        resultado = YFinanceService.get_pairs_data(setor_nome, tickers, period)
         
-        if not tickers:
-            return jsonify({'success': False, 'error': f'Nenhum ticker para {setor_nome}'}), 404
+        if resultado is None:
+            return jsonify({'success': False, 'error': f'Sem dados de preço para {setor_nome}'}), 404
         
-        resultado = YFinanceService.get_sector_rsl_data(tickers, setor_nome)
+        return jsonify({'success': True, 'data': {**resultado, 'pares': resultado['pares'][:limit]}})
         
-        if resultado:
-            return jsonify({'success': True, 'data': resultado})
-        else:
-            return jsonify({'success': False, 'error': f'RSL não calculado para {setor_nome}'}), 500
-            
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-
+@app.route('/api/rsl-snapshot-info')
+@require_auth
+def get_rsl_snapshot_info():
+    """Informações sobre o agendador de snapshots de RSL"""
+    return jsonify({
+        'success': True,
+        'data': get_rsl_snapshot_service().get_info()
+    })
 
 @app.route('/api/cache-info')
 @require_auth
@@ -691,11 +1047,32 @@ def get_cache_info():
     from configuracoes.yfinance_service import YFinanceService
     
     cache_info = YFinanceService.get_cache_info()
+    cache_info['http_cache'] = get_http_cache_stats()
+    cache_info['compressao'] = get_compression_stats()
+    cache_info['estaticos'] = get_static_assets().get_info()
     return jsonify({
         'success': True,
         'data': cache_info
     })
 
+@app.route('/api/session-cache-info')
+@require_auth
+def get_session_cache_info():
+    """Informações sobre o cache de sessões"""
+    return jsonify({
+        'success': True,
+        'data': AuthService.get_session_cache_info()
+    })
+
+@app.route('/api/price-store-info')
+@require_auth
+def get_price_store_info():
+    """Informações sobre o store local de preços"""
+    return jsonify({
+        'success': True,
+        'data': get_price_store().get_stats()
+    })
+
 @app.route('/api/clear-cache', methods=['POST'])
 @require_plan(3)  # Só admins podem limpar cache
 def clear_cache():
@@ -729,17 +1106,51 @@ def newsletter():
 @app.route('/api/backtest', methods=['POST'])
 @require_plan(2)  # Backtest só para premium
 def backtest():
-    return jsonify({
-        'strategy': 'Momentum Strategy',
-        'initial_capital': 100000,
-        'final_capital': 168750,
-        'return_percent': 68.75,
-        'trades': 47,
-        'win_rate': 72,
-        'sharpe_ratio': 1.85,
-        'user': g.current_user['name'],
-        'plan': g.current_user['plan_name']
-    })
+    """
+    Backtest do momentum por RSL. Corpo JSON (todos opcionais):
+    tickers ou setor, period, periodo_mm, top_n, rebalance (valores ou listas para varredura),
+    initial_capital, cost_bps
+    """
+    from configuracoes.yfinance_service import YFinanceService
+    
+    try:
+        params = request.get_json(silent=True) or {}
+        tickers = params.get('tickers')
+        
+        if not tickers:
+            # Universo: um setor ou todo o setor_b3
+            index = get_setor_index()
+            if params.get('setor'):
+                tickers = index.tickers_do_setor(params['setor'])
+            else:
+                tickers = index.todos_tickers()
+        
+        if not tickers:
+            return jsonify({'success': False, 'error': 'Nenhum ticker para o backtest'}), 404
+        
+        resultado = YFinanceService.get_backtest_data(
+            tickers,
+            period=params.get('period', '5y'),
+            periodo_mm=params.get('periodo_mm', 30),
+            top_n=params.get('top_n', 5),
+            rebalance=params.get('rebalance', 21),
+            initial_capital=params.get('initial_capital', 100000),
+            cost_bps=params.get('cost_bps', 10)
+        )
+        
+        if resultado is None:
+            return jsonify({'success': False, 'error': 'Sem dados de preço para o backtest'}), 404
+        
+        return jsonify({
+            **resultado,
+            'user': g.current_user['name'],
+            'plan': g.current_user['plan_name']
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 
 # ===== ROTA DE TESTE DO BANCO =====
@@ -754,6 +1165,36 @@ def test_db():
     else:
         return jsonify(result), 500
 
+if Config.METRICS_ENABLED and not Config.METRICS_TOKEN:
+    print("⚠️ METRICS_TOKEN não definido: /metrics responde sem autenticação (defina o token em produção)")
+
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato do Prometheus (histogramas por rota e por trecho, de todos os workers)"""
+    if Config.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {Config.METRICS_TOKEN}':
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metrics-info')
+@require_plan(3)  # Só admins
+def metrics_info():
+    """p50/p95/p99 por rota e por trecho (banco, yfinance, cálculos, serialização)"""
+    return jsonify({
+        'success': True,
+        'data': get_metrics_summary()
+    })
+
+@app.route('/api/db-pool')
+@require_plan(3)  # Só admins
+def db_pool_info():
+    """Métricas do pool de conexões PostgreSQL"""
+    from configuracoes.database import get_pool_stats
+    
+    return jsonify({
+        'success': True,
+        'data': get_pool_stats()
+    })
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print("🚀 Iniciando Geminii API...")
@@ -764,10 +1205,20 @@ if __name__ == '__main__':
     print("  - /api/auth/logout (POST)")
     print("  - /api/dashboard (GET) - 🔒 AUTH")
     print("  - /api/premium/* - 🔒 PREMIUM")
+    print("  - /api/plans")
     print("  - /api/setores")
     print("  - /api/setor/<nome>")
     print("  - /api/empresa/<ticker>")
+    print("  - /api/empresas?tickers=")
     print("  - /api/rsl/* - 🔒 PREMIUM")
+    print("  - /api/rsl-setores - 🔒 PREMIUM")
+    print("  - /api/pairs/<setor> - 🔒 PREMIUM")
+    print("  - /api/rsl-snapshot-info")
+    print("  - /api/stream/quotes (SSE)")
+    print("  - /api/assets")
     print("  - /api/test-db")
+    print("  - /api/db-pool - 🔒 ADMIN")
+    print("  - /api/metrics-info - 🔒 ADMIN")
+    print("  - /metrics (Prometheus)")
     print("🔐 Sistema de autenticação ativado!")
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
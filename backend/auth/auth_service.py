@@ -1,6 +1,7 @@
 # auth/auth_service.py
 import bcrypt
 import secrets
+import time
 from datetime import datetime, timedelta
 import sys
 import os
@@ -8,6 +9,40 @@ import os
 # Adicionar o diretório pai ao path para importar configuracoes
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from configuracoes.database import get_local_db_connection
+from configuracoes.config import Config
+from configuracoes.reference_data import get_reference_data, register_notify_handler
+from auth.session_cache import SessionCache
+from auth.signed_tokens import (
+    InvalidTokenError, RevocationList, decode_token, encode_token, is_signed_token
+)
+
+# Cache das sessões validadas (evita o JOIN em toda requisição protegida)
+session_cache = SessionCache(
+    ttl_seconds=Config.SESSION_CACHE_TTL,
+    max_size=Config.SESSION_CACHE_MAX_SIZE
+)
+
+# invalidate_user_sessions em outro worker chega pelo canal de NOTIFY
+PREFIXO_SESSOES = 'sessoes'
+register_notify_handler(PREFIXO_SESSOES, lambda user_id: session_cache.invalidate_user(int(user_id)))
+
+def check_token_config():
+    """Recusa a partida com modo desconhecido ou modo 'signed' sem segredo forte"""
+    if Config.AUTH_TOKEN_MODE not in ('opaque', 'signed'):
+        raise RuntimeError(f"AUTH_TOKEN_MODE inválido: {Config.AUTH_TOKEN_MODE} (use 'opaque' ou 'signed')")
+    if Config.AUTH_TOKEN_MODE == 'signed' and len(Config.AUTH_TOKEN_SECRET) < Config.AUTH_TOKEN_SECRET_MIN_LENGTH:
+        raise RuntimeError(
+            f"AUTH_TOKEN_MODE=signed exige AUTH_TOKEN_SECRET com ao menos "
+            f"{Config.AUTH_TOKEN_SECRET_MIN_LENGTH} caracteres"
+        )
+
+check_token_config()
+
+# Épocas de logout para os tokens assinados
+revocation_list = RevocationList(
+    refresh_seconds=Config.AUTH_REVOCATION_REFRESH,
+    max_token_age=Config.AUTH_SESSION_HOURS * 3600
+)
 
 class AuthService:
     """Serviço de autenticação simples"""
@@ -53,13 +88,22 @@ class AuthService:
                 return {'success': False, 'error': 'Senha incorreta'}
             
             # Criar sessão
-            session_token = secrets.token_urlsafe(32)
-            expires_at = datetime.now() + timedelta(hours=24)  # 24 horas
-            
-            cursor.execute("""
-                INSERT INTO user_sessions (user_id, session_token, expires_at, is_active)
-                VALUES (%s, %s, %s, %s)
-            """, (user_id, session_token, expires_at, True))
+            if Config.AUTH_TOKEN_MODE == 'signed':
+                session_token, expires_at = AuthService.issue_signed_token({
+                    'user_id': user_id,
+                    'name': name,
+                    'email': user_email,
+                    'plan_name': plan_name,
+                    'plan_id': plan_id
+                })
+            else:
+                session_token = secrets.token_urlsafe(32)
+                expires_at = datetime.now() + timedelta(hours=Config.AUTH_SESSION_HOURS)
+                
+                cursor.execute("""
+                    INSERT INTO user_sessions (user_id, session_token, expires_at, is_active)
+                    VALUES (%s, %s, %s, %s)
+                """, (user_id, session_token, expires_at, True))
             
             # Atualizar último login
             cursor.execute("""
@@ -86,15 +130,63 @@ class AuthService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def issue_signed_token(user_data):
+        """Emite token assinado com os dados do usuário; retorna (token, expires_at)"""
+        expires_at = datetime.now() + timedelta(hours=Config.AUTH_SESSION_HOURS)
+        payload = {
+            'user_id': user_data['user_id'],
+            'name': user_data['name'],
+            'email': user_data['email'],
+            'plan_name': user_data['plan_name'],
+            'plan_id': user_data['plan_id'],
+            'iat': time.time(),
+            'exp': expires_at.timestamp()
+        }
+        return encode_token(payload, Config.AUTH_TOKEN_SECRET), expires_at
+    
+    @staticmethod
+    def verify_signed_token(session_token):
+        """Verifica token assinado sem consultar o banco"""
+        try:
+            payload = decode_token(session_token, Config.AUTH_TOKEN_SECRET)
+        except InvalidTokenError as e:
+            return {'success': False, 'error': str(e)}
+        
+        if revocation_list.is_revoked(payload['user_id'], payload['iat']):
+            return {'success': False, 'error': 'Sessão inválida ou expirada'}
+        
+        return {
+            'success': True,
+            'data': {
+                'user_id': payload['user_id'],
+                'name': payload['name'],
+                'email': payload['email'],
+                'plan_name': payload['plan_name'],
+                'plan_id': payload['plan_id']
+            }
+        }
+    
     @staticmethod
     def verify_session(session_token):
-        """Verificar se sessão é válida"""
+        """Verificar se sessão é válida (token opaco ou, no modo 'signed', assinado)"""
+        if is_signed_token(session_token):
+            if Config.AUTH_TOKEN_MODE != 'signed':
+                return {'success': False, 'error': 'Sessão inválida ou expirada'}
+            return AuthService.verify_signed_token(session_token)
+        
+        cached_user = session_cache.get(session_token)
+        if cached_user is not None:
+            return {'success': True, 'data': cached_user}
+        
         try:
+            lido_em = time.time()
             conn = get_local_db_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
-                SELECT s.user_id, u.name, u.email, p.display_name as plan_name, p.id as plan_id
+                SELECT s.user_id, u.name, u.email, p.display_name as plan_name, p.id as plan_id,
+                       s.expires_at
                 FROM user_sessions s
                 JOIN users u ON s.user_id = u.id
                 LEFT JOIN plans p ON u.plan_id = p.id
@@ -109,16 +201,18 @@ class AuthService:
             conn.close()
             
             if session:
-                user_id, name, email, plan_name, plan_id = session
+                user_id, name, email, plan_name, plan_id, expires_at = session
+                user_data = {
+                    'user_id': user_id,
+                    'name': name,
+                    'email': email,
+                    'plan_name': plan_name,
+                    'plan_id': plan_id
+                }
+                session_cache.set(session_token, user_data, expires_at, lido_em)
                 return {
                     'success': True,
-                    'data': {
-                        'user_id': user_id,
-                        'name': name,
-                        'email': email,
-                        'plan_name': plan_name,
-                        'plan_id': plan_id
-                    }
+                    'data': user_data
                 }
             else:
                 return {'success': False, 'error': 'Sessão inválida ou expirada'}
@@ -129,6 +223,18 @@ class AuthService:
     @staticmethod
     def logout(session_token):
         """Fazer logout (invalidar sessão)"""
+        if is_signed_token(session_token):
+            if Config.AUTH_TOKEN_MODE != 'signed':
+                return {'success': False, 'error': 'Sessão inválida ou expirada'}
+            try:
+                payload = decode_token(session_token, Config.AUTH_TOKEN_SECRET)
+                revocation_list.revoke_user(payload['user_id'])
+                return {'success': True, 'message': 'Logout realizado com sucesso'}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+        
+        session_cache.invalidate(session_token)
+        
         try:
             conn = get_local_db_connection()
             cursor = conn.cursor()
@@ -143,6 +249,10 @@ class AuthService:
             cursor.close()
             conn.close()
             
+            # Um verify_session concorrente pode ter lido a sessão ainda ativa e
+            # recolocado no cache antes do commit: invalida de novo depois dele
+            session_cache.invalidate(session_token)
+            
             return {'success': True, 'message': 'Logout realizado com sucesso'}
             
         except Exception as e:
@@ -211,11 +321,33 @@ class AuthService:
             cursor.close()
             conn.close()
             
+            session_cache.purge_expired()
+            
             return {'success': True, 'cleaned_sessions': affected_rows}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    @staticmethod
+    def invalidate_user_sessions(user_id):
+        """
+        Descarta do cache as sessões de um usuário e revoga os tokens assinados já
+        emitidos para ele (ex: mudou de plano; o token antigo carrega o plano antigo).
+        Os outros workers descartam as sessões ao receber o aviso no canal de NOTIFY.
+        """
+        session_cache.invalidate_user(user_id)
+        if Config.AUTH_TOKEN_MODE == 'signed':
+            revocation_list.revoke_user(user_id)
+        try:
+            get_reference_data().notify(f'{PREFIXO_SESSOES}:{user_id}')
+        except Exception as e:
+            print(f"⚠️ Erro ao avisar os outros workers (sessões do usuário {user_id} ficam até o TTL): {e}")
+    
+    @staticmethod
+    def get_session_cache_info():
+        """Contadores do cache de sessões"""
+        return session_cache.get_info()
+
 # ✅ FUNÇÃO PARA TESTAR O SISTEMA
 def test_auth_system():
     """Testar sistema de autenticação"""
@@ -0,0 +1,152 @@
+# auth/session_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def hash_token(session_token):
+    """Chave do cache: nunca guardamos o token em texto puro"""
+    return hashlib.sha256(session_token.encode('utf-8')).hexdigest()
+
+
+class SessionCache:
+    """
+    Cache em memória das sessões validadas pelo AuthService.verify_session.
+    Limitado por TTL e por tamanho (LRU), com invalidação por token e por usuário.
+    Um token invalidado fica marcado por um TTL: um verify_session concorrente que
+    leu a sessão antes do logout não consegue recolocá-la no cache. O mesmo vale
+    para invalidate_user: set() com `lido_em` anterior à invalidação do usuário é
+    ignorado.
+
+    O cache é por processo: invalidate/invalidate_user só limpam este worker. Os
+    demais recebem invalidate_user pelo canal de NOTIFY dos dados de referência
+    (AuthService.invalidate_user_sessions); sem o LISTEN ligado, largam a sessão
+    no TTL.
+    """
+
+    def __init__(self, ttl_seconds=60, max_size=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token_hash -> (user_data, valido_ate)
+        self._by_user = {}  # user_id -> {token_hash}
+        self._invalidated = {}  # token_hash -> até quando set() é ignorado
+        self._users_invalidated = {}  # user_id -> quando as sessões foram invalidadas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _remove(self, token_hash):
+        user_data, _ = self._entries.pop(token_hash)
+        tokens = self._by_user.get(user_data['user_id'])
+        if tokens is not None:
+            tokens.discard(token_hash)
+            if not tokens:
+                del self._by_user[user_data['user_id']]
+
+    def get(self, session_token):
+        """Retorna os dados do usuário se a sessão estiver no cache e válida"""
+        token_hash = hash_token(session_token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user_data, valid_until = entry
+            if valid_until <= now:
+                self._remove(token_hash)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return dict(user_data)
+
+    def set(self, session_token, user_data, expires_at=None, lido_em=None):
+        """
+        Guarda a sessão até o TTL ou até a expiração da própria sessão.
+        `lido_em` é quando a leitura da sessão no banco começou.
+        """
+        token_hash = hash_token(session_token)
+        valid_until = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            valid_until = min(valid_until, expires_at.timestamp())
+
+        with self._lock:
+            if self._invalidated.get(token_hash, 0) > time.time():
+                return
+            if lido_em is not None and lido_em <= self._users_invalidated.get(user_data['user_id'], float('-inf')):
+                return
+            if token_hash in self._entries:
+                self._remove(token_hash)
+
+            self._entries[token_hash] = (dict(user_data), valid_until)
+            self._by_user.setdefault(user_data['user_id'], set()).add(token_hash)
+
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, session_token):
+        """Remove uma sessão (logout)"""
+        token_hash = hash_token(session_token)
+        now = time.time()
+        with self._lock:
+            self._invalidated = {h: until for h, until in self._invalidated.items() if until > now}
+            self._invalidated[token_hash] = now + self.ttl_seconds
+            if token_hash in self._entries:
+                self._remove(token_hash)
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        """Remove todas as sessões de um usuário (troca de plano, desativação)"""
+        now = time.time()
+        with self._lock:
+            self._users_invalidated = {
+                u: quando for u, quando in self._users_invalidated.items() if quando > now - self.ttl_seconds
+            }
+            self._users_invalidated[user_id] = now
+            for token_hash in list(self._by_user.get(user_id, ())):
+                self._remove(token_hash)
+                self.invalidations += 1
+
+    def purge_expired(self):
+        """Remove entradas vencidas; retorna quantas foram removidas"""
+        now = time.time()
+        with self._lock:
+            expired = [h for h, (_, valid_until) in self._entries.items() if valid_until <= now]
+            for token_hash in expired:
+                self._remove(token_hash)
+            self._invalidated = {h: until for h, until in self._invalidated.items() if until > now}
+            self._users_invalidated = {
+                u: quando for u, quando in self._users_invalidated.items() if quando > now - self.ttl_seconds
+            }
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._invalidated.clear()
+            self._users_invalidated.clear()
+
+    def get_info(self):
+        """Contadores no mesmo formato do cache RSL"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'maxsize': self.max_size,
+                'currsize': len(self._entries),
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': round((self.hits / total) * 100, 2) if total > 0 else 0
+            }
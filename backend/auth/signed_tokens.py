@@ -0,0 +1,139 @@
+# auth/signed_tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from configuracoes.database import get_local_db_connection
+
+
+class InvalidTokenError(Exception):
+    """Token assinado inválido, adulterado ou expirado"""
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    padding = '=' * (-len(text) % 4)
+    return base64.urlsafe_b64decode(text + padding)
+
+
+def is_signed_token(token):
+    """Tokens opacos (secrets.token_urlsafe) nunca contêm '.'"""
+    return '.' in token
+
+
+def _check_secret(secret):
+    if not secret:
+        raise InvalidTokenError('AUTH_TOKEN_SECRET não configurado')
+
+
+def encode_token(payload, secret):
+    """Gera token no formato <payload_base64>.<hmac_sha256_base64>"""
+    _check_secret(secret)
+    body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    signature = hmac.new(secret.encode('utf-8'), body.encode('ascii'), hashlib.sha256).digest()
+    return f'{body}.{_b64encode(signature)}'
+
+
+def decode_token(token, secret, now=None):
+    """Valida assinatura e expiração; retorna o payload"""
+    _check_secret(secret)
+    try:
+        body, signature = token.split('.', 1)
+        expected = hmac.new(secret.encode('utf-8'), body.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise InvalidTokenError('Assinatura inválida')
+        payload = json.loads(_b64decode(body))
+    except InvalidTokenError:
+        raise
+    except Exception:
+        raise InvalidTokenError('Formato de token inválido')
+
+    now = time.time() if now is None else now
+    if payload.get('exp', 0) <= now:
+        raise InvalidTokenError('Sessão expirada')
+
+    return payload
+
+
+class RevocationList:
+    """
+    Época de logout por usuário: tokens emitidos antes dela são recusados.
+    Persistida no banco (tabela criada por migrations/user_logout_epochs.py) e
+    recarregada periodicamente, para valer em todos os workers.
+    A recarga também traz os usuários desativados (u.is_active = false), recusados
+    mesmo com token válido. Se a recarga falha, todos os tokens são recusados até a
+    próxima dar certo (falha fechada): sem a lista não dá para saber quem foi revogado.
+    """
+
+    RETRY_SECONDS = 5  # nova tentativa de recarga após uma falha
+
+    def __init__(self, refresh_seconds=30, max_token_age=86400):
+        self.refresh_seconds = refresh_seconds
+        self.max_token_age = max_token_age
+        self._lock = threading.Lock()
+        self._epochs = {}  # user_id -> timestamp do último logout
+        self._inactive = frozenset()  # usuários desativados
+        self._healthy = False
+        self._next_refresh = 0.0
+
+    def refresh(self):
+        """Recarrega as épocas recentes (as antigas não afetam tokens ainda válidos)"""
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT user_id, logout_epoch FROM user_logout_epochs
+                WHERE logout_epoch > %s
+            """, (time.time() - self.max_token_age,))
+            rows = cursor.fetchall()
+            cursor.execute("SELECT id FROM users WHERE is_active = false")
+            inactive = frozenset(row[0] for row in cursor.fetchall())
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+            with self._lock:
+                for user_id, epoch in rows:
+                    self._epochs[user_id] = max(epoch, self._epochs.get(user_id, 0))
+                self._inactive = inactive
+                self._healthy = True
+                self._next_refresh = time.time() + self.refresh_seconds
+        except Exception as e:
+            print(f"⚠️ Erro ao recarregar revogações de tokens (tokens assinados recusados até a próxima recarga): {e}")
+            with self._lock:
+                self._healthy = False
+                self._next_refresh = time.time() + min(self.RETRY_SECONDS, self.refresh_seconds)
+
+    def is_revoked(self, user_id, issued_at):
+        if time.time() >= self._next_refresh:
+            self.refresh()
+        with self._lock:
+            if not self._healthy or user_id in self._inactive:
+                return True
+            return issued_at <= self._epochs.get(user_id, 0)
+
+    def revoke_user(self, user_id):
+        """Invalida todos os tokens assinados já emitidos para o usuário (logout, troca de plano)"""
+        epoch = time.time()
+        with self._lock:
+            self._epochs[user_id] = epoch
+
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO user_logout_epochs (user_id, logout_epoch)
+            VALUES (%s, %s)
+            ON CONFLICT (user_id) DO UPDATE SET logout_epoch = EXCLUDED.logout_epoch
+        """, (user_id, epoch))
+        conn.commit()
+        cursor.close()
+        conn.close()
@@ -0,0 +1,127 @@
+# benchmarks/bench_async_serving.py
+"""
+Compara o gunicorn em modo sync e async (gevent) sob carga concorrente em
+/api/stocks, com o FixtureProvider simulando a latência do yfinance.
+Cada requisição pede um ticker diferente, então todas esperam o provedor.
+Não precisa de banco nem de rede.
+
+Uso: python benchmarks/bench_async_serving.py [requisicoes] [concorrencia] [latencia] [workers]
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def criar_fixtures(fixture_dir, quantidade, dias=260):
+    """CSVs OHLCV sintéticos T0000.SA ... para o FixtureProvider"""
+    datas = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=dias)
+    rng = np.random.default_rng(7)
+    for i in range(quantidade):
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, dias)))
+        data = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(100_000, 1_000_000, dias)
+        }, index=pd.Index(datas, name='Date'))
+        data.to_csv(os.path.join(fixture_dir, f'T{i:04d}.SA.csv'))
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_gunicorn(modo, porta, fixture_dir, latencia, workers):
+    store_dir = tempfile.mkdtemp(prefix=f'bench-{modo}-')
+    env = {
+        **os.environ,
+        'SERVING_MODE': modo,
+        'GUNICORN_BIND': f'127.0.0.1:{porta}',
+        'GUNICORN_WORKERS': str(workers),
+        'PRICE_PROVIDER': 'fixture',
+        'PRICE_FIXTURE_DIR': fixture_dir,
+        'PRICE_FIXTURE_LATENCY': str(latencia),
+        'PRICE_STORE_DIR': store_dir,
+        'CACHE_BACKEND': 'memory',
+        'RSL_SNAPSHOT_ENABLED': 'false'
+    }
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    # Esperar todos os workers responderem
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{porta}/api/status', timeout=1).read()
+            return processo, store_dir
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError(f'gunicorn ({modo}) não subiu')
+
+
+def requisitar(url):
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=300) as response:
+            response.read()
+            ok = response.status == 200
+    except OSError:
+        ok = False
+    return ok, time.perf_counter() - inicio
+
+
+def medir(modo, fixture_dir, requisicoes, concorrencia, latencia, workers):
+    porta = porta_livre()
+    processo, store_dir = iniciar_gunicorn(modo, porta, fixture_dir, latencia, workers)
+    try:
+        urls = [f'http://127.0.0.1:{porta}/api/stocks?symbols=T{i:04d}' for i in range(requisicoes)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            resultados = list(executor.map(requisitar, urls))
+        total = time.perf_counter() - inicio
+    finally:
+        processo.terminate()
+        processo.wait()
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    tempos = np.array([t for _, t in resultados]) * 1000
+    erros = sum(1 for ok, _ in resultados if not ok)
+    print(f"{modo:>6}: {requisicoes / total:8.1f} req/s | p50 {np.percentile(tempos, 50):8.0f}ms"
+          f" | p95 {np.percentile(tempos, 95):8.0f}ms | erros {erros} | total {total:.1f}s")
+
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    concorrencia = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latencia = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+
+    fixture_dir = tempfile.mkdtemp(prefix='bench-fixtures-')
+    try:
+        criar_fixtures(fixture_dir, requisicoes)
+
+        print(f"⏱️ Benchmark /api/stocks: {requisicoes} requisições, {concorrencia} simultâneas, "
+              f"latência do provedor {latencia * 1000:.0f}ms, {workers} workers")
+        print("=" * 80)
+        for modo in ('sync', 'async'):
+            medir(modo, fixture_dir, requisicoes, concorrencia, latencia, workers)
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_auth_verify.py
+"""
+Compara requisições/segundo em /api/auth/verify com token opaco e token assinado.
+Precisa do banco configurado (login real), como o test_auth_system.
+
+Uso: python benchmarks/bench_auth_verify.py [email] [senha] [segundos]
+"""
+import sys
+import os
+import secrets
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from auth.auth_service import AuthService, session_cache
+from configuracoes.config import Config
+
+
+def medir(client, token, segundos):
+    """Requisições por segundo em /api/auth/verify durante `segundos`"""
+    headers = {'Authorization': f'Bearer {token}'}
+    total = 0
+    inicio = time.perf_counter()
+    fim = inicio + segundos
+    while time.perf_counter() < fim:
+        response = client.get('/api/auth/verify', headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f'Verify falhou: {response.get_json()}')
+        total += 1
+    return total / (time.perf_counter() - inicio)
+
+
+def login(email, senha, modo):
+    Config.AUTH_TOKEN_MODE = modo
+    result = AuthService.login(email, senha)
+    if not result['success']:
+        raise RuntimeError(f"Login falhou ({modo}): {result['error']}")
+    return result['data']['session_token']
+
+
+def main():
+    email = sys.argv[1] if len(sys.argv) > 1 else 'admin@geminii.com.br'
+    senha = sys.argv[2] if len(sys.argv) > 2 else 'admin123'
+    segundos = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    if not Config.AUTH_TOKEN_SECRET:
+        Config.AUTH_TOKEN_SECRET = secrets.token_urlsafe(48)  # só para tokens emitidos no benchmark
+
+    client = app.test_client()
+    token_opaco = login(email, senha, 'opaque')
+    token_assinado = login(email, senha, 'signed')
+
+    print("⏱️ Benchmark /api/auth/verify")
+    print("=" * 40)
+
+    ttl_original = session_cache.ttl_seconds
+    session_cache.ttl_seconds = 0
+    session_cache.clear()
+    rps = medir(client, token_opaco, segundos)
+    print(f"🗄️ Opaco (sem cache de sessão): {rps:10.1f} req/s")
+
+    session_cache.ttl_seconds = ttl_original
+    rps = medir(client, token_opaco, segundos)
+    print(f"🗄️ Opaco (com cache de sessão): {rps:10.1f} req/s")
+
+    rps = medir(client, token_assinado, segundos)
+    print(f"🔏 Assinado:                    {rps:10.1f} req/s")
+
+    AuthService.logout(token_opaco)
+    AuthService.logout(token_assinado)
+
+
+if __name__ == '__main__':
+    main()
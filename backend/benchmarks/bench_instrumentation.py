@@ -0,0 +1,84 @@
+# benchmarks/bench_instrumentation.py
+"""
+Custo da instrumentação: um span vazio, o registro de uma requisição
+(histograma da rota + Server-Timing) e calculate_rsl/calculate_volatilidade
+para um universo de tickers com e sem métricas. Não precisa de banco nem de rede.
+
+Uso: python benchmarks/bench_instrumentation.py [tickers]
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Response
+from configuracoes.config import Config
+from configuracoes.instrumentation import span, begin_request, finish_request
+from configuracoes.yfinance_service import YFinanceService
+
+REPETICOES = 7
+
+
+def medir(fn, repeticoes=REPETICOES):
+    fn()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def spans_vazios(n=100000):
+    for _ in range(n):
+        with span('bench', 'vazio'):
+            pass
+
+
+def requisicoes(n=20000):
+    response = Response('')
+    for _ in range(n):
+        begin_request()
+        with span('sql', 'SELECT'):
+            pass
+        finish_request(response, '/api/bench', 'GET')
+
+
+def universo(n_tickers, seed=5):
+    rng = np.random.default_rng(seed)
+    return [pd.Series(20 * np.exp(np.cumsum(rng.normal(0, 0.02, 250)))) for _ in range(n_tickers)]
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    Config.METRICS_DIR = ''  # só o processo: sem gravar arquivos durante a medição
+    Config.SERVER_TIMING_ENABLED = True
+
+    print("⏱️ Custo da instrumentação")
+    print("=" * 60)
+    print(f"   span vazio:             {medir(spans_vazios) / 100000 * 1e6:6.2f} µs")
+    print(f"   requisição (1 span):    {medir(requisicoes) / 20000 * 1e6:6.2f} µs")
+
+    series = universo(n_tickers)
+
+    def calcular():
+        for serie in series:
+            YFinanceService.calculate_rsl(serie, 30)
+            YFinanceService.calculate_volatilidade(serie)
+
+    Config.METRICS_ENABLED = False
+    sem = medir(calcular)
+    Config.METRICS_ENABLED = True
+    com = medir(calcular)
+    print(f"\n📈 RSL + volatilidade de {n_tickers} tickers:")
+    print(f"   sem métricas: {sem * 1000:8.2f}ms")
+    print(f"   com métricas: {com * 1000:8.2f}ms ({(com / sem - 1):+.1%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_serialization.py
+"""
+Compara a serialização dos dados de gráfico de uma ação: o formato antigo
+(iterrows + um dict por barra + json), as colunas convertidas para linhas, as
+colunas em JSON (orjson, se instalado) e em msgpack (se instalado), para
+históricos de tamanhos diferentes. Não precisa de banco nem de rede.
+
+Uso: python benchmarks/bench_serialization.py [repeticoes]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuracoes import serialization
+from configuracoes.serialization import chart_columns, chart_rows, dumps_json, dumps_msgpack
+
+TAMANHOS = [30, 250, 1250, 5000]
+
+
+def historico_sintetico(n_barras, seed=3):
+    rng = np.random.default_rng(seed)
+    datas = pd.bdate_range(end='2024-12-31', periods=n_barras)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, n_barras)))
+    return pd.DataFrame({'Close': close, 'Volume': rng.integers(1e5, 1e7, n_barras).astype('float64')}, index=datas)
+
+
+def formato_antigo(data, pontos):
+    chart_data = []
+    for date, row in data.tail(pontos).iterrows():
+        chart_data.append({
+            'date': date.strftime('%d/%m'),
+            'price': round(row['Close'], 2),
+            'volume': int(row['Volume'])
+        })
+    return json.dumps({'chart_data': chart_data}).encode('utf-8')
+
+
+def medir(fn, repeticoes):
+    fn()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = fn()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, len(saida)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print("⏱️ Serialização dos dados de gráfico")
+    print(f"   orjson: {'sim' if serialization.orjson else 'não (json da biblioteca padrão)'} | "
+          f"msgpack: {'sim' if serialization.msgpack else 'não'}")
+    print("=" * 72)
+
+    for n in TAMANHOS:
+        data = historico_sintetico(n)
+        formatos = {
+            'antigo (iterrows + json)': lambda: formato_antigo(data, n),
+            'colunas -> linhas': lambda: dumps_json({'chart_data': chart_rows(chart_columns(data, n))}),
+            'colunas (JSON)': lambda: dumps_json({'chart': chart_columns(data, n)})
+        }
+        if serialization.msgpack:
+            formatos['colunas (msgpack)'] = lambda: dumps_msgpack({'chart': chart_columns(data, n)})
+
+        print(f"\n📈 {n} barras:")
+        base_ms, base_bytes = None, None
+        for nome, fn in formatos.items():
+            ms, tamanho = medir(fn, repeticoes)
+            base_ms, base_bytes = base_ms or ms, base_bytes or tamanho
+            print(f"   {nome:<26} {ms:8.2f}ms ({base_ms / ms:5.1f}x) {tamanho:9d} bytes ({tamanho / base_bytes:4.0%})")
+
+
+if __name__ == '__main__':
+    main()
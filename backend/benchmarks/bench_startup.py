@@ -0,0 +1,105 @@
+# benchmarks/bench_startup.py
+"""
+Mede o tempo de partida da API: importação do app e primeira resposta de
+/api/status num processo novo, o custo das dependências que agora só carregam
+no primeiro uso, e o tempo até o gunicorn responder com e sem preload_app.
+Não precisa de banco nem de rede.
+
+Uso: python benchmarks/bench_startup.py [repeticoes] [workers]
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = {**os.environ, 'RSL_SNAPSHOT_ENABLED': 'false', 'CACHE_BACKEND': 'memory'}
+
+# Roda num processo novo: nada importado ainda
+MEDIR_APP = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+response = client.get('/api/status')
+t2 = time.perf_counter()
+assert response.status_code == 200
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'primeira_resposta_ms': (t2 - t0) * 1000}))
+"""
+
+MEDIR_MODULO = """
+import json, time
+t0 = time.perf_counter()
+import {modulo}
+print(json.dumps({{'import_ms': (time.perf_counter() - t0) * 1000}}))
+"""
+
+ADIADOS = ['yfinance', 'statsmodels.tsa.stattools', 'statsmodels.regression.rolling']
+
+
+def rodar(codigo):
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=BACKEND_DIR, env=ENV,
+                           capture_output=True, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def tempo_gunicorn(preload, workers):
+    """Segundos do início do gunicorn até a primeira resposta de /api/status"""
+    porta = porta_livre()
+    env = {**ENV, 'GUNICORN_BIND': f'127.0.0.1:{porta}', 'GUNICORN_WORKERS': str(workers),
+           'GUNICORN_PRELOAD': 'true' if preload else 'false', 'SERVING_MODE': 'sync'}
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limite = time.time() + 60
+        while time.time() < limite:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{porta}/api/status', timeout=2).read()
+                return time.perf_counter() - inicio
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError('gunicorn não respondeu')
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    print("⏱️ Benchmark de partida")
+    print("=" * 60)
+
+    medidas = [rodar(MEDIR_APP) for _ in range(repeticoes)]
+    print(f"📦 import app:                {statistics.median(m['import_ms'] for m in medidas):8.0f}ms (mediana)")
+    print(f"🚀 primeira resposta:         {statistics.median(m['primeira_resposta_ms'] for m in medidas):8.0f}ms (mediana)")
+
+    print("\n💤 Adiados para o primeiro uso:")
+    for modulo in ADIADOS:
+        try:
+            tempos = [rodar(MEDIR_MODULO.format(modulo=modulo))['import_ms'] for _ in range(repeticoes)]
+            print(f"   {modulo:<32} {statistics.median(tempos):8.0f}ms")
+        except subprocess.CalledProcessError:
+            print(f"   {modulo:<32} (não instalado)")
+
+    print(f"\n🦄 gunicorn ({workers} workers) até o primeiro /api/status:")
+    for preload in (False, True):
+        tempos = [tempo_gunicorn(preload, workers) for _ in range(repeticoes)]
+        print(f"   preload_app={str(preload):<5}              {statistics.median(tempos) * 1000:8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
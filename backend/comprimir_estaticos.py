@@ -0,0 +1,31 @@
+# comprimir_estaticos.py
+"""
+Gera as variantes gzip/brotli das páginas do frontend em Config.STATIC_BUILD_DIR
+antes do deploy. Os workers só leem os arquivos prontos; sem este passo, a
+primeira requisição de cada página paga a compressão no nível máximo.
+
+Uso: python comprimir_estaticos.py (a partir de backend/)
+"""
+import sys
+
+from configuracoes.compression import codificacoes_disponiveis
+from configuracoes.config import Config
+from configuracoes.static_assets import StaticAssets
+
+
+def main():
+    print("🗜️ COMPRIMINDO PÁGINAS DO FRONTEND...")
+    print("=" * 40)
+    if 'br' not in codificacoes_disponiveis():
+        print("⚠️ Pacote brotli não instalado: só variantes gzip")
+    try:
+        StaticAssets(Config.FRONTEND_DIR, Config.STATIC_BUILD_DIR).build_all()
+        print(f"✅ Variantes em {Config.STATIC_BUILD_DIR}")
+        return True
+    except OSError as e:
+        print(f"❌ Erro ao comprimir: {e}")
+        return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
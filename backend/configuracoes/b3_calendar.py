@@ -0,0 +1,83 @@
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+
+# Horário de Brasília (sem horário de verão desde 2019)
+B3_TZ = timezone(timedelta(hours=-3))
+
+# Pregão regular da B3
+ABERTURA = dtime(10, 0)
+FECHAMENTO = dtime(18, 0)  # inclui o call de fechamento e o after-market
+
+
+def _pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=32)
+def feriados_b3(ano):
+    """Dias sem pregão na B3 (nacionais fixos, móveis e os de fim de ano da bolsa)"""
+    pascoa = _pascoa(ano)
+    fixos = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 24), (12, 25), (12, 31)]
+    return frozenset(
+        [date(ano, mes, dia) for mes, dia in fixos] + [
+            pascoa - timedelta(days=48),  # Carnaval (segunda)
+            pascoa - timedelta(days=47),  # Carnaval (terça)
+            pascoa - timedelta(days=2),   # Sexta-feira Santa
+            pascoa + timedelta(days=60),  # Corpus Christi
+        ]
+    )
+
+
+def is_dia_util(dia):
+    return dia.weekday() < 5 and dia not in feriados_b3(dia.year)
+
+
+def agora_b3():
+    return datetime.now(B3_TZ)
+
+
+def is_pregao_aberto(momento=None):
+    """True se o mercado está em pregão no momento (horário de Brasília)"""
+    momento = (momento or agora_b3()).astimezone(B3_TZ)
+    return is_dia_util(momento.date()) and ABERTURA <= momento.time() < FECHAMENTO
+
+
+def proxima_abertura(momento=None):
+    """Próxima abertura de pregão estritamente depois de `momento`"""
+    momento = (momento or agora_b3()).astimezone(B3_TZ)
+    dia = momento.date()
+    if momento.time() >= ABERTURA:
+        dia += timedelta(days=1)
+    while not is_dia_util(dia):
+        dia += timedelta(days=1)
+    return datetime.combine(dia, ABERTURA, tzinfo=B3_TZ)
+
+
+def fechamento_do_dia(momento=None):
+    momento = (momento or agora_b3()).astimezone(B3_TZ)
+    return datetime.combine(momento.date(), FECHAMENTO, tzinfo=B3_TZ)
+
+
+def validade_dados(ttl_pregao, momento=None):
+    """
+    Até quando um dado de mercado calculado agora continua válido (timestamp):
+    durante o pregão vale `ttl_pregao` segundos (sem passar do fechamento);
+    fora do pregão os preços não mudam, então vale até a próxima abertura.
+    """
+    momento = (momento or agora_b3()).astimezone(B3_TZ)
+    if is_pregao_aberto(momento):
+        expira = min(momento + timedelta(seconds=ttl_pregao), fechamento_do_dia(momento))
+    else:
+        expira = proxima_abertura(momento)
+    return expira.timestamp()
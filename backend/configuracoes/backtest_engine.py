@@ -0,0 +1,238 @@
+"""
+Motor de backtest vetorizado.
+
+A estratégia gera pesos só nos dias de rebalanceamento; o resto é aritmética
+de matrizes sobre o histórico inteiro: a curva de capital sai do log-crescimento
+acumulado de cada ativo (com o drift dos pesos entre rebalanceamentos), as
+operações saem das mudanças de composição da carteira. Não há laço por barra.
+
+Primeira estratégia: momentum por RSL (mesma fórmula de YFinanceService.calculate_rsl),
+comprando em pesos iguais os `top_n` tickers de maior RSL a cada `rebalance` pregões.
+"""
+import itertools
+import time
+import numpy as np
+import pandas as pd
+
+DIAS_ANO = 252
+
+# Mínimo de cada parâmetro inteiro da estratégia
+MINIMOS = {'periodo_mm': 2, 'top_n': 1, 'rebalance': 1}
+
+
+def _inteiro(nome, valor):
+    """Parâmetro inteiro >= MINIMOS[nome]; ValueError com o nome do parâmetro caso contrário"""
+    try:
+        if isinstance(valor, bool):
+            raise TypeError
+        numero = int(valor)
+        if numero != float(valor):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f'{nome} deve ser um número inteiro (recebido: {valor!r})')
+    if numero < MINIMOS[nome]:
+        raise ValueError(f'{nome} deve ser ao menos {MINIMOS[nome]} (recebido: {numero})')
+    return numero
+
+
+def validar_opcoes(initial_capital, cost_bps):
+    """Capital positivo e custo em [0, 10000) pontos-base; ValueError caso contrário"""
+    numeros = {}
+    for nome, valor in (('initial_capital', initial_capital), ('cost_bps', cost_bps)):
+        try:
+            numeros[nome] = float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f'{nome} deve ser um número (recebido: {valor!r})')
+    initial_capital, cost_bps = numeros['initial_capital'], numeros['cost_bps']
+    if not np.isfinite(initial_capital) or initial_capital <= 0:
+        raise ValueError('initial_capital deve ser maior que zero')
+    if not np.isfinite(cost_bps) or not 0 <= cost_bps < 10000:
+        raise ValueError('cost_bps deve estar entre 0 e 10000')
+    return initial_capital, cost_bps
+
+
+def rsl_matrix(closes, periodo_mm):
+    """RSL ((Close / MM) - 1) * 100 de todos os tickers em todos os dias (NaN sem MM completa)"""
+    valid = ~np.isnan(closes)
+    filled = np.where(valid, closes, 0.0)
+    zeros = np.zeros((1, closes.shape[1]))
+    soma = np.vstack([zeros, np.cumsum(filled, axis=0)])
+    contagem = np.vstack([zeros, np.cumsum(valid, axis=0)])
+
+    janela_soma = soma[periodo_mm:] - soma[:-periodo_mm]
+    janela_contagem = contagem[periodo_mm:] - contagem[:-periodo_mm]
+    mm = np.full(closes.shape, np.nan)
+    mm[periodo_mm - 1:] = np.where(janela_contagem == periodo_mm, janela_soma / periodo_mm, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((closes / mm) - 1) * 100
+
+
+def rsl_momentum_weights(closes, rebalance_idx, periodo_mm=30, top_n=5, min_rsl=0.0):
+    """
+    Pesos (K × N) em cada rebalanceamento: 1/top_n para os tickers de maior RSL
+    acima de `min_rsl`; o que sobra fica em caixa.
+    """
+    rsl = rsl_matrix(closes, periodo_mm)[rebalance_idx]
+    score = np.where(np.isnan(rsl) | (rsl <= min_rsl), -np.inf, rsl)
+
+    top_n = min(top_n, closes.shape[1])
+    escolhidos = np.argpartition(-score, top_n - 1, axis=1)[:, :top_n]
+    pesos = np.zeros_like(score)
+    np.put_along_axis(pesos, escolhidos, 1.0 / top_n, axis=1)
+    return np.where(np.isfinite(score), pesos, 0.0)
+
+
+def run_backtest(close_matrix, periodo_mm=30, top_n=5, rebalance=21, initial_capital=100000.0,
+                 cost_bps=10.0, min_rsl=0.0):
+    """
+    Backtest da estratégia de momentum por RSL sobre a matriz de fechamentos (datas × tickers).
+    Retorna métricas, curva de capital (pd.Series) e operações (DataFrame).
+    """
+    inicio = time.monotonic()
+    periodo_mm = _inteiro('periodo_mm', periodo_mm)
+    top_n = _inteiro('top_n', top_n)
+    rebalance = _inteiro('rebalance', rebalance)
+    initial_capital, cost_bps = validar_opcoes(initial_capital, cost_bps)
+    datas = close_matrix.index
+    tickers = np.asarray(close_matrix.columns)
+    closes = close_matrix.to_numpy(dtype='float64')
+    n_dias = len(datas)
+
+    # Log-crescimento acumulado de cada ativo (sem negociação = preço parado)
+    precos = close_matrix.ffill().to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_ret = np.diff(np.log(precos), axis=0)
+    log_ret = np.vstack([np.zeros((1, closes.shape[1])), np.nan_to_num(log_ret, nan=0.0, posinf=0.0, neginf=0.0)])
+    crescimento = np.cumsum(log_ret, axis=0)
+
+    # Sinal no fechamento do dia de rebalanceamento, posição a partir do dia seguinte
+    rebalance_idx = np.arange(periodo_mm - 1, n_dias - 1, rebalance)
+    if len(rebalance_idx) == 0:
+        raise ValueError('Histórico curto demais para o período da média móvel')
+    pesos = rsl_momentum_weights(closes, rebalance_idx, periodo_mm, top_n, min_rsl)
+    caixa = 1.0 - pesos.sum(axis=1)
+
+    # Rebalanceamento vigente em cada dia (-1 antes do primeiro)
+    periodo = np.searchsorted(rebalance_idx, np.arange(n_dias), side='left') - 1
+    ativo = periodo >= 0
+    k = np.maximum(periodo, 0)
+
+    # Valor relativo da carteira desde o último rebalanceamento, com drift dos pesos
+    base = crescimento[rebalance_idx[k]]
+    valor_periodo = np.where(
+        ativo,
+        caixa[k] + np.sum(pesos[k] * np.exp(crescimento - base), axis=1),
+        1.0
+    )
+
+    # Fator de cada período completo e custo do giro em cada rebalanceamento
+    fim_periodo = np.append(rebalance_idx[1:], n_dias - 1)
+    crescimento_periodo = np.exp(crescimento[fim_periodo] - crescimento[rebalance_idx])
+    valor_fim = caixa + np.sum(pesos * crescimento_periodo, axis=1)
+    pesos_drift = np.vstack([
+        np.zeros((1, pesos.shape[1])),
+        (pesos * crescimento_periodo)[:-1] / valor_fim[:-1, None]
+    ])
+    giro = np.abs(pesos - pesos_drift).sum(axis=1)
+    fator_custo = 1.0 - giro * cost_bps / 10000
+
+    # Capital acumulado até o início de cada período (inclui o custo de entrar nele)
+    acumulado = np.cumprod(np.concatenate([[1.0], valor_fim[:-1] * fator_custo[1:]]))
+    acumulado *= fator_custo[0]
+    curva = initial_capital * np.where(ativo, acumulado[k] * valor_periodo, 1.0)
+    # O custo do rebalanceamento é pago no próprio dia
+    curva[rebalance_idx] = initial_capital * acumulado
+
+    operacoes = _operacoes(pesos > 0, rebalance_idx, crescimento, datas, tickers)
+    metricas = _metricas(curva, operacoes, initial_capital, datas)
+    metricas.update({
+        'rebalanceamentos': len(rebalance_idx),
+        'giro_medio': round(float(giro.mean()), 4),
+        'tempo_ms': round((time.monotonic() - inicio) * 1000, 2)
+    })
+    return metricas, pd.Series(curva, index=datas), operacoes
+
+
+def _operacoes(membros, rebalance_idx, crescimento, datas, tickers):
+    """
+    Operações a partir das mudanças de composição: cada sequência de rebalanceamentos
+    em que o ticker fica na carteira é uma operação (entrada e saída no fechamento).
+    """
+    K, N = membros.shape
+    bordas = np.diff(np.vstack([np.zeros((1, N), bool), membros, np.zeros((1, N), bool)]).astype(np.int8), axis=0)
+    # nonzero sobre a transposta: ordenado por ticker e depois por rebalanceamento
+    ativo_e, k_e = np.nonzero(bordas.T == 1)
+    ativo_s, k_s = np.nonzero(bordas.T == -1)
+
+    entrada = rebalance_idx[k_e]
+    aberta = k_s >= K
+    saida = np.where(aberta, len(datas) - 1, rebalance_idx[np.minimum(k_s, K - 1)])
+    retorno = np.exp(crescimento[saida, ativo_s] - crescimento[entrada, ativo_e]) - 1
+
+    return pd.DataFrame({
+        'ticker': tickers[ativo_e],
+        'entrada': datas[entrada],
+        'saida': datas[saida],
+        'retorno': retorno,
+        'aberta': aberta
+    }).sort_values('entrada', kind='stable').reset_index(drop=True)
+
+
+def _metricas(curva, operacoes, initial_capital, datas):
+    retornos = curva[1:] / curva[:-1] - 1
+    desvio = retornos.std(ddof=1) if len(retornos) > 1 else 0.0
+    sharpe = float(retornos.mean() / desvio * np.sqrt(DIAS_ANO)) if desvio > 0 else 0.0
+    pico = np.maximum.accumulate(curva)
+    drawdown = float(((curva - pico) / pico).min())
+    anos = max((datas[-1] - datas[0]).days / 365.25, 1 / DIAS_ANO)
+    cagr = float((curva[-1] / initial_capital) ** (1 / anos) - 1)
+
+    fechadas = operacoes[~operacoes['aberta']]
+    win_rate = float((fechadas['retorno'] > 0).mean() * 100) if len(fechadas) else 0.0
+
+    return {
+        'initial_capital': round(float(initial_capital), 2),
+        'final_capital': round(float(curva[-1]), 2),
+        'return_percent': round(float(curva[-1] / initial_capital - 1) * 100, 2),
+        'cagr_percent': round(cagr * 100, 2),
+        'sharpe_ratio': round(sharpe, 2),
+        'max_drawdown_percent': round(drawdown * 100, 2),
+        'trades': int(len(operacoes)),
+        'trades_fechados': int(len(fechadas)),
+        'win_rate': round(win_rate, 2)
+    }
+
+
+def grade_parametros(periodo_mm, top_n, rebalance):
+    """
+    Combinações de parâmetros (cada argumento é um valor ou uma lista não vazia).
+    Valores que não são inteiros acima do mínimo geram ValueError.
+    """
+    listas = {}
+    for nome, valor in (('periodo_mm', periodo_mm), ('top_n', top_n), ('rebalance', rebalance)):
+        valores = valor if isinstance(valor, (list, tuple)) else [valor]
+        if not valores:
+            raise ValueError(f'{nome} não pode ser uma lista vazia')
+        listas[nome] = [_inteiro(nome, v) for v in valores]
+    return [
+        {'periodo_mm': p, 'top_n': t, 'rebalance': r}
+        for p, t, r in itertools.product(*listas.values())
+    ]
+
+
+def _rodar_combinacao(tarefa):
+    """Executado nos processos do pool: devolve só as métricas"""
+    close_matrix, parametros, opcoes = tarefa
+    metricas, _, _ = run_backtest(close_matrix, **parametros, **opcoes)
+    return {**parametros, **metricas}
+
+
+def run_sweep(close_matrix, combinacoes, executor=None, **opcoes):
+    """Métricas de cada combinação de parâmetros, da maior para a menor Sharpe"""
+    tarefas = [(close_matrix, parametros, opcoes) for parametros in combinacoes]
+    if executor is not None and len(tarefas) > 1:
+        resultados = list(executor.map(_rodar_combinacao, tarefas))
+    else:
+        resultados = [_rodar_combinacao(tarefa) for tarefa in tarefas]
+    return sorted(resultados, key=lambda r: r['sharpe_ratio'], reverse=True)
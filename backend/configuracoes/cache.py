@@ -0,0 +1,169 @@
+import threading
+import time
+from .cache_backend import backend_for_cache
+
+
+class TTLCache:
+    """
+    Cache com expiração por tempo, limite de tamanho e stale-while-revalidate:
+    um valor vencido há pouco é devolvido na hora enquanto uma thread recalcula.
+    As entradas ficam num CacheBackend (memória do processo ou compartilhado
+    entre workers); em chaves frias só um worker calcula (single-flight) e os
+    outros esperam o resultado aparecer no backend.
+    """
+
+    def __init__(self, maxsize=1000, expires_at=None, stale_seconds=0, name='cache',
+                 backend=None, lock_timeout=30.0):
+        self.maxsize = maxsize
+        self.expires_at = expires_at or (lambda now: now + 300)  # now -> timestamp de expiração
+        self.stale_seconds = stale_seconds
+        self.name = name
+        self.lock_timeout = lock_timeout
+        self._backend = backend
+        self._prefix = f'{name}:'
+
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'expirations': 0,
+                       'refreshes': 0, 'waited_for_peer': 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = backend_for_cache(self.maxsize)
+        return self._backend
+
+    def _key(self, key):
+        return self._prefix + repr(key)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _store(self, key, value):
+        expires_at = self.expires_at(time.time())
+        self.backend.set(self._key(key), value, expires_at, retain_until=expires_at + self.stale_seconds)
+
+    def _compute_single_flight(self, key, compute):
+        """Calcula com lock no backend; se outro worker já está calculando, espera o resultado"""
+        backend_key = self._key(key)
+        deadline = time.time() + self.lock_timeout
+
+        while True:
+            token = self.backend.acquire_lock(backend_key, self.lock_timeout)
+            if token is not None:
+                try:
+                    # Pode ter sido preenchido enquanto esperávamos o lock
+                    entry = self.backend.get(backend_key)
+                    if entry is not None and entry[2] > time.time():
+                        return entry[0]
+                    value = compute()
+                    if value is not None:
+                        self._store(key, value)
+                    return value
+                finally:
+                    self.backend.release_lock(backend_key, token)
+
+            if time.time() > deadline:
+                # Quem segurava o lock travou: calcular sem lock
+                return compute()
+
+            time.sleep(0.05)
+            entry = self.backend.get(backend_key)
+            if entry is not None and entry[2] > time.time():
+                self._count('waited_for_peer')
+                return entry[0]
+
+    def _refresh_async(self, key, compute):
+        def run():
+            try:
+                backend_key = self._key(key)
+                token = self.backend.acquire_lock(backend_key, self.lock_timeout)
+                if token is None:
+                    return  # outro worker já está revalidando
+                try:
+                    value = compute()
+                    if value is not None:
+                        self._store(key, value)
+                        self._count('refreshes')
+                finally:
+                    self.backend.release_lock(backend_key, token)
+            except Exception as e:
+                print(f"⚠️ Erro ao revalidar {self.name} {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'{self.name}-refresh', daemon=True).start()
+
+    def get(self, key):
+        """Valor ainda válido ou None (não conta como hit/miss)"""
+        entry = self.backend.get(self._key(key))
+        if entry and entry[2] > time.time():
+            return entry[0]
+        return None
+
+    def set(self, key, value):
+        self._store(key, value)
+
+    def get_or_compute(self, key, compute):
+        """
+        Retorna o valor em cache ou calcula com `compute()`.
+        Resultados None não são guardados (falhas são tentadas de novo).
+        """
+        now = time.time()
+        entry = self.backend.get(self._key(key))
+
+        if entry is not None:
+            value, _, expires_at = entry
+            if expires_at > now:
+                self._count('hits')
+                return value
+
+            if now - expires_at < self.stale_seconds:
+                self._count('stale_hits')
+                with self._lock:
+                    start_refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start_refresh:
+                    self._refresh_async(key, compute)
+                return value
+
+            self._count('expirations')
+
+        self._count('misses')
+        return self._compute_single_flight(key, compute)
+
+    def invalidate(self, key):
+        self.backend.delete(self._key(key))
+
+    def clear(self):
+        self.backend.clear(self._prefix)
+
+    def get_info(self):
+        """Estatísticas (mesmos campos do cache_info do lru_cache + expiração e idade)"""
+        now = time.time()
+        meta = self.backend.entries_meta(self._prefix)
+        ages = [now - stored_at for stored_at, _ in meta]
+        valid = sum(1 for _, expires_at in meta if expires_at > now)
+
+        with self._lock:
+            stats = dict(self._stats)
+        hits, misses = stats['hits'] + stats['stale_hits'], stats['misses']
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'maxsize': getattr(self.backend, 'maxsize', None),
+            'currsize': len(meta),
+            'hit_rate': round((hits / (hits + misses)) * 100, 2) if (hits + misses) > 0 else 0,
+            'stale_hits': stats['stale_hits'],
+            'evictions': self.backend.evictions(),
+            'expirations': stats['expirations'],
+            'background_refreshes': stats['refreshes'],
+            'waited_for_peer': stats['waited_for_peer'],
+            'valid_entries': valid,
+            'oldest_age_seconds': round(max(ages), 1) if ages else 0,
+            'avg_age_seconds': round(sum(ages) / len(ages), 1) if ages else 0,
+            'backend': type(self.backend).__name__
+        }
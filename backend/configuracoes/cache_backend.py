@@ -0,0 +1,450 @@
+import base64
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from .config import Config
+
+# Chave que marca, no JSON dos backends compartilhados, os tipos que o JSON não tem
+TIPO = '__tipo__'
+
+# dtypes que voltam de bytes brutos (nunca objetos Python)
+DTYPES_BINARIOS = 'biufcmM'
+
+
+def _array(valor):
+    if valor.dtype.kind not in DTYPES_BINARIOS:
+        return {TIPO: 'lista', 'itens': [_codificar(v) for v in valor.tolist()]}
+    return {
+        TIPO: 'ndarray',
+        'dtype': valor.dtype.str,
+        'shape': list(valor.shape),
+        'dados': base64.b64encode(np.ascontiguousarray(valor).tobytes()).decode('ascii')
+    }
+
+
+def _indice(indice):
+    if isinstance(indice, pd.DatetimeIndex):
+        tz = str(indice.tz) if indice.tz else None
+        datas = indice.tz_convert('UTC').tz_localize(None) if tz else indice
+        return {TIPO: 'DatetimeIndex', 'dados': _array(datas.to_numpy()), 'tz': tz, 'nome': _codificar(indice.name)}
+    return {TIPO: 'Index', 'dados': _array(indice.to_numpy()), 'nome': _codificar(indice.name)}
+
+
+def _codificar(valor):
+    """Valor em tipos do JSON, com TIPO nos que precisam voltar como eram (arrays, DataFrames, tuplas, datas)"""
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, dict):
+        if TIPO not in valor and all(isinstance(k, str) for k in valor):
+            return {k: _codificar(v) for k, v in valor.items()}
+        return {TIPO: 'dict', 'itens': [[_codificar(k), _codificar(v)] for k, v in valor.items()]}
+    if isinstance(valor, list):
+        return [_codificar(v) for v in valor]
+    if isinstance(valor, tuple):
+        return {TIPO: 'tuple', 'itens': [_codificar(v) for v in valor]}
+    if isinstance(valor, np.ndarray):
+        return _array(valor)
+    if isinstance(valor, np.generic):
+        return _array(np.asarray(valor)) if valor.dtype.kind in 'mM' else valor.item()
+    if isinstance(valor, pd.Timestamp):
+        return {TIPO: 'Timestamp', 'valor': valor.isoformat()}
+    if isinstance(valor, datetime.datetime):
+        return {TIPO: 'datetime', 'valor': valor.isoformat()}
+    if isinstance(valor, datetime.date):
+        return {TIPO: 'date', 'valor': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {TIPO: 'Decimal', 'valor': str(valor)}
+    if isinstance(valor, pd.DataFrame):
+        return {
+            TIPO: 'DataFrame',
+            'index': _indice(valor.index),
+            'colunas': [_codificar(c) for c in valor.columns],
+            'dados': [_array(valor.iloc[:, i].to_numpy()) for i in range(valor.shape[1])]
+        }
+    if isinstance(valor, pd.Series):
+        return {TIPO: 'Series', 'index': _indice(valor.index), 'nome': _codificar(valor.name),
+                'dados': _array(valor.to_numpy())}
+    raise TypeError(f'Tipo sem serialização para o cache compartilhado: {type(valor).__name__}')
+
+
+def _decodificar(obj):
+    """object_hook do json.loads: os objetos internos já chegam decodificados"""
+    tipo = obj.get(TIPO)
+    if tipo is None:
+        return obj
+    if tipo == 'ndarray':
+        dtype = np.dtype(obj['dtype'])
+        if dtype.kind not in DTYPES_BINARIOS:
+            raise ValueError(f'dtype não permitido no cache: {dtype}')
+        array = np.frombuffer(base64.b64decode(obj['dados']), dtype=dtype).reshape(obj['shape']).copy()
+        return array[()] if array.ndim == 0 else array
+    if tipo == 'lista':
+        return np.array(obj['itens'], dtype=object)
+    if tipo == 'dict':
+        return {k: v for k, v in obj['itens']}
+    if tipo == 'tuple':
+        return tuple(obj['itens'])
+    if tipo == 'Timestamp':
+        return pd.Timestamp(obj['valor'])
+    if tipo == 'datetime':
+        return datetime.datetime.fromisoformat(obj['valor'])
+    if tipo == 'date':
+        return datetime.date.fromisoformat(obj['valor'])
+    if tipo == 'Decimal':
+        return Decimal(obj['valor'])
+    if tipo == 'DatetimeIndex':
+        indice = pd.DatetimeIndex(obj['dados'], name=obj['nome'])
+        return indice.tz_localize('UTC').tz_convert(obj['tz']) if obj['tz'] else indice
+    if tipo == 'Index':
+        return pd.Index(obj['dados'], name=obj['nome'])
+    if tipo == 'DataFrame':
+        dados = pd.DataFrame(dict(enumerate(obj['dados'])), index=obj['index'])
+        dados.columns = pd.Index(obj['colunas'])
+        return dados
+    if tipo == 'Series':
+        return pd.Series(obj['dados'], index=obj['index'], name=obj['nome'])
+    raise ValueError(f'Tipo desconhecido no cache: {tipo}')
+
+
+def encode_value(valor):
+    """
+    Bytes de um valor para os backends compartilhados. JSON em vez de pickle:
+    quem consegue escrever no Redis/SQLite não consegue executar código no app.
+    """
+    return json.dumps(_codificar(valor), separators=(',', ':')).encode('utf-8')
+
+
+def decode_value(raw):
+    return json.loads(raw, object_hook=_decodificar)
+
+
+def _encode_or_skip(key, valor):
+    """Bytes do valor ou None (o valor não vai para o cache) se houver tipo sem serialização"""
+    try:
+        return encode_value(valor)
+    except (TypeError, ValueError) as e:
+        print(f"⚠️ Valor de {key} não guardado no cache compartilhado: {e}")
+        return None
+
+
+class CacheBackend:
+    """
+    Interface dos backends de cache. Entradas são (valor, stored_at, expires_at);
+    os locks com expiração servem para single-flight entre threads/workers.
+    """
+
+    def get(self, key):
+        """Retorna (value, stored_at, expires_at) ou None"""
+        raise NotImplementedError
+
+    def set(self, key, value, expires_at, retain_until=None):
+        """Grava a entrada; `retain_until` é até quando ela pode ser mantida (para stale-while-revalidate)"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self, prefix=''):
+        raise NotImplementedError
+
+    def entries_meta(self, prefix=''):
+        """Lista de (stored_at, expires_at) das entradas com o prefixo (para estatísticas)"""
+        raise NotImplementedError
+
+    def acquire_lock(self, key, ttl):
+        """Tenta pegar o lock sem bloquear; retorna um token ou None"""
+        raise NotImplementedError
+
+    def release_lock(self, key, token):
+        raise NotImplementedError
+
+    def evictions(self):
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend em memória (LRU), local ao processo"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._locks = {}
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[:3]
+
+    def set(self, key, value, expires_at, retain_until=None):
+        with self._lock:
+            self._entries[key] = (value, time.time(), expires_at, retain_until or expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix=''):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def entries_meta(self, prefix=''):
+        with self._lock:
+            return [(e[1], e[2]) for k, e in self._entries.items() if k.startswith(prefix)]
+
+    def acquire_lock(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder and holder[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + ttl)
+            return token
+
+    def release_lock(self, key, token):
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder and holder[0] == token:
+                del self._locks[key]
+
+    def evictions(self):
+        return self._evictions
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend compartilhado entre os workers do gunicorn num arquivo SQLite local (WAL).
+    Valores são serializados em JSON (encode_value).
+
+    Só para workers sync: as conexões ficam num threading.local (com gevent,
+    uma por greenlet) e o BEGIN IMMEDIATE do acquire_lock espera o lock do
+    arquivo sem ceder a vez, travando todas as greenlets do worker. O
+    gunicorn.conf.py recusa SERVING_MODE=async com este backend.
+    """
+
+    def __init__(self, path, maxsize=50000):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._evictions = 0
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                retain_until REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored_at ON cache_entries (stored_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_locks (
+                key TEXT PRIMARY KEY,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _conn(self):
+        """Uma conexão por thread e por processo (conexões SQLite não sobrevivem ao fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return decode_value(row[0]), row[1], row[2]
+        except ValueError:
+            return None  # entrada de outra versão (ex.: gravada com pickle): tratada como ausente
+
+    def set(self, key, value, expires_at, retain_until=None):
+        raw = _encode_or_skip(key, value)
+        if raw is None:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, stored_at, expires_at, retain_until) VALUES (?, ?, ?, ?, ?)",
+            (key, raw, now, expires_at, retain_until or expires_at)
+        )
+
+        # Limpeza periódica: entradas além da retenção e excesso de tamanho (mais antigas primeiro)
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute("DELETE FROM cache_entries WHERE retain_until < ?", (now,))
+            excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.maxsize
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries ORDER BY stored_at LIMIT ?)",
+                    (excess,)
+                )
+                self._evictions += excess
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self, prefix=''):
+        self._conn().execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def entries_meta(self, prefix=''):
+        return self._conn().execute(
+            "SELECT stored_at, expires_at FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        ).fetchall()
+
+    def acquire_lock(self, key, ttl):
+        conn = self._conn()
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT expires_at FROM cache_locks WHERE key = ?", (key,)).fetchone()
+            if row and row[0] > now:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_locks (key, token, expires_at) VALUES (?, ?, ?)",
+                (key, token, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return token
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_lock(self, key, token):
+        self._conn().execute("DELETE FROM cache_locks WHERE key = ? AND token = ?", (key, token))
+
+    def evictions(self):
+        return self._evictions
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartilhado num servidor Redis (ou qualquer servidor compatível com o protocolo).
+    Precisa do pacote `redis`, que é opcional.
+    """
+
+    def __init__(self, url, maxsize=None):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("CACHE_BACKEND=redis exige o pacote 'redis' (pip install redis)")
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._redis.get(key)
+        if raw is None:
+            return None
+        try:
+            return decode_value(raw)
+        except ValueError:
+            return None  # entrada de outra versão (ex.: gravada com pickle): tratada como ausente
+
+    def set(self, key, value, expires_at, retain_until=None):
+        now = time.time()
+        raw = _encode_or_skip(key, (value, now, expires_at))
+        if raw is None:
+            return
+        ttl_ms = max(1, int(((retain_until or expires_at) - now) * 1000))
+        self._redis.set(key, raw, px=ttl_ms)
+
+    def delete(self, key):
+        self._redis.delete(key)
+
+    def clear(self, prefix=''):
+        keys = list(self._redis.scan_iter(match=f'{prefix}*'))
+        if keys:
+            self._redis.delete(*keys)
+
+    def entries_meta(self, prefix=''):
+        meta = []
+        for key in self._redis.scan_iter(match=f'{prefix}*'):
+            entry = self.get(key)
+            if entry is not None:
+                meta.append((entry[1], entry[2]))
+        return meta
+
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self._redis.set(f'lock:{key}', token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release_lock(self, key, token):
+        lock_key = f'lock:{key}'
+        if self._redis.get(lock_key) == token.encode():
+            self._redis.delete(lock_key)
+
+
+_backend = None
+_backend_pid = None
+_backend_lock = threading.Lock()
+
+
+def create_cache_backend():
+    """Backend configurado em Config.CACHE_BACKEND"""
+    if Config.CACHE_BACKEND == 'redis':
+        return RedisCacheBackend(Config.CACHE_REDIS_URL)
+    if Config.CACHE_BACKEND == 'sqlite':
+        return SQLiteCacheBackend(Config.CACHE_SQLITE_PATH, maxsize=Config.CACHE_MAX_ENTRIES)
+    return MemoryCacheBackend(maxsize=Config.CACHE_MAX_ENTRIES)
+
+
+def get_cache_backend():
+    """Backend do processo atual (recriado após fork dos workers do gunicorn)"""
+    global _backend, _backend_pid
+    if _backend is None or _backend_pid != os.getpid():
+        with _backend_lock:
+            if _backend is None or _backend_pid != os.getpid():
+                _backend = create_cache_backend()
+                _backend_pid = os.getpid()
+    return _backend
+
+
+def backend_for_cache(maxsize):
+    """
+    Backend para um cache específico: no modo 'memory' cada cache tem o seu
+    (com o próprio limite de tamanho); nos modos compartilhados todos usam o mesmo.
+    """
+    if Config.CACHE_BACKEND == 'memory':
+        return MemoryCacheBackend(maxsize=maxsize)
+    return get_cache_backend()
+
+
+def set_cache_backend(backend):
+    """Troca o backend do processo (testes)"""
+    global _backend, _backend_pid
+    _backend = backend
+    _backend_pid = os.getpid()
@@ -0,0 +1,80 @@
+"""
+Compressão das respostas dinâmicas (gzip ou brotli, conforme o Accept-Encoding).
+
+Só vale a pena acima de Config.COMPRESS_MIN_BYTES e para formatos de texto;
+streams (SSE), respostas já codificadas e 304 passam direto. O brotli é
+opcional: sem o pacote instalado, só gzip é oferecido.
+O ETag vira fraco (W/"...") na resposta comprimida: o conteúdo é o mesmo,
+os bytes não, e o If-None-Match usa comparação fraca.
+"""
+import gzip
+import threading
+from .config import Config
+from .instrumentation import span
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIMETYPES_COMPRIMIVEIS = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+_stats = {'comprimidas': 0, 'bytes_originais': 0, 'bytes_enviados': 0}
+_stats_lock = threading.Lock()
+
+
+def codificacoes_disponiveis():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def escolher_codificacao(accept_encodings):
+    """'br', 'gzip' ou None a partir do Accept-Encoding da requisição"""
+    if not accept_encodings:
+        return None
+    return accept_encodings.best_match(codificacoes_disponiveis())
+
+
+def comprimir(dados, codificacao, estatico=False):
+    """Estáticos (comprimidos uma vez) usam o nível máximo; dinâmicos, um nível rápido"""
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=11 if estatico else Config.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(dados, compresslevel=9 if estatico else Config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings):
+    """after_request: comprime a resposta se o cliente aceita e ela compensa"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in MIMETYPES_COMPRIMIVEIS):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    codificacao = escolher_codificacao(accept_encodings)
+    if codificacao is None:
+        return response
+
+    dados = response.get_data()
+    if len(dados) < Config.COMPRESS_MIN_BYTES:
+        return response
+
+    with span('compressao', codificacao):
+        comprimido = comprimir(dados, codificacao)
+    response.set_data(comprimido)
+    response.headers['Content-Encoding'] = codificacao
+    etag, fraco = response.get_etag()
+    if etag and not fraco:
+        response.set_etag(etag, weak=True)
+
+    with _stats_lock:
+        _stats['comprimidas'] += 1
+        _stats['bytes_originais'] += len(dados)
+        _stats['bytes_enviados'] += len(comprimido)
+    return response
+
+
+def get_compression_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['codificacoes'] = list(codificacoes_disponiveis())
+    stats['taxa'] = round(stats['bytes_enviados'] / stats['bytes_originais'], 3) if stats['bytes_originais'] else None
+    return stats
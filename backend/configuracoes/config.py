@@ -27,6 +27,118 @@ class Config:
             config = Config.DATABASE_CONFIG['local']
             return f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['database']}"
     
+    # Pool de conexões PostgreSQL
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 1))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # segundos esperando conexão livre
+    DB_POOL_HEALTHCHECK_IDLE = float(os.environ.get('DB_POOL_HEALTHCHECK_IDLE', 30))  # testa conexões ociosas há mais tempo
+    DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600))  # recicla conexões antigas
+    
+    # Cache de sessões do auth (por worker; o TTL limita o atraso de logout entre workers)
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 60))
+    SESSION_CACHE_MAX_SIZE = int(os.environ.get('SESSION_CACHE_MAX_SIZE', 10000))
+    
+    # Modo dos tokens de sessão: 'opaque' (tabela user_sessions) ou 'signed' (HMAC, sem ida ao banco)
+    # Tokens assinados só são aceitos no modo 'signed', que exige AUTH_TOKEN_SECRET (sem valor padrão)
+    AUTH_TOKEN_MODE = os.environ.get('AUTH_TOKEN_MODE', 'opaque')
+    AUTH_TOKEN_SECRET = os.environ.get('AUTH_TOKEN_SECRET', os.environ.get('SECRET_KEY', ''))
+    AUTH_TOKEN_SECRET_MIN_LENGTH = 32
+    AUTH_SESSION_HOURS = int(os.environ.get('AUTH_SESSION_HOURS', 24))
+    AUTH_REVOCATION_REFRESH = int(os.environ.get('AUTH_REVOCATION_REFRESH', 30))
+    
+    # Store local de preços (barras diárias por ticker)
+    PRICE_PROVIDER = os.environ.get('PRICE_PROVIDER', 'yfinance')  # 'yfinance' ou 'fixture'
+    PRICE_FIXTURE_DIR = os.environ.get('PRICE_FIXTURE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fixtures'))
+    PRICE_FIXTURE_LATENCY = float(os.environ.get('PRICE_FIXTURE_LATENCY', 0))  # segundos por busca (simula o provedor em benchmarks)
+    PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'precos'))
+    PRICE_STORE_REFRESH_SECONDS = int(os.environ.get('PRICE_STORE_REFRESH_SECONDS', 300))  # intervalo mínimo entre downloads da cauda
+    PRICE_STORE_OVERLAP_BARS = int(os.environ.get('PRICE_STORE_OVERLAP_BARS', 5))  # barras já guardadas rebaixadas junto com a cauda
+    PRICE_ADJUSTMENT_TOLERANCE = float(os.environ.get('PRICE_ADJUSTMENT_TOLERANCE', 0.0005))  # diferença relativa que indica reajuste (split/dividendo)
+    
+    # Estado incremental de RSL/volatilidade por ticker (sobrevive a reinícios)
+    INDICATOR_STATE_DIR = os.environ.get('INDICATOR_STATE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'indicadores'))
+    
+    # Backend de cache: 'memory' (por worker), 'sqlite' (arquivo local compartilhado entre workers sync) ou 'redis'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache.sqlite3'))
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 50000))
+    MARKET_CACHE_TTL = int(os.environ.get('MARKET_CACHE_TTL', 60))  # cotações, segundos durante o pregão
+    
+    # Tamanho dos caches por ticker (cotações, indicadores)
+    RSL_CACHE_MAXSIZE = int(os.environ.get('RSL_CACHE_MAXSIZE', 2000))  # cobre todo o setor_b3
+    
+    # Snapshots do RSL setorial calculados em segundo plano
+    RSL_SNAPSHOT_ENABLED = os.environ.get('RSL_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    RSL_SNAPSHOT_INTERVAL = int(os.environ.get('RSL_SNAPSHOT_INTERVAL', 300))  # segundos, durante o pregão
+    RSL_SNAPSHOT_INTERVAL_FECHADO = int(os.environ.get('RSL_SNAPSHOT_INTERVAL_FECHADO', 21600))  # mercado fechado
+    RSL_SNAPSHOT_POLL_SECONDS = int(os.environ.get('RSL_SNAPSHOT_POLL_SECONDS', 15))  # checagem de versão nova
+    RSL_SNAPSHOT_KEEP = int(os.environ.get('RSL_SNAPSHOT_KEEP', 48))  # versões mantidas no banco
+    
+    # Streaming de cotações (SSE)
+    QUOTE_STREAM_INTERVAL = int(os.environ.get('QUOTE_STREAM_INTERVAL', 5))  # segundos, durante o pregão
+    QUOTE_STREAM_INTERVAL_FECHADO = int(os.environ.get('QUOTE_STREAM_INTERVAL_FECHADO', 300))  # mercado fechado
+    QUOTE_STREAM_HEARTBEAT = int(os.environ.get('QUOTE_STREAM_HEARTBEAT', 15))  # segundos entre pings
+    QUOTE_STREAM_MAX_CLIENTS = int(os.environ.get('QUOTE_STREAM_MAX_CLIENTS', 200))  # por worker
+    QUOTE_STREAM_MAX_SYMBOLS = int(os.environ.get('QUOTE_STREAM_MAX_SYMBOLS', 20))  # por conexão
+    QUOTE_STREAM_MAX_PER_CLIENT = int(os.environ.get('QUOTE_STREAM_MAX_PER_CLIENT', 4))  # por usuário logado ou IP, por worker
+    # Proxies reversos na frente do app (Render, nginx): o IP do cliente vem do X-Forwarded-For
+    PROXY_COUNT = int(os.environ.get('PROXY_COUNT', 0))
+    
+    # Processos para cálculos CPU-bound (pares, backtests), por worker
+    ANALYTICS_PROCESSES = int(os.environ.get('ANALYTICS_PROCESSES', min(4, os.cpu_count() or 1)))
+    
+    # Scanner de pares cointegrados
+    PAIRS_MIN_CORRELATION = float(os.environ.get('PAIRS_MIN_CORRELATION', 0.8))  # pré-filtro dos log-preços
+    PAIRS_MAX_PVALUE = float(os.environ.get('PAIRS_MAX_PVALUE', 0.05))  # teste de Engle-Granger
+    PAIRS_WINDOW = int(os.environ.get('PAIRS_WINDOW', 60))  # janela do OLS móvel e do z-score
+    PAIRS_MAX_CANDIDATES = int(os.environ.get('PAIRS_MAX_CANDIDATES', 300))  # pares testados por setor
+    PAIRS_PARALLEL_MIN = int(os.environ.get('PAIRS_PARALLEL_MIN', 8))  # abaixo disso testa no próprio processo
+    PAIRS_CACHE_TTL = int(os.environ.get('PAIRS_CACHE_TTL', 3600))  # a chave já inclui a versão dos dados
+    
+    # Backtests
+    BACKTEST_MAX_TICKERS = int(os.environ.get('BACKTEST_MAX_TICKERS', 200))
+    BACKTEST_MAX_COMBINATIONS = int(os.environ.get('BACKTEST_MAX_COMBINATIONS', 64))  # por varredura de parâmetros
+    BACKTEST_CURVE_POINTS = int(os.environ.get('BACKTEST_CURVE_POINTS', 500))  # pontos da curva de capital na resposta
+    
+    # Indicadores técnicos
+    INDICATORS_PERIOD = os.environ.get('INDICATORS_PERIOD', '2y')  # histórico para aquecer a EMA 200
+    
+    # Índice em memória do setor_b3 (setores e empresas)
+    SETOR_INDEX_CHECK_SECONDS = int(os.environ.get('SETOR_INDEX_CHECK_SECONDS', 60))  # checagem de mudança na tabela
+    SETOR_INDEX_MIN_SIMILARITY = float(os.environ.get('SETOR_INDEX_MIN_SIMILARITY', 0.3))  # busca por trigramas
+    EMPRESAS_MAX_TICKERS = int(os.environ.get('EMPRESAS_MAX_TICKERS', 200))  # por chamada de /api/empresas
+    
+    # Dados de referência (planos, lista de setores): servidos da memória até mudarem
+    REFERENCE_DATA_MAX_AGE = int(os.environ.get('REFERENCE_DATA_MAX_AGE', 86400))  # segundos, rede de segurança
+    REFERENCE_DATA_LISTEN = os.environ.get('REFERENCE_DATA_LISTEN', 'true').lower() == 'true'  # LISTEN/NOTIFY
+    
+    # Gráficos com period/interval/max_points (barras agregadas + LTTB)
+    CHART_DEFAULT_POINTS = int(os.environ.get('CHART_DEFAULT_POINTS', 300))  # max_points quando não informado
+    CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 2000))  # limite de max_points
+    CHART_BARS_CACHE_MAXSIZE = int(os.environ.get('CHART_BARS_CACHE_MAXSIZE', 2000))  # barras agregadas em cache
+    
+    # Cache HTTP (ETag, Cache-Control) das rotas de mercado e de referência
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 3600))  # teto do max-age de dados de mercado
+    HTTP_REFERENCE_MAX_AGE = int(os.environ.get('HTTP_REFERENCE_MAX_AGE', 300))  # setores, empresas, planos
+    HTTP_STALE_WHILE_REVALIDATE = int(os.environ.get('HTTP_STALE_WHILE_REVALIDATE', 60))  # segundos
+    
+    # Compressão das respostas e páginas estáticas pré-comprimidas
+    FRONTEND_DIR = os.environ.get('FRONTEND_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'frontend'))
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))  # respostas menores vão sem compressão
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))  # respostas dinâmicas
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))  # respostas dinâmicas
+    STATIC_BUILD_DIR = os.environ.get('STATIC_BUILD_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'estaticos'))
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 300))  # páginas nas URLs sem hash
+    STATIC_STALE_WHILE_REVALIDATE = int(os.environ.get('STATIC_STALE_WHILE_REVALIDATE', 86400))
+    
+    # Instrumentação: latência por rota e por trecho (banco, yfinance, cálculos), /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'metricas'))  # '' = só o processo
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))  # gravação das métricas de cada worker
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # /metrics exige Authorization: Bearer <token>; vazio = aberto a quem alcança o app
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'  # cabeçalho Server-Timing
+    
     # Configurações adicionais para o yfinance
     YFINANCE_PERIOD_DEFAULT = '1mo'
     DEFAULT_SYMBOLS = ['PETR4', 'VALE3', 'ITUB4']
\ No newline at end of file
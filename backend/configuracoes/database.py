@@ -1,14 +1,46 @@
 import psycopg2
+import psycopg2.extensions
 import os
+import threading
+import time
+from collections import deque
 from .config import Config
+from .instrumentation import span
 
-def get_local_db_connection():
-    """Conecta no PostgreSQL (local ou produção)"""
-    try:
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão livre no pool dentro do tempo limite"""
+
+
+def _operacao_sql(query):
+    """Primeira palavra do SQL (SELECT, INSERT...): label de baixa cardinalidade para as métricas"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    if not isinstance(query, str):
+        return 'SQL'  # psycopg2.sql.Composed
+    partes = query.split(None, 1)
+    return partes[0].upper() if partes else 'SQL'
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor com span em cada execute (tempo por comando SQL nas métricas)"""
+
+    def execute(self, query, vars=None):
+        with span('sql', _operacao_sql(query)):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with span('sql', _operacao_sql(query)):
+            return super().executemany(query, vars_list)
+
+
+def _create_raw_connection():
+    """Abre uma conexão física no PostgreSQL (local ou produção)"""
+    with span('db_connect', 'connect'):
         # ✅ Produção (Render) - usa DATABASE_URL
         if os.environ.get('DATABASE_URL'):
             print("🌐 Conectando no banco de produção (Render)...")
-            return psycopg2.connect(os.environ.get('DATABASE_URL'))
+            return psycopg2.connect(os.environ.get('DATABASE_URL'), cursor_factory=TimedCursor)
         else:
             # ✅ Local - usa configurações do Config
             print("💻 Conectando no banco local...")
@@ -18,8 +50,267 @@ def get_local_db_connection():
                 database=config['database'],
                 user=config['user'],
                 password=config['password'],
-                port=config['port']
+                port=config['port'],
+                cursor_factory=TimedCursor
+            )
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool.
+    Se comporta como a conexão psycopg2, mas close() devolve ao pool em vez de fechar.
+    """
+    
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+    
+    def __getattr__(self, name):
+        if self._released:
+            raise psycopg2.InterfaceError('connection already returned to pool')
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._conn.__exit__(exc_type, exc_val, exc_tb)
+    
+    def close(self):
+        """Devolve a conexão ao pool"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+    
+    def __del__(self):
+        # Rotas que retornam antes do close() não podem vazar conexões do pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool de conexões thread-safe com health-check, timeout de checkout e métricas"""
+    
+    def __init__(self, connect=_create_raw_connection, min_size=1, max_size=10, timeout=10.0,
+                 healthcheck_idle=30.0, max_lifetime=3600.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Tamanhos do pool inválidos')
+        
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self.max_lifetime = max_lifetime
+        
+        self._lock = threading.Condition()
+        self._idle = deque()  # (conn, devolvida_em)
+        self._created_at = {}  # id(conn) -> timestamp de criação
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'healthcheck_failures': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+        
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, time.monotonic()))
+    
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats['connections_created'] += 1
+        return conn
+    
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        self._stats['connections_closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _is_healthy(self, conn, idle_since):
+        """Descarta conexões fechadas, velhas demais ou que não respondem a SELECT 1"""
+        if conn.closed:
+            return False
+        
+        now = time.monotonic()
+        if now - self._created_at.get(id(conn), now) > self.max_lifetime:
+            return False
+        
+        if now - idle_since < self.healthcheck_idle:
+            return True
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def getconn(self, timeout=None):
+        """Empresta uma conexão; espera até `timeout` segundos se o pool estiver cheio"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        
+        with self._lock:
+            if self._closed:
+                raise PoolTimeoutError('Pool de conexões encerrado')
+            
+            while True:
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use += 1
+                    break
+                
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    conn = None
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['checkout_timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'Nenhuma conexão livre após {timeout}s (max_size={self.max_size})'
+                    )
+                
+                self._waiting += 1
+                try:
+                    self._lock.wait(remaining)
+                finally:
+                    self._waiting -= 1
+        
+        # I/O fora do lock: abrir conexão nova ou testar a ociosa
+        try:
+            if conn is not None and not self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self._stats['healthcheck_failures'] += 1
+                    self._discard(conn)
+                conn = None
+            
+            if conn is None:
+                conn = self._open()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        
+        waited_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_ms'] += waited_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], waited_ms)
+        
+        return conn
+    
+    def release(self, conn):
+        """Devolve a conexão; transações abertas são desfeitas antes de reutilizar"""
+        reusable = not conn.closed
+        if reusable:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                reusable = False
+        
+        with self._lock:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+            self._lock.notify()
+    
+    def connection(self, timeout=None):
+        """Retorna uma PooledConnection (close() devolve ao pool)"""
+        return PooledConnection(self, self.getconn(timeout))
+    
+    def closeall(self):
+        """Fecha todas as conexões ociosas e impede novos checkouts"""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+    
+    def get_stats(self):
+        """Métricas do pool"""
+        with self._lock:
+            checkouts = self._stats['checkouts']
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'connections_created': self._stats['connections_created'],
+                'connections_closed': self._stats['connections_closed'],
+                'checkouts': checkouts,
+                'checkout_timeouts': self._stats['checkout_timeouts'],
+                'healthcheck_failures': self._stats['healthcheck_failures'],
+                'avg_wait_ms': round(self._stats['total_wait_ms'] / checkouts, 3) if checkouts else 0,
+                'max_wait_ms': round(self._stats['max_wait_ms'], 3)
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool do processo atual (recriado após fork dos workers do gunicorn)"""
+    global _pool, _pool_pid
+    
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(
+                min_size=Config.DB_POOL_MIN_SIZE,
+                max_size=Config.DB_POOL_MAX_SIZE,
+                timeout=Config.DB_POOL_TIMEOUT,
+                healthcheck_idle=Config.DB_POOL_HEALTHCHECK_IDLE,
+                max_lifetime=Config.DB_POOL_MAX_LIFETIME
             )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def get_pool_stats():
+    """Métricas do pool (sem criar um pool se ainda não existir)"""
+    if _pool is None or _pool_pid != os.getpid():
+        return {'initialized': False}
+    return {'initialized': True, **_pool.get_stats()}
+
+
+def get_local_db_connection():
+    """Empresta uma conexão do pool PostgreSQL (local ou produção)"""
+    try:
+        with span('db', 'get_local_db_connection'):
+            return get_pool().connection()
     except Exception as e:
         print(f"❌ Erro de conexão com banco: {e}")
         raise
@@ -55,6 +346,7 @@ def test_database_connection():
             'postgres_version': version,
             'total_empresas': total,
             'table_columns': [col[0] for col in columns],
+            'pool': get_pool_stats(),
             'message': 'Banco funcionando!'
         }
         
@@ -181,7 +473,7 @@ def get_companies_by_sector(setor_nome, limit=10):
 
 # ✅ NOVA FUNÇÃO: Context manager para conexões
 class DatabaseConnection:
-    """Context manager para conexões de banco"""
+    """Context manager para conexões de banco (emprestadas do pool)"""
     
     def __enter__(self):
         self.conn = get_local_db_connection()
@@ -0,0 +1,105 @@
+"""
+Cache HTTP das rotas de mercado e de referência: ETag, Cache-Control e GET condicional.
+
+O decorator http_cache fica abaixo dos decorators de autenticação:
+- com `versao` (função barata que identifica os dados: versão do snapshot,
+  assinatura do índice do setor_b3...), o ETag é conhecido antes da rota rodar
+  e um If-None-Match igual devolve 304 sem montar a resposta;
+- sem ela, o ETag é o hash do corpo (a rota roda, mas o corpo não é reenviado).
+O ETag inclui a variante da resposta (anônimo ou plano do usuário, JSON ou msgpack).
+
+Respostas anônimas são `public` (CDN/proxy podem guardar, com stale-while-revalidate);
+autenticadas são `private, no-cache` (só o navegador guarda e sempre revalida).
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+from flask import request, g, make_response
+from .config import Config
+from .b3_calendar import validade_dados
+from .serialization import negotiate
+
+_stats = {'respostas': 0, 'nao_modificado': 0, 'nao_modificado_sem_rota': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+def max_age_mercado():
+    """Segundos até os dados de mercado vencerem (próxima abertura com o pregão fechado), com teto"""
+    restante = validade_dados(Config.MARKET_CACHE_TTL) - time.time()
+    return int(max(0, min(restante, Config.HTTP_CACHE_MAX_AGE)))
+
+
+def max_age_referencia():
+    return Config.HTTP_REFERENCE_MAX_AGE
+
+
+def _variante():
+    """Quem recebe e em que formato: respostas diferentes precisam de ETags diferentes"""
+    user = g.get('current_user')
+    quem = f"plano{user.get('plan_id', 1)}" if user else 'anon'
+    return f'{quem}:{negotiate(request.accept_mimetypes)}'
+
+
+def _etag(versao):
+    return hashlib.md5(f'{versao}|{_variante()}'.encode('utf-8')).hexdigest()[:20]
+
+
+def _aplicar_cabecalhos(response, etag, max_age):
+    response.set_etag(etag)
+    if request.headers.get('Authorization'):
+        response.headers['Cache-Control'] = 'private, no-cache'
+    else:
+        response.headers['Cache-Control'] = (
+            f'public, max-age={max_age}, stale-while-revalidate={Config.HTTP_STALE_WHILE_REVALIDATE}'
+        )
+    response.vary.update(('Authorization', 'Accept'))
+    return response
+
+
+def http_cache(max_age=max_age_mercado, versao=None):
+    """
+    Cabeçalhos de cache e GET condicional para a rota.
+    `max_age()` dá o max-age das respostas anônimas; `versao(**kwargs)` (opcional)
+    identifica os dados sem montar a resposta, ou None se não for possível.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            etag = None
+            try:
+                versao_dados = versao(*args, **kwargs) if versao else None
+            except Exception as e:
+                print(f"⚠️ Versão dos dados indisponível para o cache HTTP: {e}")
+                versao_dados = None
+            if versao_dados is not None:
+                etag = _etag(versao_dados)
+                if request.if_none_match.contains_weak(etag):
+                    _count('nao_modificado_sem_rota')
+                    return _aplicar_cabecalhos(make_response('', 304), etag, max_age())
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            if etag is None:
+                etag = _etag(hashlib.md5(response.get_data()).hexdigest())
+            _aplicar_cabecalhos(response, etag, max_age())
+            response = response.make_conditional(request)
+            _count('nao_modificado' if response.status_code == 304 else 'respostas')
+            return response
+        return decorated_function
+    return decorator
+
+
+def get_http_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
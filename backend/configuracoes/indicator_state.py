@@ -0,0 +1,305 @@
+"""
+Estado incremental de RSL e volatilidade por ticker.
+
+Mantém a soma da janela da média móvel e a variância dos retornos (Welford,
+com remoção) de modo que cada barra nova, ou cada tick que altera a última
+barra, atualize os indicadores em O(1) sem recalcular o histórico.
+Os valores batem com YFinanceService.calculate_rsl / calculate_volatilidade
+sobre a mesma janela de período (ex: '1y').
+"""
+import json
+import os
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from .config import Config
+from .price_store import get_price_store, normalize_symbol, period_to_start
+
+ANUALIZACAO = np.sqrt(252)
+
+# Barras fechadas do estado comparadas com o store a cada leitura (detecção de reajuste)
+BARRAS_CONFERIDAS = 5
+
+
+class IndicatorState:
+    """Janela de barras (data, fechamento) com soma móvel e variância de Welford"""
+
+    def __init__(self, periodo_mm=30, period='1y'):
+        self.periodo_mm = periodo_mm
+        self.period = period
+        self.bars = deque()  # (timestamp ns da data, close)
+        self.mm_sum = 0.0  # soma dos últimos `periodo_mm` fechamentos
+        # Welford sobre os retornos das barras da janela (a primeira barra não tem retorno)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Barras incluídas, trocadas ou removidas: o store só grava quando muda
+        self.alteracoes = 0
+
+    # ----- Welford com inserção e remoção -----
+    def _add_return(self, r):
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+
+    def _remove_return(self, r):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = r - self.mean
+        self.mean -= delta / (self.n - 1)
+        self.m2 -= delta * (r - self.mean)
+        self.n -= 1
+
+    @staticmethod
+    def _ret(close, prev_close):
+        return close / prev_close - 1
+
+    # ----- atualização -----
+    def _close_at(self, pos):
+        return self.bars[pos][1]
+
+    def add_bar(self, date, close):
+        """Barra nova (ou atualização da última, se for da mesma data)"""
+        date = pd.Timestamp(date).normalize().value
+        if self.bars and date == self.bars[-1][0]:
+            return self.update_last(close)
+        if self.bars and date < self.bars[-1][0]:
+            return  # barra antiga, já considerada
+
+        if self.bars:
+            self._add_return(self._ret(close, self.bars[-1][1]))
+        self.bars.append((date, float(close)))
+        self.alteracoes += 1
+
+        self.mm_sum += close
+        if len(self.bars) > self.periodo_mm:
+            self.mm_sum -= self._close_at(-self.periodo_mm - 1)
+
+    def update_last(self, close):
+        """Tick intradiário: troca o fechamento da última barra em O(1)"""
+        if not self.bars:
+            return
+        date, old_close = self.bars[-1]
+        close = float(close)
+        if close == old_close:
+            return
+
+        if len(self.bars) >= 2:
+            prev_close = self._close_at(-2)
+            self._remove_return(self._ret(old_close, prev_close))
+            self._add_return(self._ret(close, prev_close))
+
+        self.bars[-1] = (date, close)
+        self.mm_sum += close - old_close
+        self.alteracoes += 1
+
+    def evict_before(self, start):
+        """Remove barras anteriores ao início da janela de período"""
+        start = pd.Timestamp(start).normalize().value
+        while self.bars and self.bars[0][0] < start:
+            if len(self.bars) <= self.periodo_mm:
+                self.mm_sum -= self.bars[0][1]
+            first_close = self.bars.popleft()[1]
+            self.alteracoes += 1
+            # A nova primeira barra deixa de ter retorno dentro da janela
+            if self.bars:
+                self._remove_return(self._ret(self.bars[0][1], first_close))
+
+    # ----- leitura -----
+    @property
+    def pontos(self):
+        return len(self.bars)
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.bars[-1][0]) if self.bars else None
+
+    @property
+    def close_atual(self):
+        return self.bars[-1][1] if self.bars else None
+
+    @property
+    def mm(self):
+        if len(self.bars) < self.periodo_mm:
+            return None
+        return self.mm_sum / self.periodo_mm
+
+    @property
+    def rsl(self):
+        mm = self.mm
+        return None if mm is None else ((self.close_atual / mm) - 1) * 100
+
+    @property
+    def volatilidade(self):
+        if len(self.bars) < 30 or self.n < 2:
+            return None
+        vol = np.sqrt(max(self.m2, 0.0) / (self.n - 1)) * ANUALIZACAO * 100
+        return vol if np.isfinite(vol) else None
+
+    # ----- serialização -----
+    def to_dict(self):
+        return {
+            'periodo_mm': self.periodo_mm,
+            'period': self.period,
+            'bars': [[date, close] for date, close in self.bars],
+            'mm_sum': self.mm_sum,
+            'n': self.n,
+            'mean': self.mean,
+            'm2': self.m2
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['periodo_mm'], data['period'])
+        state.bars = deque((int(date), float(close)) for date, close in data['bars'])
+        state.mm_sum = data['mm_sum']
+        state.n = data['n']
+        state.mean = data['mean']
+        state.m2 = data['m2']
+        return state
+
+    @classmethod
+    def from_history(cls, closes, periodo_mm=30, period='1y'):
+        """Estado inicial a partir de uma série de fechamentos (O(n), só na primeira vez)"""
+        state = cls(periodo_mm, period)
+        for date, close in closes.dropna().items():
+            state.add_bar(date, close)
+        return state
+
+
+class IndicatorStateStore:
+    """
+    Estados incrementais por (ticker, periodo_mm), persistidos em JSON para
+    sobreviver a reinícios. get_state() aplica só as barras novas do store de preços
+    e só regrava o arquivo quando alguma barra entrou, mudou ou saiu da janela;
+    os ticks de apply_tick ficam em memória até o próximo get_state() ou flush().
+    """
+
+    def __init__(self, state_dir, period='1y'):
+        self.state_dir = state_dir
+        self.period = period
+        self._states = {}
+        self._locks = {}
+        self._sujos = set()  # chaves alteradas em memória e ainda não gravadas
+        self._lock = threading.Lock()
+        self._stats = {'saves': 0, 'unchanged': 0, 'rebuilds': 0}
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, symbol, periodo_mm):
+        return os.path.join(self.state_dir, f'{symbol}_{periodo_mm}.json')
+
+    def _symbol_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.RLock())
+
+    def _save(self, symbol, state):
+        self._stats['saves'] += 1
+        path = self._path(symbol, state.periodo_mm)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def _load(self, symbol, periodo_mm):
+        try:
+            with open(self._path(symbol, periodo_mm)) as f:
+                state = IndicatorState.from_dict(json.load(f))
+            return state if state.period == self.period else None
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def _reajustado(state, closes):
+        """
+        True se alguma barra fechada do estado (todas menos a última, que pode ser
+        parcial) voltou do store com outro fechamento: o provedor reajustou o passado
+        """
+        guardadas = list(state.bars)[-BARRAS_CONFERIDAS - 1:-1]
+        for date, close in guardadas:
+            atual = closes.get(pd.Timestamp(date))
+            if atual is None or np.isnan(atual):
+                continue
+            if abs(atual - close) > Config.PRICE_ADJUSTMENT_TOLERANCE * abs(close):
+                return True
+        return False
+
+    def get_state(self, symbol, periodo_mm=30):
+        """Estado atualizado com as últimas barras do store (constrói do histórico só na primeira vez)"""
+        symbol = normalize_symbol(symbol)
+        key = (symbol, periodo_mm)
+
+        with self._symbol_lock(key):
+            state = self._states.get(key) or self._load(symbol, periodo_mm)
+            start = period_to_start(self.period)
+
+            if state is None or not state.bars:
+                history = get_price_store().get_history(symbol, period=self.period)
+                state = IndicatorState.from_history(history['Close'], periodo_mm, self.period)
+                alteracoes = -1  # estado novo: grava sempre
+            else:
+                alteracoes = state.alteracoes
+                # Só as barras a partir da última conhecida (ela pode ter mudado), mais
+                # algumas fechadas antes dela para detectar um reajuste do histórico
+                inicio = pd.Timestamp(state.bars[-min(BARRAS_CONFERIDAS + 1, len(state.bars))][0])
+                novas = get_price_store().get_history(symbol, start=inicio)
+                if self._reajustado(state, novas['Close']):
+                    # Split/dividendo: o store trocou o histórico inteiro, o estado recomeça dele
+                    self._stats['rebuilds'] += 1
+                    history = get_price_store().get_history(symbol, period=self.period)
+                    state = IndicatorState.from_history(history['Close'], periodo_mm, self.period)
+                    alteracoes = -1
+                else:
+                    for date, close in novas['Close'][novas.index >= state.last_date].dropna().items():
+                        state.add_bar(date, close)
+
+            state.evict_before(start)
+            self._states[key] = state
+            if state.alteracoes != alteracoes or key in self._sujos:
+                self._save(symbol, state)
+                self._sujos.discard(key)
+            else:
+                self._stats['unchanged'] += 1
+            return state
+
+    def apply_tick(self, symbol, date, price, periodo_mm=30):
+        """Atualiza o estado com um preço em tempo real (barra do dia) em O(1)"""
+        symbol = normalize_symbol(symbol)
+        key = (symbol, periodo_mm)
+        with self._symbol_lock(key):
+            state = self._states.get(key) or self._load(symbol, periodo_mm)
+            if state is None:
+                return None
+            alteracoes = state.alteracoes
+            state.add_bar(date, price)
+            self._states[key] = state
+            if state.alteracoes != alteracoes:
+                self._sujos.add(key)
+            return state
+
+    def flush(self):
+        """Grava os estados alterados só em memória (ex: ao encerrar o processo)"""
+        for key in list(self._sujos):
+            with self._symbol_lock(key):
+                if key in self._sujos:
+                    self._save(key[0], self._states[key])
+                    self._sujos.discard(key)
+
+    def get_info(self):
+        return {**self._stats, 'estados': len(self._states), 'pendentes': len(self._sujos)}
+
+
+_state_store = None
+_state_store_lock = threading.Lock()
+
+
+def get_indicator_state_store():
+    """Store de estados incrementais do processo"""
+    global _state_store
+    if _state_store is None:
+        with _state_store_lock:
+            if _state_store is None:
+                _state_store = IndicatorStateStore(Config.INDICATOR_STATE_DIR)
+    return _state_store
@@ -0,0 +1,154 @@
+"""
+Indicadores técnicos vetorizados sobre matrizes de preços (datas × tickers).
+
+Cada função recebe arrays 2D e calcula todos os tickers de uma vez: as médias
+móveis simples usam somas acumuladas e as exponenciais (EMA, suavização de
+Wilder) percorrem as linhas uma vez com operações sobre a linha inteira.
+NaN no início de uma coluna (ticker ainda sem histórico) é respeitado, e o
+aquecimento conta a partir do primeiro valor válido de cada coluna.
+
+As linhas são as barras de cada ticker, não datas do calendário comum:
+pack_columns alinha as barras próprias de cada ticker pelo fim (NaN só no
+início), de modo que um ticker calculado num lote dá exatamente o mesmo
+resultado que calculado sozinho, sem barras sintéticas nas datas que ele não tem.
+"""
+import numpy as np
+
+EMA_PERIODOS = (9, 21, 50, 200)
+
+
+def pack_columns(colunas):
+    """Lista de arrays 1D (barras de cada ticker) -> matriz barras × tickers alinhada pela última barra"""
+    linhas = max((len(coluna) for coluna in colunas), default=0)
+    out = np.full((linhas, len(colunas)), np.nan)
+    for j, coluna in enumerate(colunas):
+        if len(coluna):
+            out[linhas - len(coluna):, j] = coluna
+    return out
+
+
+def ema(values, span=None, alpha=None):
+    """Média móvel exponencial (adjust=False), começando no primeiro valor válido de cada coluna"""
+    alpha = alpha if alpha is not None else 2.0 / (span + 1)
+    out = np.full(values.shape, np.nan)
+    estado = np.full(values.shape[1], np.nan)
+    for t in range(values.shape[0]):
+        x = values[t]
+        estado = np.where(np.isnan(estado), x, np.where(np.isnan(x), estado, alpha * x + (1 - alpha) * estado))
+        out[t] = estado
+    return out
+
+
+def sma(values, window):
+    """Média móvel simples; NaN até a janela estar completa"""
+    valid = ~np.isnan(values)
+    zeros = np.zeros((1, values.shape[1]))
+    soma = np.vstack([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    contagem = np.vstack([zeros, np.cumsum(valid, axis=0)])
+    out = np.full(values.shape, np.nan)
+    janela = contagem[window:] - contagem[:-window]
+    out[window - 1:] = np.where(janela == window, (soma[window:] - soma[:-window]) / window, np.nan)
+    return out
+
+
+def rolling_std(values, window):
+    """Desvio padrão populacional móvel (como nas Bandas de Bollinger)"""
+    media = sma(values, window)
+    media_quadrados = sma(values ** 2, window)
+    return np.sqrt(np.maximum(media_quadrados - media ** 2, 0.0))
+
+
+def _diff(values):
+    return np.vstack([np.full((1, values.shape[1]), np.nan), np.diff(values, axis=0)])
+
+
+def rsi(close, period=14):
+    """RSI com suavização de Wilder"""
+    delta = _diff(close)
+    ganhos = ema(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha=1.0 / period)
+    perdas = ema(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + ganhos / perdas)
+    out = np.where(perdas == 0, 100.0, out)
+    # Aquecimento: as primeiras `period` barras de cada coluna (primeira variação + period - 1)
+    variacoes = np.cumsum(~np.isnan(delta), axis=0)
+    out = np.where(variacoes < period, np.nan, out)
+    return np.where(np.isnan(ganhos), np.nan, out)
+
+
+def macd(close, rapida=12, lenta=26, sinal=9):
+    linha = ema(close, rapida) - ema(close, lenta)
+    linha_sinal = ema(linha, sinal)
+    return {'macd': linha, 'macd_signal': linha_sinal, 'macd_hist': linha - linha_sinal}
+
+
+def bollinger(close, window=20, desvios=2.0):
+    media = sma(close, window)
+    desvio = rolling_std(close, window)
+    superior = media + desvios * desvio
+    inferior = media - desvios * desvio
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentual = (close - inferior) / (superior - inferior)
+    return {'bb_upper': superior, 'bb_middle': media, 'bb_lower': inferior, 'bb_percent': percentual}
+
+
+def atr(high, low, close, period=14):
+    """Average True Range com suavização de Wilder"""
+    anterior = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - anterior), np.abs(low - anterior)))
+    return ema(true_range, alpha=1.0 / period)
+
+
+def emas(close, periodos=EMA_PERIODOS):
+    return {f'ema_{p}': ema(close, p) for p in periodos}
+
+
+# Nome pedido -> função(high, low, close) que devolve {série: matriz}
+INDICADORES = {
+    'rsi': lambda high, low, close: {'rsi': rsi(close)},
+    'macd': lambda high, low, close: macd(close),
+    'bollinger': lambda high, low, close: bollinger(close),
+    'atr': lambda high, low, close: {'atr': atr(high, low, close)},
+    'ema': lambda high, low, close: emas(close)
+}
+
+
+def parse_indicadores(texto):
+    """'rsi,macd' -> ('macd', 'rsi'); vazio -> todos. Nomes desconhecidos geram ValueError"""
+    if not texto:
+        return tuple(sorted(INDICADORES))
+    nomes = {nome.strip().lower() for nome in texto.split(',') if nome.strip()}
+    desconhecidos = nomes - set(INDICADORES)
+    if desconhecidos:
+        raise ValueError(f"Indicadores desconhecidos: {', '.join(sorted(desconhecidos))}")
+    return tuple(sorted(nomes))
+
+
+def compute_indicators(high, low, close, nomes):
+    """Séries de todos os indicadores pedidos para todos os tickers: {série: matriz datas × tickers}"""
+    series = {}
+    for nome in nomes:
+        series.update(INDICADORES[nome](high, low, close))
+    return series
+
+
+def posicao_bollinger(close, superior, media, inferior):
+    if close > superior:
+        return 'above_upper'
+    if close < inferior:
+        return 'below_lower'
+    return 'upper' if close >= media else 'lower'
+
+
+def ultimos_valores(series, close, coluna, linha=-1):
+    """Valores na última barra do ticker (`linha`), arredondados, no formato da API"""
+    valores = {}
+    for nome, matriz in series.items():
+        valor = matriz[linha, coluna]
+        valores[nome] = round(float(valor), 4 if nome == 'bb_percent' else 2) if np.isfinite(valor) else None
+
+    if 'bb_upper' in valores and None not in (valores['bb_upper'], valores['bb_lower']):
+        valores['bollinger_position'] = posicao_bollinger(
+            close[linha, coluna], valores['bb_upper'], valores['bb_middle'], valores['bb_lower']
+        )
+    return valores
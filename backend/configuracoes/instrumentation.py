@@ -0,0 +1,414 @@
+"""
+Instrumentação das requisições: spans, histogramas de latência e /metrics.
+
+- span(tipo, nome): mede um trecho (checkout de conexão do pool, cada SQL,
+  download do yfinance, cálculo, serialização). Cada span alimenta o
+  histograma geminii_span_duration_seconds{tipo,nome} e soma no tempo da
+  requisição em andamento (ContextVar).
+- Cada rota tem o histograma geminii_http_request_duration_seconds{rota,metodo};
+  p50/p95/p99 são estimados dos baldes como no histogram_quantile do Prometheus.
+- Server-Timing (opcional, Config.SERVER_TIMING_ENABLED): tempo por tipo de span
+  e o total, visível no DevTools do navegador.
+
+Com vários workers do gunicorn cada processo grava seus números em
+Config.METRICS_DIR/<pid>.json (no máximo a cada METRICS_FLUSH_SECONDS e ao
+encerrar o worker) e o /metrics soma os arquivos dos processos vivos com o
+acumulado dos que já morreram (ARQUIVO_MORTOS), para que os totais nunca
+diminuam quando um worker é reiniciado; sem diretório, só o processo que
+atende o scrape é exportado.
+
+O /metrics só exige autenticação com Config.METRICS_TOKEN definido; sem ele,
+qualquer um que alcance o app lê as rotas e a latência de cada uma.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento): sem vários workers, não há com quem disputar
+    fcntl = None
+from flask.json.provider import DefaultJSONProvider
+from .config import Config
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICA_HTTP = 'geminii_http_request_duration_seconds'
+METRICA_SPAN = 'geminii_span_duration_seconds'
+METRICA_RESPOSTAS = 'geminii_http_responses_total'
+
+DESCRICOES = {
+    METRICA_HTTP: 'Latência das requisições por rota',
+    METRICA_SPAN: 'Duração dos trechos instrumentados (banco, yfinance, cálculos, serialização)',
+    METRICA_RESPOSTAS: 'Respostas por rota e status'
+}
+LABELS = {
+    METRICA_HTTP: ('rota', 'metodo'),
+    METRICA_SPAN: ('tipo', 'nome'),
+    METRICA_RESPOSTAS: ('rota', 'metodo', 'status')
+}
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+# Totais dos workers já encerrados, em METRICS_DIR
+ARQUIVO_MORTOS = 'mortos.json'
+
+
+class RequestTimings:
+    """Tempo acumulado por tipo de span durante uma requisição"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.por_tipo = {}
+        self._lock = threading.Lock()
+
+    def add(self, tipo, segundos):
+        with self._lock:
+            total, chamadas = self.por_tipo.get(tipo, (0.0, 0))
+            self.por_tipo[tipo] = (total + segundos, chamadas + 1)
+
+    def server_timing(self, total):
+        partes = [
+            f'{tipo};dur={segundos * 1000:.1f};desc="{chamadas}x"'
+            for tipo, (segundos, chamadas) in sorted(self.por_tipo.items())
+        ]
+        partes.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(partes)
+
+
+_requisicao_atual = contextvars.ContextVar('geminii_request_timings', default=None)
+
+
+class MetricsRegistry:
+    """Histogramas e contadores do processo"""
+
+    def __init__(self):
+        self._histogramas = {}  # (métrica, labels) -> [contagens por balde, soma, total]
+        self._contadores = {}   # (métrica, labels) -> total
+        self._lock = threading.Lock()
+
+    def observe(self, metrica, labels, segundos):
+        balde = len(BUCKETS)
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite:
+                balde = i
+                break
+        with self._lock:
+            h = self._histogramas.get((metrica, labels))
+            if h is None:
+                h = self._histogramas[(metrica, labels)] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            h[0][balde] += 1
+            h[1] += segundos
+            h[2] += 1
+
+    def inc(self, metrica, labels):
+        with self._lock:
+            self._contadores[(metrica, labels)] = self._contadores.get((metrica, labels), 0) + 1
+
+    def dump(self):
+        """Estado serializável (para o arquivo do processo)"""
+        with self._lock:
+            return {
+                'histogramas': [[m, list(l), c[:], s, n] for (m, l), (c, s, n) in self._histogramas.items()],
+                'contadores': [[m, list(l), v] for (m, l), v in self._contadores.items()]
+            }
+
+    @staticmethod
+    def merge(dumps):
+        """Soma os estados de vários processos: ({chave: [baldes, soma, total]}, {chave: total})"""
+        histogramas, contadores = {}, {}
+        for estado in dumps:
+            for metrica, labels, contagens, soma, total in estado.get('histogramas', []):
+                chave = (metrica, tuple(labels))
+                h = histogramas.setdefault(chave, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+                h[0] = [a + b for a, b in zip(h[0], contagens)]
+                h[1] += soma
+                h[2] += total
+            for metrica, labels, valor in estado.get('contadores', []):
+                chave = (metrica, tuple(labels))
+                contadores[chave] = contadores.get(chave, 0) + valor
+        return histogramas, contadores
+
+
+def quantil(q, contagens):
+    """Quantil estimado dos baldes (interpolação linear dentro do balde, como o histogram_quantile)"""
+    total = sum(contagens)
+    if not total:
+        return None
+    alvo = q * total
+    acumulado = 0
+    for i, n in enumerate(contagens):
+        if acumulado + n >= alvo and n:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]  # acima do último balde: o melhor que dá para dizer
+            inferior = BUCKETS[i - 1] if i else 0.0
+            return inferior + (BUCKETS[i] - inferior) * (alvo - acumulado) / n
+        acumulado += n
+    return BUCKETS[-1]
+
+
+_registry = MetricsRegistry()
+_registry_pid = os.getpid()
+_ultimo_flush = 0.0
+
+
+def get_registry():
+    """Métricas do processo atual (zeradas após o fork: cada worker conta as suas)"""
+    global _registry, _registry_pid
+    if _registry_pid != os.getpid():
+        _registry = MetricsRegistry()
+        _registry_pid = os.getpid()
+    return _registry
+
+
+class span:
+    """
+    Mede um trecho: `with span('sql', 'SELECT'):` ou, como decorator,
+    `@span('calculo', 'calculate_rsl')`.
+    """
+
+    __slots__ = ('tipo', 'nome', 'inicio')
+
+    def __init__(self, tipo, nome):
+        self.tipo = tipo
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        segundos = time.perf_counter() - self.inicio
+        if Config.METRICS_ENABLED:
+            get_registry().observe(METRICA_SPAN, (self.tipo, self.nome), segundos)
+            timings = _requisicao_atual.get()
+            if timings is not None:
+                timings.add(self.tipo, segundos)
+        return False
+
+    def __call__(self, fn):
+        tipo, nome = self.tipo, self.nome
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(tipo, nome):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def begin_request():
+    """before_request: começa a contar o tempo da requisição"""
+    if Config.METRICS_ENABLED:
+        _requisicao_atual.set(RequestTimings())
+
+
+def finish_request(response, rota, metodo):
+    """after_request: registra a latência da rota e, se ativado, o Server-Timing"""
+    timings = _requisicao_atual.get()
+    if timings is None:
+        return response
+    _requisicao_atual.set(None)
+
+    total = time.perf_counter() - timings.inicio
+    registry = get_registry()
+    registry.observe(METRICA_HTTP, (rota, metodo), total)
+    registry.inc(METRICA_RESPOSTAS, (rota, metodo, str(response.status_code)))
+    if Config.SERVER_TIMING_ENABLED:
+        response.headers['Server-Timing'] = timings.server_timing(total)
+
+    if time.monotonic() - _ultimo_flush >= Config.METRICS_FLUSH_SECONDS:
+        flush()
+    return response
+
+
+def flush():
+    """Grava as métricas do processo em METRICS_DIR/<pid>.json (escrita atômica)"""
+    global _ultimo_flush
+    _ultimo_flush = time.monotonic()
+    if not Config.METRICS_DIR:
+        return
+    path = os.path.join(Config.METRICS_DIR, f'{os.getpid()}.json')
+    try:
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        _gravar_atomico(path, get_registry().dump())
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar as métricas em {path}: {e}")
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _ler(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _gravar_atomico(path, estado):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(estado, f)
+    os.replace(tmp_path, path)
+
+
+def _incorporar_mortos(mortos):
+    """
+    Soma os arquivos de processos mortos em METRICS_DIR/ARQUIVO_MORTOS e os remove,
+    como o modo multiprocesso do prometheus_client: os _count/_bucket/_sum
+    somados nunca diminuem quando um worker é reiniciado (senão o rate()
+    enxerga um reset falso). Um flock serializa os workers que fazem o scrape.
+    """
+    lock_path = os.path.join(Config.METRICS_DIR, f'{ARQUIVO_MORTOS}.lock')
+    path_mortos = os.path.join(Config.METRICS_DIR, ARQUIVO_MORTOS)
+    with open(lock_path, 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                acumulado = _ler(path_mortos)
+            except FileNotFoundError:
+                acumulado = {}
+            estados = [acumulado]
+            incorporados = []
+            for path in mortos:
+                try:
+                    estados.append(_ler(path))
+                    incorporados.append(path)
+                except FileNotFoundError:
+                    continue  # outro worker já incorporou
+                except ValueError:
+                    incorporados.append(path)  # arquivo corrompido: não há o que somar
+            if not incorporados:
+                return
+            histogramas, contadores = MetricsRegistry.merge(estados)
+            _gravar_atomico(path_mortos, {
+                'encerrados': True,
+                'histogramas': [[m, list(l), c, s, n] for (m, l), (c, s, n) in histogramas.items()],
+                'contadores': [[m, list(l), v] for (m, l), v in contadores.items()]
+            })
+            for path in incorporados:
+                os.remove(path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _estados():
+    """
+    Estado deste processo, dos outros workers vivos e o acumulado dos que já
+    morreram (os arquivos de processos mortos são incorporados a ele)
+    """
+    if not Config.METRICS_DIR:
+        return [get_registry().dump()]
+
+    flush()
+    try:
+        arquivos = os.listdir(Config.METRICS_DIR)
+    except OSError:
+        return [get_registry().dump()]
+
+    vivos, mortos = [], []
+    for arquivo in arquivos:
+        pid, _, ext = arquivo.partition('.')
+        if ext != 'json' or not pid.isdigit():
+            continue
+        path = os.path.join(Config.METRICS_DIR, arquivo)
+        (vivos if _processo_vivo(int(pid)) else mortos).append(path)
+
+    if mortos:
+        try:
+            _incorporar_mortos(mortos)
+        except OSError as e:
+            print(f"⚠️ Não foi possível incorporar as métricas de processos encerrados: {e}")
+
+    estados = []
+    for path in vivos + [os.path.join(Config.METRICS_DIR, ARQUIVO_MORTOS)]:
+        try:
+            estados.append(_ler(path))
+        except (OSError, ValueError):
+            continue
+    return estados
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(nomes, valores, le=None):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if le is not None:
+        pares.append(f'le="{le}"')
+    return '{' + ','.join(pares) + '}'
+
+
+def render_prometheus():
+    """Texto no formato de exposição do Prometheus (0.0.4)"""
+    histogramas, contadores = MetricsRegistry.merge(_estados())
+    linhas = []
+    for metrica in (METRICA_HTTP, METRICA_SPAN):
+        linhas += [f'# HELP {metrica} {DESCRICOES[metrica]}', f'# TYPE {metrica} histogram']
+        for (m, labels), (contagens, soma, total) in sorted(histogramas.items()):
+            if m != metrica:
+                continue
+            acumulado = 0
+            for limite, n in zip(BUCKETS, contagens):
+                acumulado += n
+                linhas.append(f'{metrica}_bucket{_labels(LABELS[metrica], labels, limite)} {acumulado}')
+            linhas.append(f'{metrica}_bucket{_labels(LABELS[metrica], labels, "+Inf")} {total}')
+            linhas.append(f'{metrica}_sum{_labels(LABELS[metrica], labels)} {soma:.6f}')
+            linhas.append(f'{metrica}_count{_labels(LABELS[metrica], labels)} {total}')
+
+    linhas += [f'# HELP {METRICA_RESPOSTAS} {DESCRICOES[METRICA_RESPOSTAS]}', f'# TYPE {METRICA_RESPOSTAS} counter']
+    for (m, labels), valor in sorted(contadores.items()):
+        linhas.append(f'{m}{_labels(LABELS[m], labels)} {valor}')
+    return '\n'.join(linhas) + '\n'
+
+
+def _resumo(contagens, soma, total):
+    resumo = {'chamadas': total, 'media_ms': round(soma / total * 1000, 2) if total else None}
+    for q in QUANTIS:
+        valor = quantil(q, contagens)
+        resumo[f'p{int(q * 100)}_ms'] = round(valor * 1000, 2) if valor is not None else None
+    return resumo
+
+
+def get_metrics_summary():
+    """p50/p95/p99 por rota e por span (todos os workers), do mais lento para o mais rápido"""
+    estados = _estados()
+    histogramas, contadores = MetricsRegistry.merge(estados)
+    rotas, spans = {}, {}
+    for (metrica, labels), h in histogramas.items():
+        if metrica == METRICA_HTTP:
+            rota, metodo = labels
+            rotas[f'{metodo} {rota}'] = _resumo(*h)
+        else:
+            tipo, nome = labels
+            spans[f'{tipo}:{nome}'] = _resumo(*h)
+
+    def ordenar(d):
+        return dict(sorted(d.items(), key=lambda item: -(item[1]['p95_ms'] or 0)))
+
+    return {
+        'rotas': ordenar(rotas),
+        'spans': ordenar(spans),
+        'respostas': {f'{metodo} {rota} {status}': total for (_, (rota, metodo, status)), total in sorted(contadores.items())},
+        'workers': sum(1 for estado in estados if not estado.get('encerrados')),
+        'server_timing': Config.SERVER_TIMING_ENABLED
+    }
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """jsonify com span de serialização"""
+
+    def response(self, *args, **kwargs):
+        with span('serializacao', 'jsonify'):
+            return super().response(*args, **kwargs)
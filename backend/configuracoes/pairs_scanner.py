@@ -0,0 +1,149 @@
+"""
+Scanner de pares cointegrados (pairs trading) dentro de um setor.
+
+1. Pré-filtro vetorizado: correlação dos log-preços de todos os pares de uma vez,
+   cada par nas datas em que os dois têm preço.
+2. Para os candidatos, nessas mesmas datas: teste de Engle-Granger (coint), hedge ratio por OLS
+   móvel (RollingOLS), z-score do spread atual e meia-vida da reversão.
+   Os testes rodam num pool de processos (statsmodels é CPU-bound).
+3. Resultado ordenado pelo p-valor, em cache pela versão dos dados de preço.
+"""
+import hashlib
+import time
+import numpy as np
+from .config import Config
+
+MIN_PONTOS = 120
+
+
+def versao_dados(close_matrix):
+    """Identifica os dados usados: tickers, última data e último fechamento de cada um"""
+    ultima = close_matrix.iloc[-1].round(4).to_numpy(dtype='float64')
+    digest = hashlib.md5(','.join(close_matrix.columns).encode() + ultima.tobytes()).hexdigest()[:12]
+    return f"{close_matrix.index[-1].strftime('%Y-%m-%d')}:{digest}"
+
+
+def correlacao_par_a_par(log_precos):
+    """
+    Correlação de cada par de colunas só nas datas em que as duas têm preço
+    (como DataFrame.corr), de uma vez por produtos de matrizes.
+    Retorna (correlações, número de observações comuns de cada par).
+    """
+    validos = ~np.isnan(log_precos)
+    pesos = validos.astype('float64')
+    # Centrar cada coluna não muda a correlação e evita cancelamento nas somas
+    x = np.where(validos, log_precos - np.nanmean(log_precos, axis=0), 0.0)
+
+    n = pesos.T @ pesos
+    soma = x.T @ pesos              # soma[i, j]: soma de x_i nas datas comuns com j
+    soma_quad = (x * x).T @ pesos
+    produto = x.T @ x
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = produto - soma * soma.T / n
+        var_i = soma_quad - soma * soma / n
+        corr = cov / np.sqrt(var_i * var_i.T)
+    return corr, n.astype('int64')
+
+
+def candidatos_por_correlacao(close_matrix, min_correlacao, max_candidatos):
+    """
+    Pares (a, b, correlação) com correlação dos log-preços acima do mínimo, mais
+    correlacionados primeiro. Cada par usa só as datas em que os dois têm preço,
+    então um ticker com lacunas não encurta a amostra dos outros pares; pares
+    com menos de MIN_PONTOS datas em comum ficam de fora.
+    """
+    matriz = close_matrix.loc[:, close_matrix.notna().sum() >= MIN_PONTOS]
+    if matriz.shape[1] < 2:
+        return matriz, []
+
+    corr, comuns = correlacao_par_a_par(np.log(matriz.to_numpy(dtype='float64')))
+    i, j = np.triu_indices_from(corr, k=1)
+    valores = corr[i, j]
+    selecionados = np.flatnonzero((comuns[i, j] >= MIN_PONTOS) & (valores >= min_correlacao))
+    selecionados = selecionados[np.argsort(-valores[selecionados])][:max_candidatos]
+
+    colunas = matriz.columns
+    return matriz, [(colunas[i[k]], colunas[j[k]], float(valores[k])) for k in selecionados]
+
+
+def observacoes_comuns(y, x):
+    """Log-preços de y e x só nas datas em que os dois têm preço"""
+    comuns = ~(np.isnan(y) | np.isnan(x))
+    return y[comuns], x[comuns]
+
+
+def testar_par(tarefa):
+    """
+    Cointegração de y contra x (log-preços). Roda nos processos do pool:
+    recebe e devolve só tipos simples.
+    """
+    a, b, y, x, correlacao, janela = tarefa
+    from statsmodels.tsa.stattools import coint
+    from statsmodels.regression.linear_model import OLS
+    from statsmodels.regression.rolling import RollingOLS
+    from statsmodels.tools.tools import add_constant
+
+    _, pvalue, _ = coint(y, x)
+
+    # Hedge ratio móvel: y = alpha + beta * x na janela
+    params = RollingOLS(y, add_constant(x), window=janela).fit().params
+    params = np.asarray(params)
+    spread = y - (params[:, 0] + params[:, 1] * x)
+    spread = spread[~np.isnan(spread)]
+    recente = spread[-janela:]
+    desvio = recente.std(ddof=1)
+    zscore = (spread[-1] - recente.mean()) / desvio if desvio > 0 else 0.0
+
+    # Meia-vida da reversão à média: Δspread = theta * spread(t-1)
+    theta = OLS(np.diff(spread), add_constant(spread[:-1])).fit().params[1]
+    meia_vida = float(-np.log(2) / theta) if theta < 0 else None
+
+    return {
+        'par': f'{a}/{b}',
+        'ticker_a': a,
+        'ticker_b': b,
+        'correlacao': round(correlacao, 4),
+        'pontos_dados': len(y),
+        'pvalue': round(float(pvalue), 4),
+        'hedge_ratio': round(float(params[-1, 1]), 4),
+        'zscore': round(float(zscore), 2),
+        'meia_vida_dias': round(meia_vida, 1) if meia_vida is not None else None,
+        'sinal': 'VENDER_SPREAD' if zscore >= 2 else 'COMPRAR_SPREAD' if zscore <= -2 else 'NEUTRO'
+    }
+
+
+def scan_pairs(close_matrix, min_correlacao=0.8, max_pvalue=0.05, janela=60, max_candidatos=300, executor=None):
+    """
+    Pares cointegrados do conjunto de fechamentos (datas × tickers).
+    Retorna (pares ordenados por p-valor, estatísticas da varredura).
+    """
+    inicio = time.monotonic()
+    matriz, candidatos = candidatos_por_correlacao(close_matrix, min_correlacao, max_candidatos)
+    log_precos = np.log(matriz.to_numpy(dtype='float64')) if candidatos else None
+    posicao = {ticker: k for k, ticker in enumerate(matriz.columns)}
+
+    tarefas = [
+        (a, b, *observacoes_comuns(log_precos[:, posicao[a]], log_precos[:, posicao[b]]), correlacao, janela)
+        for a, b, correlacao in candidatos
+    ]
+
+    if executor is not None and len(tarefas) >= Config.PAIRS_PARALLEL_MIN:
+        chunksize = max(1, len(tarefas) // (Config.ANALYTICS_PROCESSES * 4))
+        resultados = list(executor.map(testar_par, tarefas, chunksize=chunksize))
+    else:
+        resultados = [testar_par(tarefa) for tarefa in tarefas]
+
+    pares = sorted((r for r in resultados if r['pvalue'] <= max_pvalue),
+                   key=lambda r: (r['pvalue'], -abs(r['zscore'])))
+
+    n = matriz.shape[1]
+    return pares, {
+        'tickers_analisados': n,
+        'pares_possiveis': n * (n - 1) // 2,
+        'pares_testados': len(tarefas),
+        'pares_cointegrados': len(pares),
+        'pontos_dados': len(matriz),  # datas da matriz; cada par usa as que tem em comum
+        'tempo_ms': round((time.monotonic() - inicio) * 1000, 1)
+    }
+
@@ -0,0 +1,444 @@
+import os
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .config import Config
+from .instrumentation import span
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def normalize_symbol(symbol):
+    """Adiciona .SA para ações brasileiras se necessário"""
+    symbol = symbol.strip().upper()
+    if not symbol.endswith('.SA'):
+        symbol += '.SA'
+    return symbol
+
+
+def period_to_start(period, today=None):
+    """Converte períodos do yfinance ('1mo', '1y', 'ytd', 'max') em data inicial"""
+    today = pd.Timestamp(today or datetime.now()).normalize()
+
+    if period in (None, 'max'):
+        return None
+    if period == 'ytd':
+        return today.replace(month=1, day=1)
+
+    units = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+
+    raise ValueError(f'Período inválido: {period}')
+
+
+def _normalize_frame(data):
+    """Barras diárias com índice de datas sem fuso e apenas colunas OHLCV"""
+    if data is None or data.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+    data = data[OHLCV_COLUMNS].astype('float64')
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index.normalize().rename('Date')
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
+
+
+class PriceProvider:
+    """Interface dos provedores de histórico (yfinance, fixtures de teste...)"""
+
+    def fetch_history(self, symbol, start=None, end=None):
+        """Retorna DataFrame OHLCV diário de `symbol` entre start (inclusive) e end (exclusive)"""
+        raise NotImplementedError
+
+    def fetch_many(self, symbols, start=None, end=None):
+        """
+        Busca vários tickers; retorna ({symbol: DataFrame}, {symbol: erro}).
+        Provedores com download agrupado sobrescrevem para fazer uma única requisição.
+        """
+        frames, failures = {}, {}
+        for symbol in symbols:
+            try:
+                frames[symbol] = self.fetch_history(symbol, start=start, end=end)
+            except Exception as e:
+                failures[symbol] = str(e)
+        return frames, failures
+
+
+class YFinanceProvider(PriceProvider):
+    """Baixa histórico do Yahoo Finance"""
+
+    def fetch_history(self, symbol, start=None, end=None):
+        import yfinance as yf
+
+        stock = yf.Ticker(symbol)
+        with span('yfinance', 'history'):
+            if start is None:
+                history = stock.history(period='max')
+            else:
+                history = stock.history(start=start, end=end)
+        data = _normalize_frame(history)
+        if start is None and end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        return data
+
+    def fetch_many(self, symbols, start=None, end=None):
+        """Uma única requisição agrupada (yf.download) para todos os tickers"""
+        import yfinance as yf
+
+        with span('yfinance', 'download'):
+            if start is None:
+                wide = yf.download(symbols, period='max', group_by='ticker', auto_adjust=True,
+                                   threads=True, progress=False)
+            else:
+                wide = yf.download(symbols, start=start, end=end, group_by='ticker', auto_adjust=True,
+                                   threads=True, progress=False)
+
+        frames, failures = {}, {}
+        available = set(wide.columns.get_level_values(0)) if isinstance(wide.columns, pd.MultiIndex) else set()
+        for symbol in symbols:
+            if symbol not in available:
+                failures[symbol] = 'Sem dados no download agrupado'
+                continue
+            data = _normalize_frame(wide[symbol].dropna(how='all'))
+            if start is None and end is not None:
+                data = data[data.index < pd.Timestamp(end)]
+            frames[symbol] = data
+        return frames, failures
+
+
+class FixtureProvider(PriceProvider):
+    """
+    Lê histórico de arquivos CSV (<SYMBOL>.csv com Date,Open,High,Low,Close,Volume).
+    Usado em testes e benchmarks para não depender da rede.
+    """
+
+    def __init__(self, fixture_dir, latency=0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.calls = 0
+
+    def fetch_history(self, symbol, start=None, end=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = os.path.join(self.fixture_dir, f'{symbol}.csv')
+        if not os.path.exists(path):
+            return _normalize_frame(None)
+
+        data = _normalize_frame(pd.read_csv(path, index_col='Date', parse_dates=True))
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        return data
+
+
+class PriceStore:
+    """
+    Armazena barras diárias por ticker em arquivos colunares (.npz) e
+    busca no provedor apenas o trecho que falta (cauda nova ou início mais antigo).
+
+    Os preços do provedor são ajustados (auto_adjust): depois de um split ou
+    dividendo, todo o passado muda. Por isso a cauda é baixada com algumas barras
+    já guardadas (overlap_bars); se o fechamento de uma delas mudou além de
+    `tolerance`, o histórico inteiro do ticker é baixado de novo e substitui o
+    guardado, em vez de emendar séries com ajustes diferentes.
+    """
+
+    def __init__(self, provider, data_dir, refresh_seconds=300, default_period='1y',
+                 overlap_bars=5, tolerance=0.0005):
+        self.provider = provider
+        self.data_dir = data_dir
+        self.refresh_seconds = refresh_seconds
+        self.default_period = default_period
+        self.overlap_bars = max(2, overlap_bars)
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self._symbol_locks = {}
+        self._frames = {}  # symbol -> (mtime, DataFrame, history_start)
+        self._stats = {'reads': 0, 'fetches': 0, 'batch_fetches': 0, 'bars_fetched': 0, 'readjustments': 0}
+
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.data_dir, f"{symbol.replace('^', '_')}.npz")
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.RLock())
+
+    def _load(self, symbol):
+        """Lê o arquivo do ticker (com cache em memória pelo mtime)"""
+        path = self._path(symbol)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None, None, None
+
+        cached = self._frames.get(symbol)
+        if cached and cached[0] == mtime:
+            return cached
+
+        with np.load(path) as arrays:
+            data = pd.DataFrame(
+                {column: arrays[column] for column in OHLCV_COLUMNS},
+                index=pd.DatetimeIndex(arrays['dates'].astype('datetime64[ns]'), name='Date')
+            )
+            history_start = pd.Timestamp(int(arrays['history_start'])) if int(arrays['history_start']) else None
+
+        self._frames[symbol] = (mtime, data, history_start)
+        return self._frames[symbol]
+
+    def _save(self, symbol, data, history_start):
+        """Grava de forma atômica (outros workers podem estar lendo)"""
+        path = self._path(symbol)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                dates=data.index.values.astype('datetime64[ns]').astype('int64'),
+                history_start=np.int64(history_start.value if history_start is not None else 0),
+                **{column: data[column].to_numpy(dtype='float64') for column in OHLCV_COLUMNS}
+            )
+        os.replace(tmp_path, path)
+        self._frames.pop(symbol, None)
+
+    def _plan_fetch(self, symbol, start, force, max_age=None):
+        """
+        Decide o que baixar para o ticker: None se já está atualizado (arquivo
+        gravado há menos de `max_age` segundos, por padrão refresh_seconds),
+        senão (início do download, history_start resultante).
+        A cauda começa `overlap_bars` barras antes da última guardada (que pode
+        estar parcial): as anteriores a ela servem para detectar reajustes.
+        """
+        mtime, data, history_start = self._load(symbol)
+        max_age = self.refresh_seconds if max_age is None else max_age
+        fresh = mtime is not None and time.time() - mtime < max_age
+
+        if data is None or data.empty:
+            if fresh and not force:
+                return None
+            return start, (pd.Timestamp(start) if start is not None else None)
+
+        if history_start is not None and (start is None or pd.Timestamp(start) < history_start):
+            return start, (pd.Timestamp(start) if start is not None else None)
+
+        if fresh and not force:
+            return None
+        return data.index[-min(self.overlap_bars, len(data))], history_start
+
+    def _readjusted(self, symbol, fetched):
+        """
+        True se o provedor reajustou o passado: alguma barra fechada (todas menos a
+        última guardada) voltou com fechamento diferente e o download não cobre o
+        histórico guardado inteiro.
+        """
+        _, data, _ = self._load(symbol)
+        if data is None or len(data) < 2 or fetched is None or fetched.empty:
+            return False
+        if fetched.index[0] <= data.index[0]:
+            return False  # o download já substitui todas as barras guardadas
+
+        stored = data['Close'].iloc[:-1]
+        common = stored.index.intersection(fetched.index)
+        if common.empty:
+            return False
+        old, new = stored.loc[common], fetched['Close'].loc[common]
+        diff = ((new - old).abs() / old.abs().where(old != 0)).max()
+        return bool(diff > self.tolerance)
+
+    def _merge(self, symbol, fetched, history_start, replace=False):
+        """Junta as barras novas às guardadas (as novas prevalecem) e grava; `replace` descarta as guardadas"""
+        with self._symbol_lock(symbol):
+            _, data, _ = self._load(symbol)
+            pieces = [piece for piece in ((None if replace else data), fetched) if piece is not None and not piece.empty]
+            merged = _normalize_frame(pd.concat(pieces) if pieces else None)
+
+            self._save(symbol, merged, history_start)
+            self._stats['bars_fetched'] += len(merged) - (0 if data is None else len(data))
+            return merged
+
+    def refresh(self, symbol, start=None, force=False):
+        """Atualiza um ticker baixando só o trecho que falta"""
+        symbol = normalize_symbol(symbol)
+
+        with self._symbol_lock(symbol):
+            plan = self._plan_fetch(symbol, start, force)
+            if plan is None:
+                return self._load(symbol)[1]
+
+            fetch_start, history_start = plan
+            fetched = self.provider.fetch_history(symbol, start=fetch_start)
+            self._stats['fetches'] += 1
+
+            if self._readjusted(symbol, fetched):
+                print(f"🔁 {symbol}: preços reajustados no provedor, baixando o histórico completo")
+                fetched = self.provider.fetch_history(symbol, start=history_start)
+                self._stats['fetches'] += 1
+                self._stats['readjustments'] += 1
+                return self._merge(symbol, fetched, history_start, replace=True)
+
+            return self._merge(symbol, fetched, history_start)
+
+    def refresh_many(self, symbols, start=None, force=False, max_age=None):
+        """
+        Atualiza vários tickers com um único download agrupado; `max_age` troca
+        refresh_seconds como idade a partir da qual o arquivo é baixado de novo
+        (o arquivo é de todos os workers: quem atualizou antes poupa os outros).
+        Retorna {symbol: erro} para os tickers que falharam.
+        """
+        plans = {}
+        for symbol in dict.fromkeys(normalize_symbol(symbol) for symbol in symbols):
+            plan = self._plan_fetch(symbol, start, force, max_age)
+            if plan is not None:
+                plans[symbol] = plan
+
+        if not plans:
+            return {}
+
+        # Um só download a partir do início mais antigo necessário
+        fetch_starts = [fetch_start for fetch_start, _ in plans.values()]
+        batch_start = None if any(s is None for s in fetch_starts) else min(pd.Timestamp(s) for s in fetch_starts)
+
+        try:
+            frames, failures = self.provider.fetch_many(list(plans), start=batch_start)
+        except Exception as e:
+            return {symbol: str(e) for symbol in plans}
+        self._stats['fetches'] += 1
+        self._stats['batch_fetches'] += 1
+
+        readjusted = [symbol for symbol, data in frames.items() if self._readjusted(symbol, data)]
+        for symbol, data in frames.items():
+            if symbol not in readjusted:
+                self._merge(symbol, data, plans[symbol][1])
+
+        if readjusted:
+            print(f"🔁 Preços reajustados no provedor: {', '.join(readjusted)} (baixando o histórico completo)")
+            history_starts = [plans[symbol][1] for symbol in readjusted]
+            full_start = None if any(s is None for s in history_starts) else min(history_starts)
+            try:
+                full, full_failures = self.provider.fetch_many(readjusted, start=full_start)
+            except Exception as e:
+                full, full_failures = {}, {symbol: str(e) for symbol in readjusted}
+            self._stats['fetches'] += 1
+            self._stats['batch_fetches'] += 1
+            self._stats['readjustments'] += len(full)
+            for symbol, data in full.items():
+                self._merge(symbol, self._slice(data, plans[symbol][1], None), plans[symbol][1], replace=True)
+            failures.update(full_failures)
+        return failures
+
+    def get_history(self, symbol, start=None, end=None, period=None):
+        """Barras OHLCV do ticker no intervalo [start, end]; atualiza se necessário"""
+        symbol = normalize_symbol(symbol)
+        if start is None:
+            start = period_to_start(period or self.default_period)
+
+        data = self.refresh(symbol, start=start)
+        self._stats['reads'] += 1
+
+        return self._slice(data, start, end)
+
+    @staticmethod
+    def _slice(data, start, end):
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index <= pd.Timestamp(end)]
+        return data
+
+    def get_history_many(self, symbols, start=None, end=None, period=None):
+        """
+        Histórico de vários tickers com um único download para os desatualizados.
+        Retorna ({symbol: DataFrame}, {symbol: erro}).
+        """
+        if start is None:
+            start = period_to_start(period or self.default_period)
+
+        symbols = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+        failures = self.refresh_many(symbols, start=start)
+
+        frames = {}
+        for symbol in symbols:
+            data = self._load(symbol)[1]
+            if data is None or data.empty:
+                failures.setdefault(symbol, 'Sem dados')
+                continue
+            data = self._slice(data, start, end)
+            if data.empty:
+                failures.setdefault(symbol, 'Sem dados no período')
+                continue
+            frames[symbol] = data
+            failures.pop(symbol, None)
+        self._stats['reads'] += len(frames)
+        return frames, failures
+
+    def get_close_matrix(self, symbols, start=None, end=None, period=None):
+        """
+        Fechamentos alinhados por data (datas × tickers) para vários tickers.
+        Cada fechamento é copiado uma única vez, direto para um bloco float64
+        pré-alocado (NaN onde o ticker não negociou).
+        """
+        frames, failures = self.get_history_many(symbols, start=start, end=end, period=period)
+        if not frames:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='Date')), failures
+
+        datas = pd.DatetimeIndex([], name='Date')
+        for data in frames.values():
+            datas = datas.union(data.index)
+
+        valores = np.full((len(datas), len(frames)), np.nan)
+        for coluna, data in enumerate(frames.values()):
+            valores[datas.get_indexer(data.index), coluna] = data['Close'].to_numpy(dtype='float64')
+
+        matrix = pd.DataFrame(valores, index=datas, columns=list(frames), copy=False)
+        return matrix, failures
+
+    def get_stats(self):
+        return {
+            **self._stats,
+            'tickers_armazenados': len([f for f in os.listdir(self.data_dir) if f.endswith('.npz')]),
+            'refresh_seconds': self.refresh_seconds,
+            'provider': type(self.provider).__name__
+        }
+
+
+def create_provider():
+    """Provedor configurado em Config.PRICE_PROVIDER"""
+    if Config.PRICE_PROVIDER == 'fixture':
+        return FixtureProvider(Config.PRICE_FIXTURE_DIR, latency=Config.PRICE_FIXTURE_LATENCY)
+    return YFinanceProvider()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Store de preços do processo"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore(
+                    create_provider(),
+                    Config.PRICE_STORE_DIR,
+                    refresh_seconds=Config.PRICE_STORE_REFRESH_SECONDS,
+                    overlap_bars=Config.PRICE_STORE_OVERLAP_BARS,
+                    tolerance=Config.PRICE_ADJUSTMENT_TOLERANCE
+                )
+    return _store
+
+
+def set_price_store(store):
+    """Troca o store do processo (testes com FixtureProvider)"""
+    global _store
+    _store = store
@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .config import Config
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Pool de processos do worker atual para cálculos CPU-bound (pares, backtests).
+    Usa 'spawn': os processos filhos não herdam threads nem o monkey-patch do gevent do worker.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.ANALYTICS_PROCESSES,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                _executor_pid = os.getpid()
+    return _executor
@@ -0,0 +1,274 @@
+"""
+Streaming de cotações por Server-Sent Events.
+
+Um único loop por processo atualiza, num download agrupado, só os tickers que
+têm algum assinante e envia a cada assinante apenas os campos que mudaram.
+O custo cresce com o número de tickers acompanhados, não com o número de
+clientes conectados.
+
+Com vários workers, o store de preços em disco é compartilhado: a cada volta só
+o worker que pega o flock de REFRESH_LOCK baixa, e só os tickers gravados há
+mais de um intervalo; os outros leem do store o que ele gravou. Os downloads
+crescem com os tickers, não com o número de workers.
+"""
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento): um worker só, sem eleição
+    fcntl = None
+from .config import Config
+from .price_store import get_price_store, normalize_symbol, period_to_start
+from .b3_calendar import is_pregao_aberto
+from .indicator_state import get_indicator_state_store
+
+QUOTE_FIELDS = ('current_price', 'change', 'change_percent', 'volume')
+
+# Arquivo (no diretório do store de preços) cujo flock elege o worker que baixa na volta
+REFRESH_LOCK = 'quote_stream.lock'
+
+
+def build_quote(symbol, data):
+    """Cotação atual a partir das últimas barras (mesmos campos de /api/stocks)"""
+    if data is None or data.empty:
+        return None
+    current_price = data['Close'].iloc[-1]
+    previous_price = data['Close'].iloc[-2] if len(data) > 1 else current_price
+    change = current_price - previous_price
+    return {
+        'symbol': symbol.replace('.SA', ''),
+        'current_price': round(float(current_price), 2),
+        'change': round(float(change), 2),
+        'change_percent': round(float(change / previous_price) * 100, 2),
+        'volume': int(data['Volume'].iloc[-1]),
+        'date': data.index[-1]
+    }
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscriber:
+    """Conexão de um cliente: fila limitada de eventos (cliente lento perde os mais antigos)"""
+
+    def __init__(self, symbols, max_queue=100):
+        self.symbols = frozenset(symbols)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.cliente = None
+
+    def push(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def events(self, heartbeat):
+        """Gera os eventos SSE; comentários de heartbeat mantêm a conexão e detectam clientes que saíram"""
+        while True:
+            try:
+                yield self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': ping\n\n'
+
+
+class QuoteHub:
+    """Assinaturas por ticker, última cotação conhecida e o loop de atualização"""
+
+    def __init__(self, interval, interval_fechado, max_clients, max_per_client=None, max_queue=100):
+        self.interval = interval
+        self.interval_fechado = interval_fechado
+        self.max_clients = max_clients
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._subscribers = {}  # symbol -> set(Subscriber)
+        self._clients = 0
+        self._por_cliente = {}  # usuário ou IP -> conexões abertas
+        self._quotes = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._stats = {'refreshes': 0, 'elected': 0, 'events_sent': 0, 'unchanged': 0, 'errors': 0,
+                       'rejected': 0, 'rejected_client': 0}
+
+    def subscribe(self, symbols, cliente=None):
+        """
+        Registra um cliente; retorna None se o limite de conexões do worker ou
+        o de `cliente` (usuário logado ou IP) foi atingido
+        """
+        symbols = [normalize_symbol(symbol) for symbol in symbols]
+        with self._lock:
+            if self._clients >= self.max_clients:
+                self._stats['rejected'] += 1
+                return None
+            if cliente is not None and self.max_per_client and self._por_cliente.get(cliente, 0) >= self.max_per_client:
+                self._stats['rejected_client'] += 1
+                return None
+            subscriber = Subscriber(symbols, self.max_queue)
+            subscriber.cliente = cliente
+            self._clients += 1
+            if cliente is not None:
+                self._por_cliente[cliente] = self._por_cliente.get(cliente, 0) + 1
+            novos = False
+            for symbol in subscriber.symbols:
+                novos = novos or symbol not in self._quotes
+                self._subscribers.setdefault(symbol, set()).add(subscriber)
+            snapshot = [self._public(self._quotes[s]) for s in subscriber.symbols if s in self._quotes]
+
+        if snapshot:
+            subscriber.push(format_event('snapshot', snapshot))
+        self._ensure_loop()
+        if novos:
+            self._wake.set()  # busca imediata dos tickers ainda sem cotação
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._clients -= 1
+            if subscriber.cliente is not None:
+                restantes = self._por_cliente.get(subscriber.cliente, 1) - 1
+                if restantes > 0:
+                    self._por_cliente[subscriber.cliente] = restantes
+                else:
+                    self._por_cliente.pop(subscriber.cliente, None)
+            for symbol in subscriber.symbols:
+                subs = self._subscribers.get(symbol)
+                if subs is not None:
+                    subs.discard(subscriber)
+                    if not subs:
+                        del self._subscribers[symbol]
+                        self._quotes.pop(symbol, None)
+
+    @staticmethod
+    def _public(quote):
+        return {k: v for k, v in quote.items() if k != 'date'}
+
+    def current_interval(self):
+        return self.interval if is_pregao_aberto() else self.interval_fechado
+
+    @staticmethod
+    def _baixar(store, symbols, start, max_age):
+        """
+        Download dos tickers com arquivo mais velho que `max_age`, só se este worker
+        pegar o flock (sem esperar): quem não pega lê o que o outro gravou.
+        Retorna True se este worker fez a checagem/download.
+        """
+        if fcntl is None:
+            store.refresh_many(symbols, start=start, max_age=max_age)
+            return True
+
+        with open(os.path.join(store.data_dir, REFRESH_LOCK), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                store.refresh_many(symbols, start=start, max_age=max_age)
+                return True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh_once(self):
+        """Atualiza os tickers assinados e distribui as diferenças"""
+        with self._lock:
+            symbols = list(self._subscribers)
+        if not symbols:
+            return 0
+
+        store = get_price_store()
+        start = period_to_start('5d')
+        if self._baixar(store, symbols, start, self.current_interval()):
+            self._stats['elected'] += 1
+        frames, _ = store.get_history_many(symbols, start=start)
+        self._stats['refreshes'] += 1
+
+        sent = 0
+        for symbol in symbols:
+            quote = build_quote(symbol, frames.get(symbol))
+            if quote is None:
+                continue
+
+            with self._lock:
+                previous = self._quotes.get(symbol, {})
+                changed = {k: quote[k] for k in QUOTE_FIELDS if previous.get(k) != quote[k]}
+                if not changed:
+                    self._stats['unchanged'] += 1
+                    continue
+                if symbol not in self._subscribers:
+                    continue
+                self._quotes[symbol] = quote
+                subscribers = list(self._subscribers[symbol])
+
+            # O estado incremental do RSL acompanha o preço em tempo real
+            get_indicator_state_store().apply_tick(symbol, quote['date'], quote['current_price'])
+
+            event = format_event('quote', {
+                'symbol': quote['symbol'],
+                **changed,
+                'last_update': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+            })
+            for subscriber in subscribers:
+                subscriber.push(event)
+            sent += len(subscribers)
+
+        self._stats['events_sent'] += sent
+        return sent
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh_once()
+            except Exception as e:
+                self._stats['errors'] += 1
+                print(f"⚠️ Erro no streaming de cotações: {e}")
+            self._wake.wait(self.current_interval())
+            self._wake.clear()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='quote-stream', daemon=True)
+                self._thread.start()
+
+    def get_info(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'clients': self._clients,
+                'max_per_client': self.max_per_client,
+                'symbols': sorted(s.replace('.SA', '') for s in self._subscribers),
+                'interval': self.current_interval()
+            }
+
+
+_hub = None
+_hub_pid = None
+_hub_lock = threading.Lock()
+
+
+def get_quote_hub():
+    """Hub do processo atual (o loop não sobrevive ao fork dos workers)"""
+    global _hub, _hub_pid
+    if _hub is None or _hub_pid != os.getpid():
+        with _hub_lock:
+            if _hub is None or _hub_pid != os.getpid():
+                _hub = QuoteHub(
+                    Config.QUOTE_STREAM_INTERVAL,
+                    Config.QUOTE_STREAM_INTERVAL_FECHADO,
+                    Config.QUOTE_STREAM_MAX_CLIENTS,
+                    Config.QUOTE_STREAM_MAX_PER_CLIENT
+                )
+                _hub_pid = os.getpid()
+    return _hub
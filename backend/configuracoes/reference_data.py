@@ -0,0 +1,250 @@
+"""
+Cache versionado de dados de referência (planos, lista de setores).
+
+São tabelas que mudam poucas vezes por ano: cada worker monta a resposta
+inteira uma vez, já serializada em JSON, com um ETag do conteúdo, e a serve
+da memória. Uma versão só é descartada quando os dados mudam:
+- triggers nas tabelas de origem (criados por migrations/dados_referencia_triggers.py,
+  nunca pelos workers) disparam NOTIFY no canal CANAL_NOTIFY e cada worker,
+  ouvindo com LISTEN, invalida o conjunto afetado;
+- invalidate() faz o mesmo a partir do app (e avisa os outros workers);
+- conjuntos com `fonte` (ex.: assinatura do índice do setor_b3) são remontados
+  quando ela muda;
+- como rede de segurança, Config.REFERENCE_DATA_MAX_AGE limita a idade de qualquer versão.
+
+O mesmo canal leva avisos '<prefixo>:<valor>' que não são conjuntos (ex.: sessões
+de um usuário invalidadas); cada worker os repassa ao handler registrado para o prefixo.
+"""
+import hashlib
+import json
+import os
+import select
+import threading
+import time
+from .config import Config
+from .database import get_local_db_connection, _create_raw_connection
+
+CANAL_NOTIFY = 'dados_referencia'
+
+# Tabela -> conjunto invalidado quando ela muda
+TABELAS_ORIGEM = {
+    'plans': 'plans',
+    'setor_b3': 'setores'
+}
+
+
+def nome_trigger(tabela):
+    return f'{CANAL_NOTIFY}_{tabela}'
+
+
+# Conjunto -> (loader, fonte); registrado na importação, vale para todos os workers
+DATASETS = {}
+
+
+def register_dataset(nome, loader, fonte=None):
+    """
+    `loader()` devolve o corpo da resposta (dict) ou None se não houver dados;
+    `fonte()`, opcional, devolve um identificador que muda junto com os dados.
+    """
+    DATASETS[nome] = (loader, fonte)
+
+
+# Prefixo -> handler(valor) dos avisos '<prefixo>:<valor>'; registrado na importação
+NOTIFY_HANDLERS = {}
+
+
+def register_notify_handler(prefixo, handler):
+    """`handler(valor)` roda em cada worker que ouve o canal, inclusive o que avisou"""
+    NOTIFY_HANDLERS[prefixo] = handler
+
+
+class ReferenceDataCache:
+    """Respostas prontas (bytes + ETag) de cada conjunto de dados de referência"""
+
+    def __init__(self, max_age, listen=True):
+        self.max_age = max_age
+        self.listen = listen
+
+        self._entries = {}    # nome -> versão montada
+        self._versoes = {}    # nome -> contador de versões
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'builds': 0, 'hits': 0, 'invalidations': 0, 'notifies': 0}
+        self._triggers_ausentes = None   # None = ainda não conferido
+
+    def _build(self, nome):
+        loader, fonte = DATASETS[nome]
+        versao_fonte = fonte() if fonte else None
+        dados = loader()
+        self._versoes[nome] = self._versoes.get(nome, 0) + 1
+
+        if dados is None:
+            body, etag = None, None
+        else:
+            body = json.dumps(dados, ensure_ascii=False, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+            etag = f'{nome}-{hashlib.md5(body).hexdigest()[:16]}'
+
+        self._stats['builds'] += 1
+        print(f"📚 Dados de referência '{nome}' montados (versão {self._versoes[nome]})")
+        return {
+            'body': body,
+            'etag': etag,
+            'versao': self._versoes[nome],
+            'fonte': versao_fonte,
+            'montado_em': time.time()
+        }
+
+    def _valida(self, nome, entry):
+        if entry is None or time.time() - entry['montado_em'] > self.max_age:
+            return False
+        _, fonte = DATASETS[nome]
+        return fonte is None or fonte() == entry['fonte']
+
+    def get(self, nome):
+        """Versão atual do conjunto: {'body', 'etag', 'versao', ...}; body None se não há dados"""
+        entry = self._entries.get(nome)
+        if self._valida(nome, entry):
+            self._stats['hits'] += 1
+            return entry
+        with self._lock:
+            entry = self._entries.get(nome)
+            if not self._valida(nome, entry):
+                entry = self._build(nome)
+                self._entries[nome] = entry
+            return entry
+
+    def invalidate(self, nome=None, notify=True):
+        """Descarta um conjunto (ou todos) neste worker e, com notify, nos demais"""
+        nomes = [nome] if nome else list(DATASETS)
+        for n in nomes:
+            self._entries.pop(n, None)
+        self._stats['invalidations'] += len(nomes)
+
+        if notify:
+            self.notify(*nomes)
+        return nomes
+
+    def notify(self, *payloads):
+        """Publica avisos no canal para todos os workers (efetivados no commit)"""
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        try:
+            for payload in payloads:
+                cursor.execute("SELECT pg_notify(%s, %s)", (CANAL_NOTIFY, payload))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _despachar(self, nome):
+        """Trata um aviso recebido pelo LISTEN"""
+        self._stats['notifies'] += 1
+        if nome in DATASETS:
+            self.invalidate(nome, notify=False)
+        if nome == 'setores':
+            from .setor_index import get_setor_index
+            get_setor_index().invalidate()
+
+        prefixo, _, valor = nome.partition(':')
+        if valor and prefixo in NOTIFY_HANDLERS:
+            try:
+                NOTIFY_HANDLERS[prefixo](valor)
+            except Exception as e:
+                print(f"⚠️ Erro ao tratar aviso '{nome}': {e}")
+
+    def _check_triggers(self, cursor):
+        """
+        Só confere os triggers (criados por migrations/dados_referencia_triggers.py);
+        sem eles nenhuma mudança no banco chega aqui e só o max_age renova os dados.
+        """
+        faltando = []
+        for tabela in TABELAS_ORIGEM:
+            cursor.execute(
+                "SELECT 1 FROM pg_trigger WHERE tgname = %s AND tgrelid = to_regclass(%s)",
+                (nome_trigger(tabela), tabela)
+            )
+            if not cursor.fetchone():
+                faltando.append(tabela)
+        self._triggers_ausentes = faltando
+        if faltando:
+            print(f"⚠️ Triggers de dados de referência ausentes em {', '.join(faltando)}: "
+                  f"rode migrations/dados_referencia_triggers.py")
+
+    def warm(self):
+        """Monta todos os conjuntos (na partida do worker, antes da primeira visita)"""
+        for nome in DATASETS:
+            try:
+                self.get(nome)
+            except Exception as e:
+                print(f"⚠️ Erro ao montar dados de referência '{nome}': {e}")
+
+    def _listen(self):
+        """LISTEN numa conexão própria (fora do pool: fica presa ao canal)"""
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = _create_raw_connection()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                self._check_triggers(cursor)
+                cursor.execute(f"LISTEN {CANAL_NOTIFY}")
+                # Avisos perdidos enquanto desconectado: recomeça do zero
+                self.invalidate(notify=False)
+                self.warm()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._despachar(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"⚠️ Erro ao ouvir {CANAL_NOTIFY}: {e}")
+                self._stop.wait(30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def start(self):
+        if self.listen and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name='reference-data-listen', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_info(self):
+        agora = time.time()
+        return {
+            **self._stats,
+            'conjuntos': {
+                nome: {
+                    'versao': entry['versao'],
+                    'etag': entry['etag'],
+                    'bytes': len(entry['body']) if entry['body'] else 0,
+                    'idade_segundos': round(agora - entry['montado_em'], 1)
+                }
+                for nome, entry in list(self._entries.items())
+            },
+            'max_age': self.max_age,
+            'ouvindo': bool(self._thread and self._thread.is_alive()),
+            'triggers_ausentes': self._triggers_ausentes
+        }
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_reference_data():
+    """Cache do processo atual; o LISTEN é (re)iniciado em cada worker após o fork"""
+    global _cache, _cache_pid
+    if _cache is None or _cache_pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache_pid != os.getpid():
+                _cache = ReferenceDataCache(Config.REFERENCE_DATA_MAX_AGE, Config.REFERENCE_DATA_LISTEN)
+                _cache_pid = os.getpid()
+    return _cache
@@ -0,0 +1,69 @@
+"""
+Barras agregadas e redução de pontos para gráficos.
+
+- resample_bars: barras diárias -> semanais ou mensais (OHLCV), datadas pelo
+  último pregão de cada período (nunca uma data futura).
+- lttb_indices / downsample: Largest-Triangle-Three-Buckets. Divide a série
+  em baldes e, de cada um, fica o ponto que forma o maior triângulo com o
+  ponto escolhido no balde anterior e a média do próximo. Mantém picos e vales
+  com um número fixo de pontos, qualquer que seja o tamanho do histórico.
+"""
+import numpy as np
+import pandas as pd
+
+# Intervalo pedido -> frequência de período do pandas (None: barras diárias como estão)
+INTERVALOS = {
+    '1d': None,
+    '1wk': 'W-FRI',
+    '1mo': 'M'
+}
+
+AGREGACAO = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def resample_bars(data, interval):
+    """Barras OHLCV no intervalo pedido"""
+    if interval not in INTERVALOS:
+        raise ValueError(f"Intervalo inválido: {interval} (use {', '.join(INTERVALOS)})")
+    freq = INTERVALOS[interval]
+    data = data.dropna(subset=['Close'])
+    if freq is None or data.empty:
+        return data
+
+    grupos = data.index.to_period(freq)
+    barras = data.groupby(grupos).agg(AGREGACAO)
+    barras.index = pd.DatetimeIndex(data.index.to_series().groupby(grupos).max().to_numpy(), name='Date')
+    return barras
+
+
+def lttb_indices(y, n):
+    """Posições dos `n` pontos escolhidos pelo LTTB (x = posição na série; sempre inclui o primeiro e o último)"""
+    tamanho = len(y)
+    if n >= tamanho:
+        return np.arange(tamanho)
+    if n < 3:
+        raise ValueError('LTTB precisa de ao menos 3 pontos')
+
+    y = np.asarray(y, dtype='float64')
+    x = np.arange(tamanho, dtype='float64')
+    # n - 2 baldes entre o primeiro e o último ponto; o "próximo" do último balde é o último ponto
+    bordas = np.append(np.linspace(1, tamanho - 1, n - 1).astype(np.int64), tamanho)
+
+    escolhidos = np.empty(n, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, tamanho - 1
+    a = 0
+    for i in range(n - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        prox_x = x[fim:bordas[i + 2]].mean()
+        prox_y = y[fim:bordas[i + 2]].mean()
+        areas = np.abs((x[a] - prox_x) * (y[inicio:fim] - y[a]) - (x[a] - x[inicio:fim]) * (prox_y - y[a]))
+        a = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = a
+    return escolhidos
+
+
+def downsample(data, max_points):
+    """No máximo `max_points` barras, escolhidas pelo LTTB sobre o fechamento"""
+    if len(data) <= max_points:
+        return data
+    return data.iloc[lttb_indices(data['Close'].to_numpy(), max_points)]
@@ -0,0 +1,89 @@
+"""
+Motor vetorizado de RSL e volatilidade para o universo inteiro de tickers.
+
+Recebe a matriz de fechamentos (datas × tickers, com NaN onde o ticker não negociou)
+e reproduz as fórmulas do MetaTrader de YFinanceService.calculate_rsl e
+calculate_volatilidade, coluna a coluna, em poucas passadas NumPy.
+"""
+import numpy as np
+import pandas as pd
+
+ANUALIZACAO = np.sqrt(252)
+MIN_PONTOS_VOLATILIDADE = 30
+
+
+def _compactar(values):
+    """
+    Empurra os valores válidos de cada coluna para o topo, mantendo a ordem.
+    Cada ticker passa a ser avaliado só sobre a própria série, como no cálculo individual.
+    """
+    valid = ~np.isnan(values)
+    order = np.argsort(~valid, axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
+
+
+def compute_universe(close_matrix, periodo_mm=30):
+    """
+    RSL, volatilidade anualizada, fechamento e média móvel atuais por ticker.
+    RSL = ((Close / MM) - 1) * 100 ; Vol = pct_change().std() * sqrt(252) * 100
+    Tickers sem dados suficientes ficam com NaN (o cálculo individual devolveria None).
+    """
+    values = close_matrix.to_numpy(dtype='float64')
+    compact, counts = _compactar(values)
+    n_cols = compact.shape[1]
+    cols = np.arange(n_cols)
+
+    last_idx = np.maximum(counts - 1, 0)
+    close_atual = np.where(counts > 0, compact[last_idx, cols], np.nan)
+
+    # Média das últimas `periodo_mm` barras de cada coluna via soma acumulada
+    cumsum = np.vstack([np.zeros(n_cols), np.nancumsum(compact, axis=0)])
+    inicio = np.maximum(counts - periodo_mm, 0)
+    mm = (cumsum[counts, cols] - cumsum[inicio, cols]) / periodo_mm
+    mm = np.where(counts >= periodo_mm, mm, np.nan)
+    rsl = ((close_atual / mm) - 1) * 100
+
+    # Retornos percentuais e desvio padrão amostral (ddof=1), ignorando o padding NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = compact[1:] / compact[:-1] - 1
+        n_ret = np.sum(~np.isnan(returns), axis=0)
+        mean = np.nansum(returns, axis=0) / n_ret
+        var = np.nansum((returns - mean) ** 2, axis=0) / (n_ret - 1)
+        vol = np.sqrt(var) * ANUALIZACAO * 100
+    vol = np.where((counts >= MIN_PONTOS_VOLATILIDADE) & np.isfinite(vol), vol, np.nan)
+
+    return pd.DataFrame({
+        'rsl': rsl,
+        'volatilidade': vol,
+        'close_atual': close_atual,
+        'mm': mm,
+        'pontos_dados': counts
+    }, index=close_matrix.columns)
+
+
+def sector_aggregates(universe, setores, limit=10):
+    """
+    Médias por setor como no cálculo original do RSL setorial: média dos valores
+    individuais já arredondados, considerando só os primeiros `limit` tickers de cada setor.
+    `setores` é {setor: [tickers]} (pertinência vinda do setor_b3).
+    """
+    rsl_round = universe['rsl'].round(2)
+    vol_round = universe['volatilidade'].round(2)
+    validos = universe['rsl'].notna() & universe['volatilidade'].notna()
+
+    resultados = {}
+    for setor, tickers in setores.items():
+        membros = [t for t in tickers[:limit] if t in universe.index]
+        com_dados = [t for t in membros if validos[t]]
+        if not com_dados:
+            continue
+        resultados[setor] = {
+            'rsl': round(float(np.mean(rsl_round[com_dados].to_numpy())), 2),
+            'volatilidade': round(float(np.mean(vol_round[com_dados].to_numpy())), 2),
+            'empresas_com_dados': len(com_dados),
+            'total_empresas': len(tickers),
+            'taxa_sucesso': round((len(com_dados) / len(tickers)) * 100, 1),
+            'tickers': com_dados
+        }
+    return resultados
+
@@ -0,0 +1,323 @@
+"""
+Snapshots versionados do RSL setorial.
+
+Um agendador em segundo plano recalcula todos os setores na cadência de
+Config.RSL_SNAPSHOT_INTERVAL durante o pregão (e bem mais espaçado fora dele)
+e grava cada resultado como uma nova versão em rsl_snapshots (criada por
+migrations/rsl_snapshots.py). As rotas só leem a última versão já
+materializada, sem esperar pelo provedor de dados.
+Com vários workers, um advisory lock do Postgres garante que só um calcula.
+"""
+import json
+import os
+import threading
+import time
+import numpy as np
+from .config import Config
+from .database import get_local_db_connection, _create_raw_connection
+from .b3_calendar import is_pregao_aberto
+from .yfinance_service import YFinanceService
+
+# Chave do pg_try_advisory_lock que elege o worker que calcula os snapshots
+SNAPSHOT_LOCK_KEY = 7_512_001
+
+
+class RSLSnapshotService:
+    """Agendador que materializa o RSL de todos os setores e mantém a última versão em memória"""
+
+    def __init__(self, interval, interval_fechado, poll_seconds, keep, period='1y', periodo_mm=30):
+        self.interval = interval
+        self.interval_fechado = interval_fechado
+        self.poll_seconds = poll_seconds
+        self.keep = keep
+        self.period = period
+        self.periodo_mm = periodo_mm
+
+        self._latest = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'computed': 0, 'not_leader': 0, 'still_fresh': 0, 'loads': 0, 'errors': 0}
+
+    @staticmethod
+    def _load_setores(cursor):
+        cursor.execute("""
+            SELECT setor_economico, ticker FROM setor_b3
+            WHERE setor_economico IS NOT NULL
+            ORDER BY setor_economico, acao
+        """)
+        setores = {}
+        for setor, ticker in cursor.fetchall():
+            setores.setdefault(setor, []).append(ticker)
+        return setores
+
+    def current_interval(self):
+        """Cadência de recálculo: curta no pregão, longa com o mercado fechado"""
+        return self.interval if is_pregao_aberto() else self.interval_fechado
+
+    def _idade_e_setores(self, carregar_setores):
+        """Idade da última versão e, se pedido, a lista de setores, numa transação curta"""
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT EXTRACT(EPOCH FROM NOW() - MAX(criado_em)) FROM rsl_snapshots
+                WHERE period = %s AND periodo_mm = %s
+            """, (self.period, self.periodo_mm))
+            idade = cursor.fetchone()[0]
+            setores = self._load_setores(cursor) if carregar_setores else None
+            conn.commit()
+            return idade, setores
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _fresh(self, idade):
+        return idade is not None and idade < self.current_interval()
+
+    def _gravar(self, resultados, execucao):
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO rsl_snapshots (period, periodo_mm, setores, execucao)
+                VALUES (%s, %s, %s, %s)
+                RETURNING versao
+            """, (self.period, self.periodo_mm, json.dumps(resultados), json.dumps(execucao)))
+            versao = cursor.fetchone()[0]
+
+            # Manter só as últimas versões
+            cursor.execute("""
+                DELETE FROM rsl_snapshots WHERE versao IN (
+                    SELECT versao FROM rsl_snapshots
+                    WHERE period = %s AND periodo_mm = %s
+                    ORDER BY versao DESC OFFSET %s
+                )
+            """, (self.period, self.periodo_mm, self.keep))
+            conn.commit()
+            return versao
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def run_once(self, force=False):
+        """
+        Calcula e grava uma nova versão se este processo for o líder e a última
+        estiver vencida. Retorna o número da versão criada ou None.
+
+        O advisory lock fica numa conexão própria em autocommit (fora do pool, que
+        devolveria a conexão com o lock preso): enquanto o cálculo roda, nenhuma
+        transação fica aberta e nenhuma conexão do pool fica emprestada. Leitura e
+        gravação usam transações curtas, antes e depois do cálculo.
+        """
+        # Checagem barata sem o lock: na maior parte das voltas a versão ainda vale
+        if not force:
+            idade, _ = self._idade_e_setores(False)
+            if self._fresh(idade):
+                self._count('still_fresh')
+                return None
+
+        lock_conn = _create_raw_connection()
+        try:
+            lock_conn.autocommit = True
+            lock_cursor = lock_conn.cursor()
+            lock_cursor.execute("SELECT pg_try_advisory_lock(%s)", (SNAPSHOT_LOCK_KEY,))
+            if not lock_cursor.fetchone()[0]:
+                self._count('not_leader')
+                return None
+
+            try:
+                # Outro líder pode ter gravado entre a checagem e o lock
+                idade, setores = self._idade_e_setores(True)
+                if not force and self._fresh(idade):
+                    self._count('still_fresh')
+                    return None
+                if not setores:
+                    return None
+
+                resultados, execucao = YFinanceService.get_all_sectors_rsl_data(
+                    setores, self.period, self.periodo_mm
+                )
+                execucao['total_setores'] = len(setores)
+
+                versao = self._gravar(resultados, execucao)
+                self._count('computed')
+                print(f"📸 Snapshot RSL v{versao}: {len(resultados)}/{len(setores)} setores")
+                return versao
+            finally:
+                lock_cursor.execute("SELECT pg_advisory_unlock(%s)", (SNAPSHOT_LOCK_KEY,))
+        finally:
+            lock_conn.close()
+
+    def load_latest(self):
+        """Traz a última versão do banco para a memória (só lê o payload se houver versão nova)"""
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT MAX(versao) FROM rsl_snapshots WHERE period = %s AND periodo_mm = %s
+            """, (self.period, self.periodo_mm))
+            versao = cursor.fetchone()[0]
+            if versao is None or (self._latest and self._latest['versao'] == versao):
+                conn.commit()
+                return self._latest
+
+            cursor.execute("""
+                SELECT versao, criado_em, setores, execucao, EXTRACT(EPOCH FROM NOW() - criado_em)
+                FROM rsl_snapshots WHERE versao = %s
+            """, (versao,))
+            row = cursor.fetchone()
+            conn.commit()
+            if row is None:
+                return self._latest
+
+            snapshot = {
+                'versao': row[0],
+                'criado_em_ts': time.time() - float(row[4]),
+                'data_calculo': row[1].strftime('%d/%m/%Y %H:%M'),
+                'setores': row[2],
+                'execucao': row[3]
+            }
+            with self._lock:
+                self._latest = snapshot
+            self._count('loads')
+            return snapshot
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_latest(self):
+        """Última versão em memória; na primeira chamada do processo, lê do banco (nunca calcula)"""
+        if self._latest is None:
+            try:
+                self.load_latest()
+            except Exception as e:
+                print(f"⚠️ Erro ao carregar snapshot RSL: {e}")
+        return self._latest
+
+    def find_setor(self, setor_nome, nomes=None):
+        """
+        Resultado do setor no snapshot, como o antigo `setor_economico ILIKE '%nome%'`:
+        um nome exato devolve o próprio setor; senão todos os setores que contêm o
+        trecho (ou os `nomes` já resolvidos pelo índice do setor_b3) entram juntos
+        numa média só, via agregar_setores.
+        """
+        snapshot = self.get_latest()
+        if snapshot is None:
+            return None, None
+
+        setores = snapshot['setores']
+        por_nome = {setor.casefold(): setor for setor in setores}
+        nome = setor_nome.strip().casefold()
+        if nome in por_nome:
+            return snapshot, setores[por_nome[nome]]
+
+        if nomes:
+            encontrados = [por_nome[n.casefold()] for n in nomes if n.casefold() in por_nome]
+        else:
+            encontrados = sorted(setor for setor in setores if nome in setor.casefold())
+        if len(encontrados) == 1:
+            return snapshot, setores[encontrados[0]]
+        return snapshot, agregar_setores(setor_nome, [setores[s] for s in encontrados])
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.load_latest()
+            except Exception as e:
+                self._count('errors')
+                print(f"⚠️ Erro no agendador de snapshots RSL: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rsl-snapshot', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_info(self):
+        snapshot = self._latest
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'versao': snapshot['versao'] if snapshot else None,
+            'data_calculo': snapshot['data_calculo'] if snapshot else None,
+            'idade_segundos': snapshot_age(snapshot),
+            'setores': len(snapshot['setores']) if snapshot else 0,
+            'intervalo_atual': self.current_interval(),
+            'agendador_ativo': bool(self._thread and self._thread.is_alive())
+        }
+
+
+def agregar_setores(setor_nome, resultados, limit=10):
+    """
+    Média de vários setores do snapshot como um só, no formato dos resultados
+    de setor do snapshot: empresas de todos eles (sem repetir),
+    limitadas às `limit` primeiras como no cálculo por setor.
+    """
+    if not resultados:
+        return None
+
+    empresas = {}
+    for resultado in resultados:
+        for empresa in resultado['detalhes_empresas']:
+            empresas.setdefault(empresa['symbol'], empresa)
+    detalhes = list(empresas.values())[:limit]
+    if not detalhes:
+        return None
+
+    total = sum(resultado['total_empresas'] for resultado in resultados)
+    return {
+        'setor': setor_nome,
+        'setores': [resultado['setor'] for resultado in resultados],
+        'rsl': round(float(np.mean([e['rsl'] for e in detalhes])), 2),
+        'volatilidade': round(float(np.mean([e['volatilidade'] for e in detalhes])), 2),
+        'empresas_com_dados': len(detalhes),
+        'total_empresas': total,
+        'taxa_sucesso': round((len(detalhes) / total) * 100, 1),
+        'detalhes_empresas': detalhes,
+        'has_real_data': True,
+        'data_calculo': resultados[0]['data_calculo']
+    }
+
+
+def snapshot_age(snapshot):
+    """Idade do snapshot em segundos (medida pelo relógio do banco ao carregar)"""
+    if snapshot is None:
+        return None
+    return round(time.time() - snapshot['criado_em_ts'], 1)
+
+
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def get_rsl_snapshot_service():
+    """Serviço do processo atual; o agendador é (re)iniciado em cada worker após o fork"""
+    global _service, _service_pid
+    if _service is None or _service_pid != os.getpid():
+        with _service_lock:
+            if _service is None or _service_pid != os.getpid():
+                _service = RSLSnapshotService(
+                    Config.RSL_SNAPSHOT_INTERVAL,
+                    Config.RSL_SNAPSHOT_INTERVAL_FECHADO,
+                    Config.RSL_SNAPSHOT_POLL_SECONDS,
+                    Config.RSL_SNAPSHOT_KEEP
+                )
+                _service_pid = os.getpid()
+                if Config.RSL_SNAPSHOT_ENABLED:
+                    _service.start()
+    return _service
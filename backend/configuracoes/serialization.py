@@ -0,0 +1,109 @@
+"""
+Serialização das respostas com séries de preço (gráficos).
+
+Os dados de gráfico ficam em colunas (datas, preços e volumes como arrays
+paralelos do NumPy) e são convertidos só na saída:
+- layout 'linhas' (padrão, formato antigo): uma lista de dicts em chart_data;
+- layout 'colunas' (?layout=colunas): os arrays direto na resposta.
+O JSON sai pelo orjson quando instalado, que lê os arrays do NumPy sem passar
+por objetos Python; sem ele, pelo json da biblioteca padrão. Com
+`Accept: application/msgpack` a resposta vai em msgpack (sempre em colunas),
+se o pacote msgpack estiver instalado.
+"""
+import json
+import numpy as np
+from .instrumentation import span
+
+MIMETYPE_JSON = 'application/json'
+MIMETYPES_MSGPACK = ('application/msgpack', 'application/x-msgpack')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def chart_columns(data, points=30, formato_data='%d/%m'):
+    """Últimas `points` barras (todas, com None) em colunas: {'dates', 'prices', 'volumes'}"""
+    tail = data.tail(points) if points is not None else data
+    volumes = np.nan_to_num(tail['Volume'].to_numpy(dtype='float64'), nan=0.0)
+    return {
+        'dates': tail.index.strftime(formato_data).tolist(),
+        'prices': np.round(tail['Close'].to_numpy(dtype='float64'), 2),
+        'volumes': np.maximum(volumes, 0).astype(np.int64)
+    }
+
+
+def chart_rows(colunas):
+    """Colunas do gráfico no formato antigo: [{'date', 'price', 'volume'}, ...]"""
+    return [
+        {'date': date, 'price': price, 'volume': volume}
+        for date, price, volume in zip(colunas['dates'], colunas['prices'].tolist(), colunas['volumes'].tolist())
+    ]
+
+
+def render_chart(payload, colunar):
+    """Troca as colunas de `payload['chart']` pelo layout pedido ('chart' em colunas ou 'chart_data' em linhas)"""
+    colunas = payload.pop('chart', None)
+    if colunas is None:
+        return payload  # payload montado antes das colunas (ex.: entrada antiga no cache)
+    if colunar:
+        payload['chart'] = colunas
+    else:
+        payload['chart_data'] = chart_rows(colunas)
+    return payload
+
+
+def _para_python(obj):
+    """Conversões que o json/msgpack não fazem sozinhos (arrays com NaN viram null)"""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f':
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)  # Decimal, datas
+
+
+def _limpar(obj):
+    """Cópia só com tipos nativos (para o msgpack, que não aceita default para floats NaN)"""
+    if isinstance(obj, dict):
+        return {k: _limpar(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_limpar(v) for v in obj]
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _para_python(obj)
+    return obj
+
+
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_para_python, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_para_python, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_msgpack(obj):
+    return msgpack.packb(_limpar(obj), default=_para_python, use_bin_type=True)
+
+
+def negotiate(accept_mimetypes):
+    """Mimetype da resposta a partir do Accept (JSON se msgpack não foi pedido ou não está instalado)"""
+    if msgpack is None:
+        return MIMETYPE_JSON
+    return accept_mimetypes.best_match((MIMETYPE_JSON,) + MIMETYPES_MSGPACK, default=MIMETYPE_JSON)
+
+
+def encode(obj, mimetype):
+    """(bytes, mimetype) do corpo da resposta"""
+    if mimetype in MIMETYPES_MSGPACK:
+        with span('serializacao', 'msgpack'):
+            return dumps_msgpack(obj), mimetype
+    with span('serializacao', 'json'):
+        return dumps_json(obj), MIMETYPE_JSON
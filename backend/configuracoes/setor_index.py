@@ -0,0 +1,296 @@
+"""
+Índice em memória da tabela setor_b3.
+
+A tabela é pequena e quase nunca muda: cada processo a carrega inteira uma vez
+e responde as buscas de setor e de empresa por dicionários, sem ir ao banco.
+A cada Config.SETOR_INDEX_CHECK_SECONDS uma consulta barata (md5 das linhas)
+diz se a tabela mudou; só então o índice é recarregado.
+
+Busca de setores (nomes comparados sem acento e sem diferença de maiúsculas):
+- exato:   nome igual
+- prefixo: nome (ou uma das palavras dele) começa pelo texto
+- trecho:  texto contido no nome (o antigo ILIKE '%...%')
+- trigram: similaridade de trigramas, como o pg_trgm, acima de Config.SETOR_INDEX_MIN_SIMILARITY
+- auto:    exato, depois prefixo, trecho e trigram, parando no primeiro que encontrar
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from .config import Config
+from .database import get_local_db_connection
+
+MODOS_BUSCA = ('auto', 'exato', 'prefixo', 'trecho', 'trigram')
+
+COLUNAS = ('id', 'setor_economico', 'setor', 'setor_puro', 'segmento', 'acao', 'ticker', 'nivel_na_bolsa', 'tipo')
+
+
+def normalizar(texto):
+    """Sem acentos, minúsculo e sem espaços nas pontas"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold().strip()
+
+
+def trigramas(texto):
+    """Trigramas de cada palavra com dois espaços antes e um depois, como no pg_trgm"""
+    grams = set()
+    for palavra in re.findall(r'\w+', normalizar(texto)):
+        palavra = f'  {palavra} '
+        grams.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return grams
+
+
+def empresa_resumo(empresa):
+    """Campos de /api/setor/<setor_nome>"""
+    return {
+        'empresa': empresa['empresa'],
+        'ticker': empresa['ticker'],
+        'setor_economico': empresa['setor_economico'],
+        'nivel_bolsa': empresa['nivel_bolsa'],
+        'tipo_governanca': empresa['tipo_governanca']
+    }
+
+
+class SetorIndex:
+    """setor_b3 inteiro em memória, indexado por ticker, por setor e por trigramas do nome do setor"""
+
+    def __init__(self, check_seconds, min_similarity):
+        self.check_seconds = check_seconds
+        self.min_similarity = min_similarity
+
+        self._empresas = {}       # ticker -> empresa (formato de /api/empresa/<ticker>)
+        self._setores = {}        # nome normalizado -> (nome original, [empresas por nome])
+        self._trigramas = {}      # trigrama -> {nome normalizado}
+        self._trigramas_setor = {}
+        self._assinatura = None
+        self._tabela_existe = None
+        self._carregado_em = None
+        self._checado_em = 0.0
+
+        self._lock = threading.Lock()
+        self._stats = {'loads': 0, 'checks': 0, 'lookups': 0}
+
+    @staticmethod
+    def _assinatura_tabela(cursor):
+        """md5 de todas as linhas: muda com qualquer insert, update ou delete"""
+        cursor.execute("SELECT to_regclass('setor_b3') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute("SELECT COUNT(*), md5(string_agg(s::text, '|' ORDER BY s.id)) FROM setor_b3 s")
+        total, digest = cursor.fetchone()
+        return f'{total}:{digest}'
+
+    def _carregar(self, cursor, assinatura):
+        cursor.execute(f"SELECT {', '.join(COLUNAS)} FROM setor_b3 ORDER BY acao, ticker")
+        empresas = {}
+        setores = {}
+        for row in cursor.fetchall():
+            linha = dict(zip(COLUNAS, row))
+            empresa = {
+                'id': linha['id'],
+                'setor_economico': linha['setor_economico'],
+                'setor': linha['setor'],
+                'setor_puro': linha['setor_puro'],
+                'segmento': linha['segmento'],
+                'empresa': linha['acao'],
+                'ticker': linha['ticker'],
+                'nivel_bolsa': linha['nivel_na_bolsa'],
+                'tipo_governanca': linha['tipo']
+            }
+            if linha['ticker']:
+                empresas[linha['ticker'].upper()] = empresa
+            if linha['setor_economico']:
+                chave = normalizar(linha['setor_economico'])
+                setores.setdefault(chave, (linha['setor_economico'], []))[1].append(empresa)
+
+        indice = {}
+        trigramas_setor = {}
+        for chave in setores:
+            trigramas_setor[chave] = trigramas(chave)
+            for gram in trigramas_setor[chave]:
+                indice.setdefault(gram, set()).add(chave)
+
+        # Troca tudo de uma vez: leitores nunca veem um índice pela metade
+        self._empresas, self._setores = empresas, setores
+        self._trigramas, self._trigramas_setor = indice, trigramas_setor
+        self._assinatura = assinatura
+        self._carregado_em = time.time()
+        self._stats['loads'] += 1
+        print(f"📇 Índice setor_b3 carregado: {len(empresas)} empresas em {len(setores)} setores")
+
+    def refresh(self, force=False):
+        """Recarrega se a tabela mudou desde a última carga (ou sempre, com force)"""
+        conn = get_local_db_connection()
+        cursor = conn.cursor()
+        try:
+            assinatura = self._assinatura_tabela(cursor)
+            self._tabela_existe = assinatura is not None
+            self._stats['checks'] += 1
+            if assinatura is None:
+                self._empresas, self._setores, self._trigramas, self._trigramas_setor = {}, {}, {}, {}
+                self._assinatura = None
+            elif force or assinatura != self._assinatura:
+                self._carregar(cursor, assinatura)
+            self._checado_em = time.monotonic()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def ensure_fresh(self):
+        """
+        Primeira chamada carrega (bloqueando); depois, no máximo uma checagem por
+        intervalo, feita por uma única thread enquanto as outras usam o índice atual.
+        """
+        if self._tabela_existe is None:
+            with self._lock:
+                if self._tabela_existe is None:
+                    self.refresh()
+            return
+        if time.monotonic() - self._checado_em < self.check_seconds:
+            return
+        if self._lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._checado_em = time.monotonic()  # tenta de novo no próximo intervalo
+                print(f"⚠️ Erro ao checar o índice setor_b3: {e}")
+            finally:
+                self._lock.release()
+
+    def invalidate(self):
+        """Força a checagem da tabela no próximo acesso"""
+        self._checado_em = 0.0
+
+    @property
+    def versao(self):
+        """Assinatura da tabela na última carga (muda quando o índice é recarregado)"""
+        self.ensure_fresh()
+        return self._assinatura
+
+    def resumo_setores(self):
+        """Setores com a quantidade de empresas, dos maiores para os menores"""
+        self.ensure_fresh()
+        resumo = [
+            {'setor_economico': nome, 'total_empresas': len(empresas)}
+            for nome, empresas in self._setores.values()
+        ]
+        return sorted(resumo, key=lambda s: -s['total_empresas'])
+
+    @property
+    def tabela_existe(self):
+        self.ensure_fresh()
+        return self._tabela_existe
+
+    def buscar_setores(self, nome, modo='auto'):
+        """Nomes dos setores encontrados, do mais ao menos relevante"""
+        if modo not in MODOS_BUSCA:
+            raise ValueError(f"Modo de busca inválido: {modo} (use {', '.join(MODOS_BUSCA)})")
+        self.ensure_fresh()
+        self._stats['lookups'] += 1
+
+        setores = self._setores
+        texto = normalizar(nome)
+        if not texto:
+            return []
+
+        etapas = ('exato', 'prefixo', 'trecho', 'trigram') if modo == 'auto' else (modo,)
+        for etapa in etapas:
+            if etapa == 'exato':
+                chaves = [texto] if texto in setores else []
+            elif etapa == 'prefixo':
+                chaves = sorted(
+                    c for c in setores
+                    if c.startswith(texto) or any(palavra.startswith(texto) for palavra in c.split())
+                )
+            elif etapa == 'trecho':
+                chaves = sorted(c for c in setores if texto in c)
+            else:
+                chaves = self._similares(texto)
+            if chaves:
+                return [setores[c][0] for c in chaves]
+        return []
+
+    def _similares(self, texto):
+        """Setores com similaridade de trigramas (|A ∩ B| / |A ∪ B|) acima do mínimo, mais parecidos primeiro"""
+        grams = trigramas(texto)
+        if not grams:
+            return []
+        candidatos = set()
+        for gram in grams:
+            candidatos |= self._trigramas.get(gram, set())
+
+        pontuados = []
+        for chave in candidatos:
+            outros = self._trigramas_setor[chave]
+            similaridade = len(grams & outros) / len(grams | outros)
+            if similaridade >= self.min_similarity:
+                pontuados.append((-similaridade, chave))
+        return [chave for _, chave in sorted(pontuados)]
+
+    def empresas_do_setor(self, setor_nome):
+        """Empresas de um setor pelo nome exato retornado em buscar_setores"""
+        self.ensure_fresh()
+        encontrado = self._setores.get(normalizar(setor_nome))
+        return list(encontrado[1]) if encontrado else []
+
+    def buscar_empresas(self, nome, modo='auto'):
+        """(setores encontrados, empresas de todos eles ordenadas pelo nome)"""
+        setores = self.buscar_setores(nome, modo)
+        empresas = [empresa for setor in setores for empresa in self.empresas_do_setor(setor)]
+        return setores, sorted(empresas, key=lambda e: ((e['empresa'] or '').casefold(), e['ticker']))
+
+    def tickers_do_setor(self, nome, modo='auto'):
+        _, empresas = self.buscar_empresas(nome, modo)
+        return [empresa['ticker'] for empresa in empresas]
+
+    def todos_tickers(self):
+        """Tickers de todo o setor_b3, na ordem do nome da empresa"""
+        self.ensure_fresh()
+        return [empresa['ticker'] for empresa in self._empresas.values()]
+
+    def empresa(self, ticker):
+        self.ensure_fresh()
+        self._stats['lookups'] += 1
+        return self._empresas.get((ticker or '').strip().upper())
+
+    def empresas(self, tickers):
+        """Várias empresas de uma vez: ({ticker: empresa}, tickers não encontrados)"""
+        self.ensure_fresh()
+        self._stats['lookups'] += 1
+        encontradas, faltando = {}, []
+        for ticker in tickers:
+            empresa = self._empresas.get(ticker.strip().upper())
+            if empresa:
+                encontradas[empresa['ticker']] = empresa
+            else:
+                faltando.append(ticker)
+        return encontradas, faltando
+
+    def get_info(self):
+        return {
+            **self._stats,
+            'empresas': len(self._empresas),
+            'setores': len(self._setores),
+            'trigramas': len(self._trigramas),
+            'tabela_existe': self._tabela_existe,
+            'carregado_em': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._carregado_em))
+            if self._carregado_em else None,
+            'intervalo_checagem': self.check_seconds
+        }
+
+
+_index = None
+_index_pid = None
+_index_lock = threading.Lock()
+
+
+def get_setor_index():
+    """Índice do processo atual (carregado no primeiro uso de cada worker)"""
+    global _index, _index_pid
+    if _index is None or _index_pid != os.getpid():
+        with _index_lock:
+            if _index is None or _index_pid != os.getpid():
+                _index = SetorIndex(Config.SETOR_INDEX_CHECK_SECONDS, Config.SETOR_INDEX_MIN_SIMILARITY)
+                _index_pid = os.getpid()
+    return _index
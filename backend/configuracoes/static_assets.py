@@ -0,0 +1,179 @@
+"""
+Páginas do frontend servidas da memória, já comprimidas.
+
+Na primeira requisição que o pede, cada arquivo é lido uma vez, ganha um hash
+do conteúdo e variantes gzip e brotli no nível máximo de compressão. As
+variantes ficam gravadas em Config.STATIC_BUILD_DIR como <arquivo>.<hash>.gz/.br:
+só um conteúdo novo é comprimido de novo (o brotli no nível máximo é lento), e
+comprimir_estaticos.py faz isso antes do deploy para nenhuma requisição pagar
+por ela. Cada requisição só escolhe a variante pelo Accept-Encoding.
+
+- Rotas das páginas (/planos, /planos.html...): ETag do hash e max-age curto
+  com stale-while-revalidate (a URL é fixa, então a página precisa revalidar).
+- /assets/<hash>/<arquivo>: URL com o hash do conteúdo, cacheável para sempre
+  (immutable); um hash antigo redireciona para o atual.
+Um arquivo alterado em disco (mtime diferente) é reprocessado no próximo acesso.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import Response, redirect, abort
+from .config import Config
+from .compression import comprimir, codificacoes_disponiveis, escolher_codificacao
+
+EXTENSOES = ('.html', '.css', '.js', '.svg', '.json')
+SUFIXOS = {'br': 'br', 'gzip': 'gz'}
+
+
+class StaticAssets:
+    """Arquivos de um diretório em memória: original, variantes comprimidas e hash do conteúdo"""
+
+    def __init__(self, directory, build_dir):
+        self.directory = directory
+        self.build_dir = build_dir
+        self._assets = {}
+        self._lock = threading.Lock()
+        self._stats = {'respostas': 0, 'nao_modificado': 0, 'recarregados': 0}
+
+    def _build(self, nome, mtime):
+        with open(os.path.join(self.directory, nome), 'rb') as f:
+            dados = f.read()
+        hash_conteudo = hashlib.sha256(dados).hexdigest()[:12]
+
+        variantes = {None: dados}
+        for codificacao in codificacoes_disponiveis():
+            comprimido = self._variante(nome, hash_conteudo, dados, codificacao)
+            if len(comprimido) < len(dados):
+                variantes[codificacao] = comprimido
+        return {
+            'hash': hash_conteudo,
+            'mtime': mtime,
+            'mimetype': mimetypes.guess_type(nome)[0] or 'application/octet-stream',
+            'variantes': variantes
+        }
+
+    def _variante(self, nome, hash_conteudo, dados, codificacao):
+        """Variante comprimida gravada no diretório de build (comprime só se ainda não existe)"""
+        path = os.path.join(self.build_dir, f'{nome}.{hash_conteudo}.{SUFIXOS[codificacao]}')
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            pass
+
+        comprimido = comprimir(dados, codificacao, estatico=True)
+        try:
+            os.makedirs(self.build_dir, exist_ok=True)
+            # Variantes de versões anteriores do arquivo
+            for antigo in os.listdir(self.build_dir):
+                if antigo.startswith(f'{nome}.') and antigo.endswith(f'.{SUFIXOS[codificacao]}'):
+                    os.remove(os.path.join(self.build_dir, antigo))
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(comprimido)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar {path}: {e}")
+        return comprimido
+
+    def _nomes(self):
+        return [nome for nome in sorted(os.listdir(self.directory)) if nome.endswith(EXTENSOES)]
+
+    def build_all(self):
+        """Processa todos os arquivos servíveis do diretório"""
+        for nome in self._nomes():
+            self.get(nome)
+        total = sum(len(a['variantes'][None]) for a in self._assets.values())
+        comprimido = sum(min(len(v) for v in a['variantes'].values()) for a in self._assets.values())
+        print(f"🗜️ {len(self._assets)} arquivos estáticos pré-comprimidos: {total // 1024} KB -> {comprimido // 1024} KB")
+
+    def get(self, nome):
+        """Asset atual do arquivo (None se não existe)"""
+        if os.path.basename(nome) != nome or not nome.endswith(EXTENSOES):
+            return None
+        try:
+            mtime = os.path.getmtime(os.path.join(self.directory, nome))
+        except OSError:
+            return None
+
+        asset = self._assets.get(nome)
+        if asset is None or asset['mtime'] != mtime:
+            with self._lock:
+                asset = self._assets.get(nome)
+                if asset is None or asset['mtime'] != mtime:
+                    if asset is not None:
+                        self._stats['recarregados'] += 1
+                    asset = self._build(nome, mtime)
+                    self._assets[nome] = asset
+        return asset
+
+    def url(self, nome):
+        """URL com hash do conteúdo (para cache immutable)"""
+        asset = self.get(nome)
+        return f"/assets/{asset['hash']}/{nome}" if asset else None
+
+    def manifest(self):
+        return {nome: self.url(nome) for nome in self._nomes()}
+
+    def response(self, nome, request, imutavel=False):
+        """Resposta com a variante aceita pelo cliente; 304 se o ETag do cliente é o atual"""
+        asset = self.get(nome)
+        if asset is None:
+            abort(404)
+
+        codificacao = escolher_codificacao(request.accept_encodings)
+        if codificacao not in asset['variantes']:
+            codificacao = None
+
+        response = Response(asset['variantes'][codificacao], mimetype=asset['mimetype'])
+        if codificacao:
+            response.headers['Content-Encoding'] = codificacao
+        response.vary.add('Accept-Encoding')
+        # Mesmo conteúdo em qualquer codificação: ETag fraco
+        response.set_etag(asset['hash'], weak=True)
+        if imutavel:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = (
+                f'public, max-age={Config.STATIC_MAX_AGE}, stale-while-revalidate={Config.STATIC_STALE_WHILE_REVALIDATE}'
+            )
+
+        response = response.make_conditional(request)
+        self._stats['nao_modificado' if response.status_code == 304 else 'respostas'] += 1
+        return response
+
+    def hashed_response(self, hash_pedido, nome, request):
+        """/assets/<hash>/<arquivo>: immutable se o hash é o atual, senão redireciona para ele"""
+        asset = self.get(nome)
+        if asset is None:
+            abort(404)
+        if hash_pedido != asset['hash']:
+            return redirect(self.url(nome), code=302)
+        return self.response(nome, request, imutavel=True)
+
+    def get_info(self):
+        return {
+            **self._stats,
+            'arquivos': {
+                nome: {
+                    'hash': asset['hash'],
+                    'bytes': {codificacao or 'identity': len(dados) for codificacao, dados in asset['variantes'].items()}
+                }
+                for nome, asset in sorted(self._assets.items())
+            }
+        }
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def get_static_assets():
+    """Assets do frontend; cada arquivo é montado no primeiro acesso (nunca na importação do app)"""
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = StaticAssets(Config.FRONTEND_DIR, Config.STATIC_BUILD_DIR)
+    return _assets
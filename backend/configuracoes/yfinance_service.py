@@ -1,174 +1,48 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import time
 import logging
-from functools import lru_cache
 from .config import Config
+from .price_store import get_price_store, normalize_symbol
+from .cache import TTLCache
+from .b3_calendar import validade_dados
+from .indicator_state import get_indicator_state_store
+from .pairs_scanner import scan_pairs, versao_dados
+from .process_pool import get_process_pool
+from .indicators import compute_indicators, pack_columns, ultimos_valores
+from .resampling import resample_bars
+from .backtest_engine import run_backtest, run_sweep, grade_parametros, validar_opcoes
+from .rsl_engine import compute_universe, sector_aggregates
+from .singleflight import get_all_stats as get_coalescing_stats
+from .instrumentation import span
+
+# Indicadores por (ticker, data da última barra, indicadores pedidos)
+indicators_cache = TTLCache(
+    maxsize=Config.RSL_CACHE_MAXSIZE,
+    expires_at=lambda now: validade_dados(Config.MARKET_CACHE_TTL),
+    stale_seconds=Config.MARKET_CACHE_TTL,
+    name='indicators'
+)
+# Barras agregadas por (ticker, intervalo, período, data da última barra diária)
+bars_cache = TTLCache(
+    maxsize=Config.CHART_BARS_CACHE_MAXSIZE,
+    expires_at=lambda now: validade_dados(Config.MARKET_CACHE_TTL),
+    stale_seconds=Config.MARKET_CACHE_TTL,
+    name='chart_bars'
+)
+# Pares por (setor, período, versão dos dados): dados novos geram chave nova
+pairs_cache = TTLCache(
+    maxsize=256,
+    expires_at=lambda now: now + Config.PAIRS_CACHE_TTL,
+    name='pairs'
+)
 
 class YFinanceService:
     """Serviço completo para buscar dados do Yahoo Finance + cálculos RSL"""
     
     @staticmethod
-    def get_stock_data(symbol, period=None):
-        """Busca dados de uma ação específica"""
-        try:
-            # Usar período padrão do config se não especificado
-            if period is None:
-                period = Config.YFINANCE_PERIOD_DEFAULT
-            
-            # Adiciona .SA para ações brasileiras se necessário
-            if not symbol.endswith('.SA'):
-                symbol += '.SA'
-            
-            print(f"📈 Buscando dados de {symbol} (período: {period})")
-            
-            stock = yf.Ticker(symbol)
-            data = stock.history(period=period)
-            
-            if data.empty:
-                print(f"⚠️ Nenhum dado encontrado para {symbol}")
-                return None
-            
-            # Pega o último preço
-            current_price = data['Close'].iloc[-1]
-            
-            # Calcula variação
-            previous_price = data['Close'].iloc[-2] if len(data) > 1 else current_price
-            change = current_price - previous_price
-            change_percent = (change / previous_price) * 100
-            
-            # Dados para gráfico (últimos 30 dias)
-            chart_data = []
-            for i, (date, row) in enumerate(data.tail(30).iterrows()):
-                chart_data.append({
-                    'date': date.strftime('%d/%m'),
-                    'price': round(row['Close'], 2),
-                    'volume': int(row['Volume']) if row['Volume'] > 0 else 0
-                })
-            
-            result = {
-                'symbol': symbol.replace('.SA', ''),
-                'current_price': round(current_price, 2),
-                'change': round(change, 2),
-                'change_percent': round(change_percent, 2),
-                'volume': int(data['Volume'].iloc[-1]) if data['Volume'].iloc[-1] > 0 else 0,
-                'chart_data': chart_data,
-                'last_update': datetime.now().strftime('%d/%m/%Y %H:%M'),
-                'period': period,
-                'data_points': len(data)
-            }
-            
-            print(f"✅ Dados obtidos para {symbol}: R$ {result['current_price']}")
-            return result
-            
-        except Exception as e:
-            print(f"❌ Erro ao buscar dados para {symbol}: {e}")
-            return None
-    
-    @staticmethod
-    def get_multiple_stocks(symbols):
-        """Busca dados de múltiplas ações"""
-        print(f"📊 Buscando dados de {len(symbols)} ações...")
-        
-        results = {}
-        success_count = 0
-        
-        for symbol in symbols:
-            symbol = symbol.strip().upper()
-            if symbol:  # Verificar se não está vazio
-                data = YFinanceService.get_stock_data(symbol)
-                if data:
-                    results[symbol] = data
-                    success_count += 1
-        
-        print(f"✅ Sucesso: {success_count}/{len(symbols)} ações")
-        return results
-    
-    @staticmethod
-    def get_stock_info(symbol):
-        """Busca informações detalhadas de uma ação"""
-        try:
-            if not symbol.endswith('.SA'):
-                symbol += '.SA'
-            
-            print(f"🔍 Buscando informações detalhadas de {symbol}")
-            
-            stock = yf.Ticker(symbol)
-            info = stock.info
-            
-            if not info:
-                return None
-            
-            # Extrair informações principais
-            result = {
-                'symbol': symbol.replace('.SA', ''),
-                'longName': info.get('longName', 'N/A'),
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'marketCap': info.get('marketCap', 0),
-                'volume': info.get('volume', 0),
-                'averageVolume': info.get('averageVolume', 0),
-                'fiftyTwoWeekHigh': info.get('fiftyTwoWeekHigh', 0),
-                'fiftyTwoWeekLow': info.get('fiftyTwoWeekLow', 0),
-                'dividendYield': info.get('dividendYield', 0),
-                'peRatio': info.get('trailingPE', 0),
-                'last_update': datetime.now().strftime('%d/%m/%Y %H:%M')
-            }
-            
-            print(f"✅ Informações obtidas para {result['longName']}")
-            return result
-            
-        except Exception as e:
-            print(f"❌ Erro ao buscar informações de {symbol}: {e}")
-            return None
-    
-    @staticmethod
-    def validate_ticker(symbol):
-        """Valida se um ticker existe"""
-        try:
-            if not symbol.endswith('.SA'):
-                symbol += '.SA'
-            
-            stock = yf.Ticker(symbol)
-            data = stock.history(period='1d')
-            
-            return not data.empty
-            
-        except Exception:
-            return False
-    
-    @staticmethod
-    def get_default_stocks():
-        """Retorna dados das ações padrão configuradas"""
-        return YFinanceService.get_multiple_stocks(Config.DEFAULT_SYMBOLS)
-    
-    # ✅ FUNÇÕES RSL - BASEADAS NO METATRADER
-    
-    @staticmethod
-    def get_historical_data(symbol, period='1y'):
-        """Busca dados históricos para cálculo do RSL"""
-        try:
-            # Normalizar ticker
-            if not symbol.endswith('.SA'):
-                symbol += '.SA'
-            
-            print(f"📈 Buscando histórico de {symbol} para RSL...")
-            
-            stock = yf.Ticker(symbol)
-            data = stock.history(period=period)
-            
-            if data.empty:
-                print(f"⚠️ Nenhum dado histórico para {symbol}")
-                return None
-            
-            return data['Close']
-            
-        except Exception as e:
-            print(f"❌ Erro ao buscar histórico de {symbol}: {e}")
-            return None
-    
-    @staticmethod
+    @span('calculo', 'calculate_rsl')
     def calculate_rsl(price_series, periodo_mm=30):
         """
         Calcula RSL exatamente como no MetaTrader:
@@ -198,6 +72,7 @@ class YFinanceService:
             return None
     
     @staticmethod
+    @span('calculo', 'calculate_volatilidade')
     def calculate_volatilidade(price_series):
         """
         Calcula volatilidade anualizada como no MetaTrader:
@@ -221,139 +96,296 @@ class YFinanceService:
             return None
     
     @staticmethod
-    @lru_cache(maxsize=100)
-    def get_rsl_data_cached(symbol, period='1y'):
+    def get_rsl_data_incremental(symbol, periodo_mm=30):
         """
-        Versão com cache do get_rsl_data para evitar recálculos
-        Cache expira automaticamente quando maxsize é atingido
+        RSL e Volatilidade a partir do estado incremental do ticker: só as barras
+        novas desde a última chamada são aplicadas (O(1) por barra), sem recalcular o ano.
         """
-        return YFinanceService.get_rsl_data(symbol, period)
-    
-    @staticmethod
-    def get_rsl_data(symbol, period='1y', periodo_mm=30):
-        """Calcula RSL e Volatilidade para um ticker específico"""
         try:
-            # Buscar dados históricos
-            price_data = YFinanceService.get_historical_data(symbol, period)
-            
-            if price_data is None:
-                return None
-            
-            # Calcular RSL
-            rsl = YFinanceService.calculate_rsl(price_data, periodo_mm)
-            
-            # Calcular Volatilidade
-            volatilidade = YFinanceService.calculate_volatilidade(price_data)
+            state = get_indicator_state_store().get_state(symbol, periodo_mm)
+            rsl, volatilidade = state.rsl, state.volatilidade
             
             if rsl is None or volatilidade is None:
                 return None
             
-            # Calcular MM atual
-            mm_atual = price_data.rolling(window=periodo_mm).mean().iloc[-1]
-            
-            return {
-                'symbol': symbol.replace('.SA', ''),
-                'rsl': round(rsl, 2),
-                'volatilidade': round(volatilidade, 2),
-                'close_atual': round(price_data.iloc[-1], 2),
-                'mm_30': round(mm_atual, 2),
-                'data_calculo': datetime.now().strftime('%d/%m/%Y %H:%M'),
-                'periodo_usado': period,
-                'periodo_mm': periodo_mm,
-                'pontos_dados': len(price_data),
-                'has_real_data': True
-            }
+            return YFinanceService.build_rsl_result(
+                symbol, rsl, volatilidade, state.close_atual, state.mm,
+                state.pontos, state.period, periodo_mm
+            )
             
         except Exception as e:
-            print(f"❌ Erro ao calcular RSL para {symbol}: {e}")
+            print(f"❌ Erro ao calcular RSL incremental para {symbol}: {e}")
             return None
     
     @staticmethod
-    def get_sector_rsl_data(tickers_list, setor_nome, period='1y'):
+    def build_rsl_result(symbol, rsl, volatilidade, close_atual, mm_atual, pontos_dados, period, periodo_mm):
+        """Formato de resposta do RSL de um ticker"""
+        return {
+            'symbol': symbol.replace('.SA', ''),
+            'rsl': round(rsl, 2),
+            'volatilidade': round(volatilidade, 2),
+            'close_atual': round(close_atual, 2),
+            'mm_30': round(mm_atual, 2),
+            'data_calculo': datetime.now().strftime('%d/%m/%Y %H:%M'),
+            'periodo_usado': period,
+            'periodo_mm': periodo_mm,
+            'pontos_dados': int(pontos_dados),
+            'has_real_data': True
+        }
+    
+    @staticmethod
+    def get_all_sectors_rsl_data(setores, period='1y', periodo_mm=30):
         """
-        Calcula RSL médio de um setor - IGUAL AO METATRADER
-        Agrupa por setor e calcula média do RSL e Volatilidade
+        Calcula o RSL de vários setores de uma vez: {setor: [tickers]} -> {setor: resultado}
+        Um único download agrupado monta a matriz de fechamentos e o motor vetorizado
+        calcula todos os tickers e médias setoriais; setores sem ticker válido ficam de fora.
         """
-        try:
-            print(f"📊 Calculando RSL do setor: {setor_nome}")
-            print(f"📋 Tickers: {tickers_list}")
-            
-            resultados_individuais = []
-            
-            # ✅ USAR CACHE PARA OTIMIZAR
-            for ticker in tickers_list[:10]:  # Limitar a 10 para não sobrecarregar
-                print(f"  ⚡ Processando {ticker}...")
-                
-                # Usar versão com cache
-                rsl_data = YFinanceService.get_rsl_data_cached(ticker, period)
-                
-                if rsl_data:
-                    resultados_individuais.append(rsl_data)
-                    print(f"    ✅ {ticker}: RSL={rsl_data['rsl']}%, Vol={rsl_data['volatilidade']}%")
-                else:
-                    print(f"    ❌ {ticker}: Sem dados RSL")
-            
-            if not resultados_individuais:
-                print(f"  ⚠️ Nenhum ticker válido para RSL em {setor_nome}")
-                return None
-            
-            # ✅ CALCULAR MÉDIAS COMO NO METATRADER
-            rsl_values = [r['rsl'] for r in resultados_individuais]
-            vol_values = [r['volatilidade'] for r in resultados_individuais]
-            
-            rsl_medio = np.mean(rsl_values)
-            vol_media = np.mean(vol_values)
-            
+        inicio = time.monotonic()
+        setores = {setor: [t.strip().upper() for t in tickers] for setor, tickers in setores.items()}
+        todos_tickers = list(dict.fromkeys(t for tickers in setores.values() for t in tickers[:10]))
+        
+        print(f"📊 Calculando RSL de {len(setores)} setores ({len(todos_tickers)} tickers)...")
+        
+        matrix, failures = get_price_store().get_close_matrix(todos_tickers, period=period)
+        matrix.columns = [symbol.replace('.SA', '') for symbol in matrix.columns]
+        with span('calculo', 'compute_universe'):
+            universe = compute_universe(matrix, periodo_mm)
+        
+        # Resultados individuais no mesmo formato de get_rsl_data_incremental
+        detalhes = {}
+        validos = universe.dropna(subset=['rsl', 'volatilidade'])
+        for symbol, row in zip(validos.index, validos.itertuples(index=False)):
+            detalhes[symbol] = YFinanceService.build_rsl_result(
+                symbol, row.rsl, row.volatilidade, row.close_atual, row.mm,
+                row.pontos_dados, period, periodo_mm
+            )
+        
+        data_calculo = datetime.now().strftime('%d/%m/%Y %H:%M')
+        resultados = {}
+        with span('calculo', 'sector_aggregates'):
+            agregados = sector_aggregates(universe, setores)
+        for setor, agregado in agregados.items():
+            resultados[setor] = {
+                'setor': setor,
+                'rsl': agregado['rsl'],
+                'volatilidade': agregado['volatilidade'],
+                'empresas_com_dados': agregado['empresas_com_dados'],
+                'total_empresas': agregado['total_empresas'],
+                'taxa_sucesso': agregado['taxa_sucesso'],
+                'detalhes_empresas': [detalhes[t] for t in agregado['tickers']],
+                'has_real_data': True,
+                'data_calculo': data_calculo
+            }
+        
+        execucao = {
+            'tickers': len(todos_tickers),
+            'tickers_com_dados': len(detalhes),
+            'falhas': len(failures),
+            'tempo_ms': round((time.monotonic() - inicio) * 1000, 1)
+        }
+        print(f"✅ RSL calculado para {len(resultados)}/{len(setores)} setores em {execucao['tempo_ms']:.0f}ms")
+        return resultados, execucao
+    
+    @staticmethod
+    def get_indicators(symbols, nomes):
+        """
+        Valores atuais dos indicadores pedidos para vários tickers: {ticker: {indicador: valor}}.
+        Os que não estão em cache são calculados juntos, numa passada sobre a matriz de preços.
+        """
+        frames, _ = get_price_store().get_history_many(symbols, period=Config.INDICATORS_PERIOD)
+        
+        resultados, faltando = {}, {}
+        for symbol, data in frames.items():
+            key = (symbol, data.index[-1].strftime('%Y-%m-%d'), nomes)
+            cached = indicators_cache.get(key)
+            if cached is not None:
+                resultados[symbol.replace('.SA', '')] = cached
+            else:
+                faltando[symbol] = key
+        
+        if faltando:
+            series, close, _ = YFinanceService.compute_indicator_series(
+                {symbol: frames[symbol] for symbol in faltando}, nomes
+            )
+            for coluna, (symbol, key) in enumerate(faltando.items()):
+                # A última linha é a última barra de cada ticker
+                valores = ultimos_valores(series, close, coluna)
+                indicators_cache.set(key, valores)
+                resultados[symbol.replace('.SA', '')] = valores
+        
+        return resultados
+    
+    @staticmethod
+    def compute_indicator_series(frames, nomes):
+        """
+        Séries dos indicadores de {symbol: DataFrame OHLCV} (colunas na ordem de frames).
+        Cada coluna usa só as barras do próprio ticker, alinhadas pela última barra: o
+        resultado não depende de quais outros tickers estão no lote (sem ffill entre datas).
+        Retorna (séries, matriz de fechamentos, {symbol: datas das linhas do ticker}).
+        """
+        validos = {symbol: data.dropna(subset=['High', 'Low', 'Close']) for symbol, data in frames.items()}
+        matrizes = {
+            campo: pack_columns([data[campo].to_numpy(dtype='float64') for data in validos.values()])
+            for campo in ('High', 'Low', 'Close')
+        }
+        with span('calculo', 'compute_indicators'):
+            series = compute_indicators(matrizes['High'], matrizes['Low'], matrizes['Close'], nomes)
+        return series, matrizes['Close'], {symbol: data.index for symbol, data in validos.items()}
+    
+    @staticmethod
+    def get_indicator_series(symbol, nomes, points=120, colunar=False):
+        """
+        Últimos `points` valores de cada indicador de um ticker (para gráficos).
+        Com `colunar`, as séries ficam como arrays do NumPy (NaN no aquecimento) para o serializador.
+        """
+        data = get_price_store().get_history(symbol, period=Config.INDICATORS_PERIOD)
+        if data.empty:
+            return None
+        
+        series, close, datas = YFinanceService.compute_indicator_series({symbol: data}, nomes)
+        datas = next(iter(datas.values()))
+        if datas.empty:
+            return None
+        fechamentos = np.round(close[-points:, 0], 2)
+        valores = {nome: np.round(matriz[-points:, 0], 4) for nome, matriz in series.items()}
+        if not colunar:
+            fechamentos = fechamentos.tolist()
+            valores = {
+                nome: [v if np.isfinite(v) else None for v in serie.tolist()]
+                for nome, serie in valores.items()
+            }
+        return {
+            'symbol': symbol.replace('.SA', ''),
+            'dates': datas[-points:].strftime('%d/%m/%Y').tolist(),
+            'close': fechamentos,
+            'series': valores,
+            'atual': ultimos_valores(series, close, 0)
+        }
+    
+    @staticmethod
+    def get_chart_bars(symbol, period='1y', interval='1d', data=None):
+        """
+        Barras do ticker no intervalo pedido ('1d', '1wk', '1mo'), a partir do histórico
+        diário do price store (ou de `data`, se já carregado)
+        """
+        symbol = normalize_symbol(symbol)
+        if data is None:
+            data = get_price_store().get_history(symbol, period=period)
+        if data.empty:
+            return data
+        
+        key = (symbol, interval, period, data.index[-1].strftime('%Y-%m-%d'))
+        return bars_cache.get_or_compute(key, lambda: resample_bars(data, interval))
+    
+    @staticmethod
+    def get_pairs_data(setor_nome, tickers, period='1y'):
+        """
+        Pares cointegrados entre os tickers de um setor.
+        O resultado fica em cache pela versão dos dados de preço (última barra de cada ticker).
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        matrix, failures = get_price_store().get_close_matrix(tickers, period=period)
+        if matrix.empty:
+            return None
+        matrix.columns = [symbol.replace('.SA', '') for symbol in matrix.columns]
+        versao = versao_dados(matrix)
+        
+        def calcular():
+            print(f"🔗 Buscando pares cointegrados em {setor_nome} ({matrix.shape[1]} tickers)...")
+            pares, estatisticas = scan_pairs(
+                matrix,
+                min_correlacao=Config.PAIRS_MIN_CORRELATION,
+                max_pvalue=Config.PAIRS_MAX_PVALUE,
+                janela=Config.PAIRS_WINDOW,
+                max_candidatos=Config.PAIRS_MAX_CANDIDATES,
+                executor=get_process_pool()
+            )
+            print(f"✅ {len(pares)} pares cointegrados em {setor_nome} ({estatisticas['tempo_ms']:.0f}ms)")
             return {
                 'setor': setor_nome,
-                'rsl': round(rsl_medio, 2),  # ✅ PERFORMANCE = RSL MÉDIO
-                'volatilidade': round(vol_media, 2),  # ✅ VOLATILIDADE MÉDIA
-                'empresas_com_dados': len(resultados_individuais),
-                'total_empresas': len(tickers_list),
-                'taxa_sucesso': round((len(resultados_individuais) / len(tickers_list)) * 100, 1),
-                'detalhes_empresas': resultados_individuais,
-                'has_real_data': True,
+                'pares': pares,
+                'estatisticas': {**estatisticas, 'falhas_dados': len(failures)},
+                'versao_dados': versao,
+                'periodo_usado': period,
                 'data_calculo': datetime.now().strftime('%d/%m/%Y %H:%M')
             }
-            
-        except Exception as e:
-            print(f"❌ Erro ao calcular RSL do setor {setor_nome}: {e}")
-            return None
+        
+        return pairs_cache.get_or_compute((setor_nome, period, versao), calcular)
     
     @staticmethod
-    def get_multiple_rsl_data(symbols_list, period='1y'):
-        """Busca dados RSL de múltiplas ações com cache"""
-        print(f"📊 Calculando RSL para {len(symbols_list)} símbolos...")
+    def get_backtest_data(tickers, period='5y', periodo_mm=30, top_n=5, rebalance=21,
+                          initial_capital=100000.0, cost_bps=10.0):
+        """
+        Backtest do momentum por RSL sobre o histórico guardado.
+        periodo_mm, top_n e rebalance aceitam listas: a grade é varrida no pool de
+        processos e o detalhe (curva e operações) é o da combinação de maior Sharpe.
+        """
+        combinacoes = grade_parametros(periodo_mm, top_n, rebalance)
+        initial_capital, cost_bps = validar_opcoes(initial_capital, cost_bps)
+        if len(combinacoes) > Config.BACKTEST_MAX_COMBINATIONS:
+            raise ValueError(f'Máximo de {Config.BACKTEST_MAX_COMBINATIONS} combinações de parâmetros')
         
-        results = {}
-        success_count = 0
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))[:Config.BACKTEST_MAX_TICKERS]
+        matrix, failures = get_price_store().get_close_matrix(tickers, period=period)
+        if matrix.empty:
+            return None
+        matrix.columns = [symbol.replace('.SA', '') for symbol in matrix.columns]
+        
+        opcoes = {'initial_capital': initial_capital, 'cost_bps': cost_bps}
+        varredura = None
+        melhor = combinacoes[0]
+        if len(combinacoes) > 1:
+            varredura = run_sweep(matrix, combinacoes, executor=get_process_pool(), **opcoes)
+            melhor = {k: varredura[0][k] for k in ('periodo_mm', 'top_n', 'rebalance')}
         
-        for symbol in symbols_list:
-            symbol = symbol.strip().upper()
-            if symbol:
-                # ✅ USAR VERSÃO COM CACHE
-                rsl_data = YFinanceService.get_rsl_data_cached(symbol, period)
-                if rsl_data:
-                    results[symbol] = rsl_data
-                    success_count += 1
+        metricas, curva, operacoes = run_backtest(matrix, **melhor, **opcoes)
         
-        print(f"✅ RSL calculado para {success_count}/{len(symbols_list)} símbolos")
-        return results
+        passo = max(1, len(curva) // Config.BACKTEST_CURVE_POINTS)
+        pontos = curva.iloc[::passo]
+        if pontos.index[-1] != curva.index[-1]:
+            pontos = pd.concat([pontos, curva.iloc[-1:]])
+        
+        return {
+            'strategy': 'Momentum RSL',
+            **metricas,
+            'parametros': melhor,
+            'periodo_usado': period,
+            'tickers_com_dados': matrix.shape[1],
+            'falhas_dados': len(failures),
+            'inicio': curva.index[0].strftime('%d/%m/%Y'),
+            'fim': curva.index[-1].strftime('%d/%m/%Y'),
+            'equity_curve': [
+                {'date': date.strftime('%d/%m/%Y'), 'value': round(float(value), 2)}
+                for date, value in pontos.items()
+            ],
+            'operacoes': [
+                {
+                    'ticker': op.ticker,
+                    'entrada': op.entrada.strftime('%d/%m/%Y'),
+                    'saida': op.saida.strftime('%d/%m/%Y'),
+                    'retorno_percent': round(float(op.retorno) * 100, 2),
+                    'aberta': bool(op.aberta)
+                }
+                for op in operacoes.tail(200).itertuples(index=False)
+            ],
+            'varredura': varredura
+        }
     
     @staticmethod
     def clear_cache():
-        """Limpa o cache do RSL (útil para forçar recálculo)"""
-        YFinanceService.get_rsl_data_cached.cache_clear()
+        """Limpa os caches de indicadores, barras e pares (útil para forçar recálculo)"""
+        indicators_cache.clear()
+        bars_cache.clear()
+        pairs_cache.clear()
         print("🧹 Cache RSL limpo com sucesso!")
     
     @staticmethod
     def get_cache_info():
         """Retorna informações sobre o cache"""
-        cache_info = YFinanceService.get_rsl_data_cached.cache_info()
         return {
-            'hits': cache_info.hits,
-            'misses': cache_info.misses,
-            'maxsize': cache_info.maxsize,
-            'currsize': cache_info.currsize,
-            'hit_rate': round((cache_info.hits / (cache_info.hits + cache_info.misses)) * 100, 2) if (cache_info.hits + cache_info.misses) > 0 else 0
+            'pairs_cache': pairs_cache.get_info(),
+            'indicators_cache': indicators_cache.get_info(),
+            'chart_bars_cache': bars_cache.get_info(),
+            'indicator_state': get_indicator_state_store().get_info(),
+            'coalescing': get_coalescing_stats()
         }
\ No newline at end of file
@@ -0,0 +1,61 @@
+# gunicorn.conf.py
+"""
+Configuração do gunicorn. O gunicorn carrega ./gunicorn.conf.py sozinho, então
+`gunicorn app:app` (a partir de backend/) também usa este arquivo: os padrões
+são os do deploy original (workers sync, sem preload) e o resto é opt-in.
+
+SERVING_MODE=sync (padrão): uma requisição por worker.
+SERVING_MODE=async: workers gevent; cada requisição roda numa greenlet e toda
+espera de I/O (yfinance/requests, Postgres via psycogreen, time.sleep, locks)
+cede a vez às outras. Trabalho de CPU (pandas/numpy) e o BEGIN IMMEDIATE do
+cache SQLite não cedem: travam todas as greenlets do worker enquanto duram,
+por isso o modo async exige CACHE_BACKEND=memory (padrão) ou redis.
+
+GUNICORN_PRELOAD=true: o master importa o app (Flask, pandas, numpy) uma vez
+e os workers herdam as páginas por copy-on-write; yfinance e o resto das
+dependências analíticas só carregam no primeiro uso.
+"""
+import os
+
+SERVING_MODE = os.environ.get('SERVING_MODE', 'sync')
+
+# Sem GUNICORN_BIND vale o padrão do gunicorn (0.0.0.0:$PORT quando PORT existe)
+if os.environ.get('GUNICORN_BIND'):
+    bind = os.environ['GUNICORN_BIND']
+# WEB_CONCURRENCY é a variável que o próprio gunicorn (e o Render) usam para o número de workers
+workers = int(os.environ.get('GUNICORN_WORKERS', os.environ.get('WEB_CONCURRENCY', 1)))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+if SERVING_MODE == 'async':
+    if os.environ.get('CACHE_BACKEND', 'memory') == 'sqlite':
+        raise RuntimeError("SERVING_MODE=async não funciona com CACHE_BACKEND=sqlite (use memory ou redis)")
+    worker_class = 'gevent'
+    # Requisições simultâneas por worker (cada uma é uma greenlet)
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+    if preload_app:
+        # O app é importado no master: os locks e sockets criados na importação
+        # precisam já ser os do gevent
+        from gevent import monkey
+        monkey.patch_all()
+else:
+    worker_class = 'sync'
+
+
+def post_worker_init(worker):
+    """Com gevent, o psycopg2 precisa de um wait callback para não bloquear o worker inteiro"""
+    if SERVING_MODE == 'async':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            worker.log.warning("psycogreen não instalado: consultas ao Postgres vão bloquear o worker gevent")
+
+
+def worker_exit(server, worker):
+    """Grava as últimas métricas do worker; o /metrics as soma ao acumulado dos encerrados"""
+    from configuracoes.instrumentation import flush
+    flush()
@@ -0,0 +1,69 @@
+# migrations/dados_referencia_triggers.py
+"""
+Cria a função e os triggers que avisam o canal de dados de referência
+(configuracoes.reference_data.CANAL_NOTIFY) quando `plans` ou `setor_b3` mudam.
+
+Roda uma vez por deploy, com um papel dono das tabelas; os workers só fazem
+LISTEN e avisam no log se algum trigger estiver faltando. Pode ser repetido:
+tudo acontece numa transação e os triggers são recriados do zero.
+
+Uso: python migrations/dados_referencia_triggers.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuracoes.database import get_local_db_connection
+from configuracoes.reference_data import CANAL_NOTIFY, TABELAS_ORIGEM, nome_trigger
+
+# Mesma chave de qualquer outra execução desta migração: duas ao mesmo tempo esperam uma pela outra
+LOCK_KEY = 0x6765_6d69_7472_6967
+
+
+def aplicar():
+    conn = get_local_db_connection()
+    cursor = conn.cursor()
+    try:
+        print("🛠️ CRIANDO TRIGGERS DE DADOS DE REFERÊNCIA...")
+        print("=" * 40)
+
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION notificar_dados_referencia() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{CANAL_NOTIFY}', TG_ARGV[0]);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
+        for tabela, nome in TABELAS_ORIGEM.items():
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (tabela,))
+            if not cursor.fetchone()[0]:
+                print(f"⚠️ Tabela {tabela} não existe, trigger não criado")
+                continue
+            trigger = nome_trigger(tabela)
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {tabela}")
+            cursor.execute(f"""
+                CREATE TRIGGER {trigger}
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabela}
+                FOR EACH STATEMENT EXECUTE PROCEDURE notificar_dados_referencia('{nome}')
+            """)
+            print(f"✅ {trigger} em {tabela} -> '{nome}'")
+
+        conn.commit()
+        print("✅ Migração aplicada")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erro na migração: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if aplicar() else 1)
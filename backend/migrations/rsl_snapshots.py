@@ -0,0 +1,56 @@
+# migrations/rsl_snapshots.py
+"""
+Cria a tabela `rsl_snapshots`, onde o líder grava as versões do RSL setorial
+(configuracoes.rsl_snapshot) e os workers leem a mais recente.
+
+Roda uma vez por deploy, com um papel dono do schema; os workers só fazem
+SELECT/INSERT/DELETE nela. Pode ser repetido: a tabela só é criada se faltar.
+
+Uso: python migrations/rsl_snapshots.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuracoes.database import get_local_db_connection
+
+# Mesma chave de qualquer outra execução desta migração: duas ao mesmo tempo esperam uma pela outra
+LOCK_KEY = 0x7273_6c5f_736e_6170
+
+
+def aplicar():
+    conn = get_local_db_connection()
+    cursor = conn.cursor()
+    try:
+        print("🛠️ CRIANDO TABELA DE SNAPSHOTS RSL...")
+        print("=" * 40)
+
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rsl_snapshots (
+                versao SERIAL PRIMARY KEY,
+                criado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+                period VARCHAR(10) NOT NULL,
+                periodo_mm INTEGER NOT NULL,
+                setores JSONB NOT NULL,
+                execucao JSONB NOT NULL
+            )
+        """)
+        print("✅ rsl_snapshots")
+
+        conn.commit()
+        print("✅ Migração aplicada")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erro na migração: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if aplicar() else 1)
@@ -0,0 +1,53 @@
+# migrations/user_logout_epochs.py
+"""
+Cria a tabela `user_logout_epochs`, com a época do último logout de cada
+usuário (auth.signed_tokens.RevocationList): tokens assinados emitidos antes
+dela são recusados em todos os workers.
+
+Roda uma vez por deploy, com um papel dono do schema; os workers só fazem
+SELECT/INSERT/UPDATE nela. Pode ser repetido: a tabela só é criada se faltar.
+
+Uso: python migrations/user_logout_epochs.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuracoes.database import get_local_db_connection
+
+# Mesma chave de qualquer outra execução desta migração: duas ao mesmo tempo esperam uma pela outra
+LOCK_KEY = 0x6c6f_676f_7574_6570
+
+
+def aplicar():
+    conn = get_local_db_connection()
+    cursor = conn.cursor()
+    try:
+        print("🛠️ CRIANDO TABELA DE ÉPOCAS DE LOGOUT...")
+        print("=" * 40)
+
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_logout_epochs (
+                user_id INTEGER PRIMARY KEY,
+                logout_epoch DOUBLE PRECISION NOT NULL
+            )
+        """)
+        print("✅ user_logout_epochs")
+
+        conn.commit()
+        print("✅ Migração aplicada")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erro na migração: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if aplicar() else 1)
@@ -0,0 +1,101 @@
+# tests/test_backtest_engine.py
+"""
+Motor de backtest vetorizado contra um laço barra a barra de referência
+(mesma estratégia escrita da forma óbvia) e validação dos parâmetros.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracoes.backtest_engine import grade_parametros, rsl_matrix, run_backtest
+from configuracoes.price_store import FixtureProvider
+from conftest import FIXTURE_DIR
+
+
+def backtest_referencia(close_matrix, periodo_mm, top_n, rebalance, initial_capital, cost_bps, min_rsl=0.0):
+    """Curva de capital dia a dia: carteira em valores, drift pelos retornos, custo sobre o giro"""
+    closes = close_matrix.to_numpy(dtype='float64')
+    precos = close_matrix.ffill().to_numpy(dtype='float64')
+    n_dias, n_tickers = closes.shape
+    rsl = rsl_matrix(closes, periodo_mm)
+    rebalanceamentos = set(range(periodo_mm - 1, n_dias - 1, rebalance))
+
+    curva = np.full(n_dias, float(initial_capital))
+    posicoes = np.zeros(n_tickers)  # valor em cada ativo
+    caixa = float(initial_capital)
+    investido = False
+    for t in range(n_dias):
+        if investido and t > 0:
+            for i in range(n_tickers):
+                if np.isfinite(precos[t, i]) and np.isfinite(precos[t - 1, i]):
+                    posicoes[i] *= precos[t, i] / precos[t - 1, i]
+        valor = caixa + posicoes.sum()
+
+        if t in rebalanceamentos:
+            candidatos = [(rsl[t, i], i) for i in range(n_tickers) if np.isfinite(rsl[t, i]) and rsl[t, i] > min_rsl]
+            candidatos.sort(reverse=True)
+            alvo = np.zeros(n_tickers)
+            for _, i in candidatos[:min(top_n, n_tickers)]:
+                alvo[i] = 1.0 / min(top_n, n_tickers)
+            atuais = posicoes / valor
+            giro = np.abs(alvo - atuais).sum()
+            valor *= 1 - giro * cost_bps / 10000
+            posicoes = alvo * valor
+            caixa = valor - posicoes.sum()
+            investido = True
+
+        curva[t] = valor if investido else initial_capital
+    return curva
+
+
+def matriz_sintetica(n_dias=400, n_tickers=12, seed=7):
+    rng = np.random.default_rng(seed)
+    precos = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_dias, n_tickers)), axis=0))
+    precos[rng.random(precos.shape) < 0.02] = np.nan  # dias sem negociação
+    precos[:150, 3] = np.nan  # IPO no meio da série
+    datas = pd.bdate_range(end='2024-12-31', periods=n_dias)
+    return pd.DataFrame(precos, index=datas, columns=[f'T{i:02d}' for i in range(n_tickers)])
+
+
+def matriz_fixtures():
+    provider = FixtureProvider(FIXTURE_DIR)
+    return pd.concat({s: provider.fetch_history(s)['Close'] for s in ('PETR4.SA', 'VALE3.SA', 'ITUB4.SA')}, axis=1)
+
+
+@pytest.mark.parametrize('matriz, parametros', [
+    (matriz_sintetica(), {'periodo_mm': 30, 'top_n': 4, 'rebalance': 21}),
+    (matriz_sintetica(seed=8), {'periodo_mm': 10, 'top_n': 20, 'rebalance': 1}),
+    (matriz_fixtures(), {'periodo_mm': 20, 'top_n': 2, 'rebalance': 10}),
+])
+def test_vectorized_equity_curve_matches_bar_by_bar_loop(matriz, parametros):
+    _, curva, _ = run_backtest(matriz, initial_capital=100000.0, cost_bps=15.0, **parametros)
+    referencia = backtest_referencia(matriz, initial_capital=100000.0, cost_bps=15.0, **parametros)
+
+    assert np.max(np.abs(curva.to_numpy() / referencia - 1)) < 1e-12
+
+
+@pytest.mark.parametrize('parametros, mensagem', [
+    ({'top_n': 0}, 'top_n'),
+    ({'rebalance': 0}, 'rebalance'),
+    ({'periodo_mm': 0}, 'periodo_mm'),
+    ({'top_n': -1}, 'top_n'),
+    ({'top_n': 2.5}, 'top_n'),
+    ({'rebalance': 'abc'}, 'rebalance'),
+    ({'initial_capital': 0}, 'initial_capital'),
+    ({'initial_capital': float('nan')}, 'initial_capital'),
+    ({'cost_bps': -1}, 'cost_bps'),
+])
+def test_invalid_parameters_raise_value_error(parametros, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        run_backtest(matriz_sintetica(), **parametros)
+
+
+def test_parameter_grid_validates_every_value():
+    assert len(grade_parametros([20, 30], 5, [5, 21])) == 4
+    assert grade_parametros('30', 5.0, 21) == [{'periodo_mm': 30, 'top_n': 5, 'rebalance': 21}]
+    with pytest.raises(ValueError, match='top_n'):
+        grade_parametros([20, 30], [5, 0], 21)
+    with pytest.raises(ValueError, match='rebalance'):
+        grade_parametros(30, 5, [])
@@ -0,0 +1,53 @@
+# tests/test_cache_backend.py
+"""
+Backends compartilhados guardam os valores em JSON (não pickle): arrays,
+DataFrames e tuplas voltam como eram, e tipos desconhecidos não entram no cache.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from configuracoes.cache_backend import SQLiteCacheBackend, decode_value, encode_value
+from configuracoes.price_store import FixtureProvider
+from conftest import FIXTURE_DIR
+
+
+def test_dataframe_volta_igual():
+    data = FixtureProvider(FIXTURE_DIR).fetch_history('ITUB4.SA')
+
+    pd.testing.assert_frame_equal(decode_value(encode_value(data)), data, check_freq=False)
+
+
+def test_payload_com_numpy_volta_igual():
+    payload = {
+        'symbol': 'PETR4',
+        'chart': {'dates': ['02/01', '03/01'], 'prices': np.array([37.5, np.nan]),
+                  'volumes': np.array([100, 200], dtype=np.int64)},
+        'rsl': np.float64(1.25),
+        ('PETR4', '1y'): (1, 'x')
+    }
+
+    resultado = decode_value(encode_value(payload))
+
+    assert resultado['symbol'] == 'PETR4'
+    np.testing.assert_array_equal(resultado['chart']['prices'], payload['chart']['prices'])
+    assert resultado['chart']['volumes'].dtype == np.int64
+    assert resultado['rsl'] == 1.25
+    assert resultado[('PETR4', '1y')] == (1, 'x')
+
+
+def test_sqlite_ignora_valor_sem_serializacao_e_entrada_antiga(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'))
+    expira = time.time() + 60
+
+    backend.set('objeto', object(), expira)
+    assert backend.get('objeto') is None
+
+    backend.set('ok', {'a': 1}, expira)
+    assert backend.get('ok')[0] == {'a': 1}
+
+    backend._conn().execute("UPDATE cache_entries SET value = ? WHERE key = 'ok'", (b'\x80\x05pickle',))
+    assert backend.get('ok') is None
@@ -0,0 +1,210 @@
+# tests/test_database_pool.py
+"""
+Pool de conexões com um connect falso (sem PostgreSQL): empréstimo e
+devolução, limite de tamanho com tempo de espera, descarte de conexões
+quebradas ou velhas demais, e PooledConnection.close() devolvendo a conexão
+ao pool em vez de fechá-la.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from configuracoes import database
+from configuracoes.database import ConnectionPool, PooledConnection, PoolTimeoutError
+
+
+class FakeConnection:
+    """Só o que o pool usa de uma conexão psycopg2"""
+
+    def __init__(self, numero):
+        self.numero = numero
+        self.closed = 0
+        self.quebrada = False
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        if self.quebrada:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        return FakeCursor()
+
+    def rollback(self):
+        if self.quebrada:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeCursor:
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnect:
+    def __init__(self):
+        self.abertas = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.abertas))
+        self.abertas.append(conn)
+        return conn
+
+
+class Relogio:
+    """Módulo time do pool com monotonic controlável, para idade e ociosidade das conexões"""
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+@pytest.fixture
+def connect():
+    return FakeConnect()
+
+
+def test_conexao_devolvida_e_reutilizada(connect):
+    pool = ConnectionPool(connect, min_size=1, max_size=2)
+    assert len(connect.abertas) == 1
+
+    conn = pool.getconn()
+    assert pool.get_stats()['in_use'] == 1
+    pool.release(conn)
+
+    assert pool.getconn() is conn
+    stats = pool.get_stats()
+    assert stats['connections_created'] == 1
+    assert stats['checkouts'] == 2
+
+
+def test_transacao_aberta_e_desfeita_na_devolucao(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+    pool.release(conn)
+
+    assert conn.rollbacks == 1
+    assert pool.getconn() is conn
+
+
+def test_pool_cheio_espera_e_estoura_o_tempo(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=2, timeout=0.05)
+    pool.getconn()
+    pool.getconn()
+
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+
+    assert time.monotonic() - inicio >= 0.05
+    assert len(connect.abertas) == 2
+    assert pool.get_stats()['checkout_timeouts'] == 1
+
+
+def test_pool_cheio_libera_quem_espera_na_devolucao(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=5)
+    conn = pool.getconn()
+    recebida = []
+
+    espera = threading.Thread(target=lambda: recebida.append(pool.getconn()))
+    espera.start()
+    while pool.get_stats()['waiting'] == 0:
+        time.sleep(0.001)
+    pool.release(conn)
+    espera.join(1)
+
+    assert recebida == [conn]
+
+
+def test_conexao_quebrada_e_descartada(connect, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(database, 'time', relogio)
+    pool = ConnectionPool(connect, min_size=1, max_size=1, healthcheck_idle=30)
+    quebrada = connect.abertas[0]
+    quebrada.quebrada = True
+
+    # Ociosa há pouco tempo: nem passa pelo SELECT 1
+    assert pool.getconn() is quebrada
+    pool.release(quebrada)  # rollback falharia, mas a transação está ociosa
+
+    relogio.agora += 31
+    conn = pool.getconn()
+
+    assert conn is not quebrada
+    assert quebrada.closed
+    assert pool.get_stats()['healthcheck_failures'] == 1
+
+
+def test_conexao_fechada_nao_volta_ao_pool(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+    conn.quebrada = True
+
+    pool.release(conn)
+
+    assert conn.closed
+    assert pool.get_stats()['idle'] == 0
+    assert pool.getconn() is not conn
+
+
+def test_conexao_velha_demais_e_trocada(connect, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(database, 'time', relogio)
+    pool = ConnectionPool(connect, min_size=1, max_size=1, max_lifetime=3600)
+    velha = connect.abertas[0]
+
+    relogio.agora += 3599
+    assert pool.getconn() is velha
+    pool.release(velha)
+
+    relogio.agora += 2
+    assert pool.getconn() is not velha
+    assert velha.closed
+    assert pool.get_stats()['connections_closed'] == 1
+
+
+def test_close_devolve_ao_pool_sem_fechar(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    emprestada = pool.connection()
+    conn = emprestada._conn
+
+    emprestada.close()
+    emprestada.close()  # segunda chamada não devolve de novo
+
+    assert not conn.closed
+    assert pool.get_stats()['in_use'] == 0
+    assert pool.get_stats()['idle'] == 1
+    with pytest.raises(psycopg2.InterfaceError):
+        emprestada.cursor()
+    assert pool.connection()._conn is conn
+
+
+def test_pooled_connection_repassa_atributos(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    emprestada = pool.connection()
+
+    assert isinstance(emprestada, PooledConnection)
+    assert emprestada.numero == 0
+    assert emprestada.cursor().fetchone() == (1,)
+    emprestada.close()
@@ -0,0 +1,97 @@
+# tests/test_indicator_state.py
+"""
+Estados incrementais: batem com calculate_rsl/calculate_volatilidade (também
+depois de um split, que reajusta todo o histórico do store) e o arquivo do ticker
+só é regravado quando uma barra entra, muda ou sai da janela.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import pytest
+
+from configuracoes import indicator_state
+from configuracoes.indicator_state import IndicatorStateStore
+from configuracoes.price_store import FixtureProvider
+from configuracoes.yfinance_service import YFinanceService
+from conftest import FIXTURE_DIR
+
+
+class FixtureStore:
+    """Só o get_history do store de preços, lendo as fixtures (podem ganhar barras)"""
+
+    def __init__(self):
+        self.frame = FixtureProvider(FIXTURE_DIR).fetch_history('PETR4.SA')
+        self.visiveis = len(self.frame) - 5
+
+    def get_history(self, symbol, start=None, period=None):
+        data = self.frame.iloc[:self.visiveis]
+        return data if start is None else data[data.index >= start]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    precos = FixtureStore()
+    monkeypatch.setattr(indicator_state, 'get_price_store', lambda: precos)
+    store = IndicatorStateStore(str(tmp_path), period='5y')
+    store.precos = precos
+    return store
+
+
+def test_leitura_sem_barras_novas_nao_grava(store):
+    store.get_state('PETR4')
+    store.get_state('PETR4')
+    store.get_state('PETR4')
+
+    assert store.get_info()['saves'] == 1
+    assert store.get_info()['unchanged'] == 2
+
+
+def test_barra_nova_grava(store):
+    antes = store.get_state('PETR4').pontos
+    store.precos.visiveis += 1
+
+    assert store.get_state('PETR4').pontos == antes + 1
+    assert store.get_info()['saves'] == 2
+
+
+def test_tick_fica_pendente_ate_flush(store):
+    state = store.get_state('PETR4')
+    store.apply_tick('PETR4', state.last_date, state.close_atual * 1.01)
+    assert store.get_info()['pendentes'] == 1
+
+    store.flush()
+    store.flush()
+
+    assert store.get_info()['saves'] == 2
+    assert store.get_info()['pendentes'] == 0
+
+
+def assert_paridade(state, closes):
+    assert state.pontos == len(closes)
+    assert state.rsl == pytest.approx(YFinanceService.calculate_rsl(closes, 30), abs=1e-9)
+    assert state.volatilidade == pytest.approx(YFinanceService.calculate_volatilidade(closes), abs=1e-9)
+
+
+def test_paridade_antes_e_depois_de_split(store):
+    precos = store.precos
+    assert_paridade(store.get_state('PETR4'), precos.frame['Close'].iloc[:precos.visiveis])
+
+    # Split 2:1 na barra nova: o provedor reajusta todo o passado pela metade
+    precos.frame = precos.frame.assign(Close=precos.frame['Close'] / 2)
+    precos.visiveis += 1
+    state = store.get_state('PETR4')
+
+    assert_paridade(state, precos.frame['Close'].iloc[:precos.visiveis])
+    assert store.get_info()['rebuilds'] == 1
+
+
+def test_barra_parcial_que_mudou_nao_e_reajuste(store):
+    precos = store.precos
+    store.get_state('PETR4')
+
+    frame = precos.frame.copy()
+    frame.iloc[precos.visiveis - 1, frame.columns.get_loc('Close')] *= 1.03
+    precos.frame = frame
+    state = store.get_state('PETR4')
+
+    assert_paridade(state, frame['Close'].iloc[:precos.visiveis])
+    assert store.get_info()['rebuilds'] == 0
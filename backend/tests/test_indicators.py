@@ -0,0 +1,50 @@
+# tests/test_indicators.py
+"""
+Indicadores em lote: cada ticker usa só as próprias barras, então o resultado
+não depende dos outros tickers do lote (ITUB4 tem lacunas nas fixtures).
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import numpy as np
+import pytest
+
+from configuracoes.indicators import INDICADORES, pack_columns
+from configuracoes.price_store import FixtureProvider
+from configuracoes.yfinance_service import YFinanceService
+from conftest import FIXTURE_DIR
+
+NOMES = tuple(sorted(INDICADORES))
+
+
+@pytest.fixture(scope='module')
+def frames():
+    provider = FixtureProvider(FIXTURE_DIR)
+    frames = {symbol: provider.fetch_history(symbol) for symbol in ('PETR4.SA', 'VALE3.SA', 'ITUB4.SA')}
+    frames['VALE3.SA'] = frames['VALE3.SA'].iloc[30:]  # histórico mais curto que o dos outros
+    return frames
+
+
+def test_pack_columns_aligns_by_last_bar():
+    packed = pack_columns([np.array([1.0, 2.0, 3.0]), np.array([5.0])])
+
+    assert packed.shape == (3, 2)
+    assert np.isnan(packed[:2, 1]).all()
+    assert packed[-1].tolist() == [3.0, 5.0]
+
+
+def test_batch_matches_each_ticker_alone(frames):
+    lote, _, _ = YFinanceService.compute_indicator_series(frames, NOMES)
+
+    for coluna, (symbol, data) in enumerate(frames.items()):
+        sozinho, _, datas = YFinanceService.compute_indicator_series({symbol: data}, NOMES)
+        barras = len(datas[symbol])
+        for nome, matriz in sozinho.items():
+            np.testing.assert_array_equal(lote[nome][-barras:, coluna], matriz[:, 0], err_msg=f'{symbol} {nome}')
+
+
+def test_rsi_warmup_counts_from_each_ticker_first_bar(frames):
+    lote, _, datas = YFinanceService.compute_indicator_series(frames, ('rsi',))
+    rsi_vale = lote['rsi'][-len(datas['VALE3.SA']):, 1]
+
+    assert np.isnan(rsi_vale[:14]).all()
+    assert np.isfinite(rsi_vale[14:]).all()
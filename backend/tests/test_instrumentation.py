@@ -0,0 +1,67 @@
+# tests/test_instrumentation.py
+"""
+Métricas de vários workers: os totais de um worker que morreu continuam no
+/metrics (somados em ARQUIVO_MORTOS), então _count e _bucket nunca diminuem.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import json
+import os
+
+import pytest
+
+from configuracoes import instrumentation
+from configuracoes.config import Config
+from configuracoes.instrumentation import (
+    ARQUIVO_MORTOS, METRICA_HTTP, MetricsRegistry, get_metrics_summary, render_prometheus
+)
+
+
+def pid_morto():
+    pid = 4_000_000
+    while instrumentation._processo_vivo(pid):
+        pid += 1
+    return pid
+
+
+def gravar_worker(diretorio, pid, chamadas):
+    registry = MetricsRegistry()
+    for _ in range(chamadas):
+        registry.observe(METRICA_HTTP, ('/api/teste', 'GET'), 0.02)
+    with open(os.path.join(diretorio, f'{pid}.json'), 'w') as f:
+        json.dump(registry.dump(), f)
+
+
+def contagem(texto):
+    linha = next(l for l in texto.splitlines() if l.startswith(f'{METRICA_HTTP}_count{{rota="/api/teste"'))
+    return int(linha.rsplit(' ', 1)[1])
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(instrumentation, '_registry', MetricsRegistry())
+    return tmp_path
+
+
+def test_totais_de_worker_morto_nao_somem(diretorio):
+    pid = pid_morto()
+    gravar_worker(diretorio, pid, 3)
+
+    assert contagem(render_prometheus()) == 3
+    assert not (diretorio / f'{pid}.json').exists()
+    assert (diretorio / ARQUIVO_MORTOS).exists()
+
+    # Um segundo worker morre: soma ao acumulado do primeiro
+    gravar_worker(diretorio, pid, 4)
+    assert contagem(render_prometheus()) == 7
+    assert contagem(render_prometheus()) == 7
+
+
+def test_acumulado_entra_no_resumo(diretorio):
+    gravar_worker(diretorio, pid_morto(), 2)
+
+    resumo = get_metrics_summary()
+
+    assert resumo['rotas']['GET /api/teste']['chamadas'] == 2
+    assert resumo['workers'] == 1  # só este processo; o acumulado não conta
@@ -0,0 +1,57 @@
+# tests/test_pairs_scanner.py
+"""
+Pares do scanner: cada par usa só as datas em que os dois tickers têm preço,
+então um ticker com lacunas não muda a correlação nem o teste dos outros pares.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracoes.pairs_scanner import MIN_PONTOS, candidatos_por_correlacao, scan_pairs
+
+
+@pytest.fixture(scope='module')
+def fechamentos():
+    """A e B cointegrados; C segue A mas com um buraco no meio do histórico"""
+    rng = np.random.default_rng(11)
+    n = 300
+    datas = pd.bdate_range('2023-01-02', periods=n)
+    base = np.cumsum(rng.normal(0, 0.02, n))
+    a = np.exp(3 + base)
+    b = np.exp(2 + 0.8 * base + rng.normal(0, 0.01, n))
+    c = np.exp(1 + base + rng.normal(0, 0.03, n))
+    c[100:160] = np.nan
+    return pd.DataFrame({'A': a, 'B': b, 'C': c}, index=datas)
+
+
+def test_correlacao_usa_datas_comuns_de_cada_par(fechamentos):
+    _, candidatos = candidatos_por_correlacao(fechamentos, -1.0, 10)
+    esperado = np.log(fechamentos).corr()
+
+    assert len(candidatos) == 3
+    for a, b, correlacao in candidatos:
+        assert correlacao == pytest.approx(esperado.loc[a, b], abs=1e-12)
+
+
+def test_lacunas_de_um_ticker_nao_afetam_outros_pares(fechamentos):
+    pares, _ = scan_pairs(fechamentos, min_correlacao=0.5, max_pvalue=1.0)
+    sozinhos, _ = scan_pairs(fechamentos[['A', 'B']], min_correlacao=0.5, max_pvalue=1.0)
+    por_par = {p['par']: p for p in pares}
+
+    assert por_par['A/B'] == sozinhos[0]
+    assert por_par['A/B']['pontos_dados'] == len(fechamentos)
+    assert por_par['A/C']['pontos_dados'] == len(fechamentos) - 60
+
+
+def test_par_com_poucas_datas_comuns_fica_de_fora(fechamentos):
+    """B e C têm histórico suficiente, mas quase nenhuma data em comum"""
+    matriz = fechamentos.copy()
+    matriz['C'] = matriz['A'] * 1.1
+    matriz.iloc[:170, matriz.columns.get_loc('B')] = np.nan
+    matriz.iloc[180:, matriz.columns.get_loc('C')] = np.nan
+
+    _, candidatos = candidatos_por_correlacao(matriz, -1.0, 10)
+
+    assert {(a, b) for a, b, _ in candidatos} == {('A', 'B'), ('A', 'C')}
@@ -0,0 +1,146 @@
+# tests/test_price_store.py
+"""
+Store de preços com o FixtureProvider (data/fixtures): download só da cauda,
+detecção de reajuste (split/dividendo) e download agrupado.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracoes.price_store import FixtureProvider, PriceStore
+from conftest import FIXTURE_DIR
+
+TICKERS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+class RecordingProvider(FixtureProvider):
+    """FixtureProvider que guarda o início de cada download"""
+
+    def __init__(self, fixture_dir):
+        super().__init__(fixture_dir)
+        self.starts = []
+
+    def fetch_history(self, symbol, start=None, end=None):
+        self.starts.append(start)
+        return super().fetch_history(symbol, start=start, end=end)
+
+
+def fixture_frame(symbol):
+    return pd.read_csv(os.path.join(FIXTURE_DIR, f'{symbol}.csv'), index_col='Date', parse_dates=True)
+
+
+def assert_closes(data, expected):
+    assert list(data.index) == list(expected.index)
+    assert np.allclose(data['Close'].to_numpy(), expected['Close'].to_numpy(), rtol=1e-12)
+
+
+def write_frame(directory, symbol, data):
+    data.to_csv(os.path.join(directory, f'{symbol}.csv'))
+
+
+@pytest.fixture
+def provider_dir(tmp_path):
+    """Cópia das fixtures que o teste pode reescrever (simula o provedor mudando)"""
+    directory = tmp_path / 'provider'
+    shutil.copytree(FIXTURE_DIR, directory)
+    return str(directory)
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / 'store')
+
+
+def test_fixture_provider_reads_ohlcv_and_filters_dates():
+    provider = FixtureProvider(FIXTURE_DIR)
+
+    data = provider.fetch_history('PETR4.SA', start='2024-06-01', end='2024-07-01')
+
+    assert list(data.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert data.index.min() >= pd.Timestamp('2024-06-01')
+    assert data.index.max() < pd.Timestamp('2024-07-01')
+    assert len(data) == 20
+
+
+def test_fixture_provider_unknown_symbol_is_empty():
+    assert FixtureProvider(FIXTURE_DIR).fetch_history('XXXX3.SA').empty
+
+
+def test_fixtures_cover_one_year_with_gaps_in_itub4():
+    lengths = {symbol: len(fixture_frame(symbol)) for symbol in TICKERS}
+
+    assert lengths['PETR4.SA'] == lengths['VALE3.SA'] == 260
+    assert lengths['ITUB4.SA'] == 256
+
+
+def test_refresh_downloads_only_the_tail_with_overlap(provider_dir, store_dir):
+    full = fixture_frame('PETR4.SA')
+    write_frame(provider_dir, 'PETR4.SA', full.iloc[:200])
+    provider = RecordingProvider(provider_dir)
+    store = PriceStore(provider, store_dir, overlap_bars=5)
+
+    store.refresh('PETR4', start=None, force=True)
+    write_frame(provider_dir, 'PETR4.SA', full)
+    data = store.refresh('PETR4', start=None, force=True)
+
+    assert provider.starts[-1] == full.index[195]
+    assert len(data) == len(full)
+    assert_closes(data, full)
+    assert store.get_stats()['readjustments'] == 0
+
+
+def test_partial_last_bar_is_not_a_readjustment(provider_dir, store_dir):
+    full = fixture_frame('PETR4.SA')
+    partial = full.iloc[:200].copy()
+    partial.iloc[-1, partial.columns.get_loc('Close')] *= 1.03  # pregão em andamento
+    write_frame(provider_dir, 'PETR4.SA', partial)
+    store = PriceStore(RecordingProvider(provider_dir), store_dir)
+
+    store.refresh('PETR4', start=None, force=True)
+    write_frame(provider_dir, 'PETR4.SA', full)
+    data = store.refresh('PETR4', start=None, force=True)
+
+    assert store.get_stats()['readjustments'] == 0
+    assert data['Close'].iloc[199] == full['Close'].iloc[199]
+
+
+def test_split_refetches_the_whole_history(provider_dir, store_dir):
+    full = fixture_frame('PETR4.SA')
+    write_frame(provider_dir, 'PETR4.SA', full.iloc[:200])
+    store = PriceStore(RecordingProvider(provider_dir), store_dir)
+    store.refresh('PETR4', start=None, force=True)
+
+    # Split 2:1 depois da última barra guardada: o provedor reajusta todo o passado
+    adjusted = full.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] = (adjusted[['Open', 'High', 'Low', 'Close']] / 2).round(4)
+    write_frame(provider_dir, 'PETR4.SA', adjusted)
+    data = store.refresh('PETR4', start=None, force=True)
+
+    assert store.get_stats()['readjustments'] == 1
+    assert_closes(data, adjusted)
+    assert data['Close'].pct_change().abs().max() < 0.2  # sem salto na emenda
+
+
+def test_split_in_batch_refresh(provider_dir, store_dir):
+    frames = {symbol: fixture_frame(symbol) for symbol in TICKERS}
+    for symbol, data in frames.items():
+        write_frame(provider_dir, symbol, data.iloc[:-20])
+    store = PriceStore(FixtureProvider(provider_dir), store_dir)
+    store.refresh_many(TICKERS, start=None, force=True)
+
+    adjusted = frames['VALE3.SA'].copy()
+    adjusted['Close'] = adjusted['Close'] * 0.97  # dividendo
+    for symbol, data in {**frames, 'VALE3.SA': adjusted}.items():
+        write_frame(provider_dir, symbol, data)
+    failures = store.refresh_many(TICKERS, start=None, force=True)
+
+    assert failures == {}
+    assert store.get_stats()['readjustments'] == 1
+    result, _ = store.get_history_many(TICKERS, start='2024-01-01')
+    assert_closes(result['VALE3.SA'], adjusted)
+    assert_closes(result['PETR4.SA'], frames['PETR4.SA'])
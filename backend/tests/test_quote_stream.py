@@ -0,0 +1,61 @@
+# tests/test_quote_stream.py
+"""
+Streaming de cotações: limite de conexões por cliente e um só worker baixando
+por volta (flock no diretório do store; arquivos recentes não são baixados de novo).
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import os
+
+import pytest
+
+from configuracoes.price_store import PriceStore
+from configuracoes.quote_stream import REFRESH_LOCK, QuoteHub, fcntl
+from conftest import FIXTURE_DIR
+from test_price_store import RecordingProvider
+
+
+@pytest.fixture
+def hub():
+    hub = QuoteHub(5, 300, max_clients=10, max_per_client=2)
+    hub._ensure_loop = lambda: None  # sem o loop de atualização (iria ao provedor real)
+    return hub
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(RecordingProvider(FIXTURE_DIR), str(tmp_path))
+
+
+def test_limite_por_cliente(hub):
+    a1 = hub.subscribe(['PETR4'], 'ip:10.0.0.1')
+    a2 = hub.subscribe(['PETR4'], 'ip:10.0.0.1')
+
+    assert hub.subscribe(['PETR4'], 'ip:10.0.0.1') is None
+    assert hub.subscribe(['PETR4'], 'ip:10.0.0.2') is not None
+
+    hub.unsubscribe(a1)
+    assert hub.subscribe(['PETR4'], 'ip:10.0.0.1') is not None
+    assert hub.get_info()['rejected_client'] == 1
+    hub.unsubscribe(a2)
+
+
+def test_arquivo_recente_nao_e_baixado_de_novo(store):
+    QuoteHub._baixar(store, ['PETR4.SA'], None, 60)
+    QuoteHub._baixar(store, ['PETR4.SA'], None, 60)
+
+    assert store.provider.calls == 1
+
+
+@pytest.mark.skipif(fcntl is None, reason='flock só existe em sistemas POSIX')
+def test_so_quem_pega_o_lock_baixa(store):
+    with open(os.path.join(store.data_dir, REFRESH_LOCK), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            assert QuoteHub._baixar(store, ['PETR4.SA'], None, 60) is False
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    assert store.provider.calls == 0
+    assert QuoteHub._baixar(store, ['PETR4.SA'], None, 60) is True
+    assert store.provider.calls == 1
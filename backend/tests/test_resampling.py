@@ -0,0 +1,105 @@
+# tests/test_resampling.py
+"""
+Barras agregadas e LTTB: o downsample devolve exatamente n pontos, mantém o
+primeiro, o último e os picos, e barras semanais/mensais são datadas pelo
+último pregão de cada período (nunca por um dia sem pregão ou futuro).
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracoes.price_store import FixtureProvider
+from configuracoes.resampling import downsample, lttb_indices, resample_bars
+from conftest import FIXTURE_DIR
+
+SEXTA_SANTA = pd.Timestamp('2024-03-29')
+
+
+def barras_diarias(inicio='2024-01-02', fim='2024-04-10', sem_pregao=(SEXTA_SANTA,)):
+    datas = pd.bdate_range(inicio, fim, name='Date').drop(list(sem_pregao))
+    close = 30 + np.arange(len(datas), dtype='float64')
+    return pd.DataFrame({
+        'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': np.full(len(datas), 100, dtype=np.int64)
+    }, index=datas)
+
+
+def serie_aleatoria(tamanho=2000, seed=7):
+    return 20 + np.cumsum(np.random.default_rng(seed).normal(0, 0.3, tamanho))
+
+
+@pytest.mark.parametrize('n', [3, 10, 150, 1999])
+def test_lttb_devolve_n_pontos_com_primeiro_e_ultimo(n):
+    y = serie_aleatoria()
+
+    indices = lttb_indices(y, n)
+
+    assert len(indices) == n
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_com_menos_pontos_que_o_pedido_devolve_todos():
+    np.testing.assert_array_equal(lttb_indices([1.0, 2.0, 3.0], 10), [0, 1, 2])
+    with pytest.raises(ValueError):
+        lttb_indices(serie_aleatoria(), 2)
+
+
+def test_pico_sobrevive_ao_downsample():
+    y = serie_aleatoria()
+    y[1234] += 40   # pico isolado
+    y[567] -= 40    # vale isolado
+
+    indices = lttb_indices(y, 100)
+
+    assert 1234 in indices
+    assert 567 in indices
+
+
+def test_downsample_mantem_as_barras_escolhidas():
+    data = FixtureProvider(FIXTURE_DIR).fetch_history('PETR4.SA')
+
+    reduzido = downsample(data, 50)
+
+    assert len(reduzido) == 50
+    assert reduzido.index[0] == data.index[0] and reduzido.index[-1] == data.index[-1]
+    pd.testing.assert_frame_equal(reduzido, data.loc[reduzido.index])
+    assert downsample(data, len(data)) is data
+
+
+def test_barra_semanal_datada_pelo_ultimo_pregao_da_semana():
+    data = barras_diarias()
+
+    semanais = resample_bars(data, '1wk')
+
+    assert semanais.index.isin(data.index).all()
+    assert pd.Timestamp('2024-03-28') in semanais.index   # quinta: a sexta-feira santa não teve pregão
+    assert SEXTA_SANTA not in semanais.index
+    assert semanais.index[-1] == data.index[-1]   # semana em andamento: o último pregão, não a sexta futura
+    por_semana = data.index.to_series().groupby(data.index.to_period('W-FRI')).max()
+    np.testing.assert_array_equal(semanais.index.to_numpy(), por_semana.to_numpy())
+
+
+def test_barra_mensal_datada_pelo_ultimo_pregao_do_mes():
+    data = barras_diarias()
+
+    mensais = resample_bars(data, '1mo')
+
+    assert list(mensais.index) == [pd.Timestamp('2024-01-31'), pd.Timestamp('2024-02-29'),
+                                   pd.Timestamp('2024-03-28'), pd.Timestamp('2024-04-10')]
+    marco = data.loc['2024-03']
+    assert mensais.loc['2024-03-28', 'Open'] == marco['Open'].iloc[0]
+    assert mensais.loc['2024-03-28', 'High'] == marco['High'].max()
+    assert mensais.loc['2024-03-28', 'Low'] == marco['Low'].min()
+    assert mensais.loc['2024-03-28', 'Close'] == marco['Close'].iloc[-1]
+    assert mensais.loc['2024-03-28', 'Volume'] == marco['Volume'].sum()
+
+
+def test_intervalo_diario_e_invalido():
+    data = barras_diarias()
+
+    pd.testing.assert_frame_equal(resample_bars(data, '1d'), data)
+    with pytest.raises(ValueError):
+        resample_bars(data, '1h')
@@ -0,0 +1,87 @@
+# tests/test_rsl_engine.py
+"""
+Motor vetorizado: RSL e volatilidade de cada ticker batem com
+YFinanceService.calculate_rsl / calculate_volatilidade sobre a série do próprio
+ticker (sem os NaN dos dias em que não negociou), em dados sintéticos com
+buracos e históricos curtos e nas fixtures.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracoes.price_store import FixtureProvider
+from configuracoes.rsl_engine import compute_universe, sector_aggregates
+from configuracoes.yfinance_service import YFinanceService
+from conftest import FIXTURE_DIR
+
+
+def matriz_sintetica(n_dias=260, n_tickers=50, seed=42):
+    """Fechamentos aleatórios com buracos e históricos curtos"""
+    rng = np.random.default_rng(seed)
+    datas = pd.bdate_range(end='2024-12-31', periods=n_dias)
+    precos = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_dias, n_tickers)), axis=0))
+    precos[rng.random(precos.shape) < 0.02] = np.nan  # dias sem negociação
+    precos[:n_dias - 25, 0] = np.nan  # histórico curto: sem RSL nem volatilidade
+    precos[:n_dias - 31, 1] = np.nan  # 31 pontos: tem RSL e volatilidade
+    precos[-1, 2] = np.nan  # não negociou no último dia
+    return pd.DataFrame(precos, index=datas, columns=[f'T{i:03d}.SA' for i in range(n_tickers)])
+
+
+def matriz_fixtures():
+    provider = FixtureProvider(FIXTURE_DIR)
+    return pd.concat({ticker: provider.fetch_history(ticker)['Close']
+                      for ticker in ('PETR4.SA', 'VALE3.SA', 'ITUB4.SA')}, axis=1)
+
+
+def assert_paridade(close_matrix, periodo_mm):
+    universe = compute_universe(close_matrix, periodo_mm)
+
+    for ticker in close_matrix.columns:
+        serie = close_matrix[ticker].dropna()
+        esperado = {
+            'rsl': YFinanceService.calculate_rsl(serie, periodo_mm),
+            'volatilidade': YFinanceService.calculate_volatilidade(serie)
+        }
+        for campo, valor in esperado.items():
+            obtido = universe.at[ticker, campo]
+            if valor is None:
+                assert np.isnan(obtido), (ticker, campo)
+            else:
+                assert obtido == pytest.approx(valor, rel=1e-9, abs=1e-9), (ticker, campo)
+                assert round(obtido, 2) == round(valor, 2), (ticker, campo)
+
+
+@pytest.mark.parametrize('periodo_mm', [10, 30, 50])
+def test_paridade_dados_sinteticos(periodo_mm):
+    assert_paridade(matriz_sintetica(), periodo_mm)
+
+
+@pytest.mark.parametrize('periodo_mm', [10, 30, 50])
+def test_paridade_fixtures(periodo_mm):
+    # ITUB4 tem menos pregões que as outras: a matriz alinhada tem NaN na coluna dela
+    matriz = matriz_fixtures()
+    assert matriz['ITUB4.SA'].isna().any()
+
+    assert_paridade(matriz, periodo_mm)
+
+
+def test_historico_curto_fica_sem_indicadores():
+    universe = compute_universe(matriz_sintetica(), 30)
+
+    assert np.isnan(universe.at['T000.SA', 'rsl'])
+    assert np.isnan(universe.at['T000.SA', 'volatilidade'])
+    assert universe.at['T001.SA', 'pontos_dados'] == 31
+    assert not np.isnan(universe.at['T001.SA', 'rsl'])
+
+
+def test_setor_ignora_tickers_sem_dados_e_alem_do_limite():
+    universe = compute_universe(matriz_sintetica(), 30)
+    setores = {'Setor': ['T000.SA', 'T003.SA', 'T004.SA', 'T005.SA', 'XXXX3.SA']}
+
+    setor = sector_aggregates(universe, setores, limit=3)['Setor']
+
+    assert setor['tickers'] == ['T003.SA', 'T004.SA']
+    assert setor['total_empresas'] == 5
+    assert setor['rsl'] == round(float(np.mean(universe.loc[['T003.SA', 'T004.SA'], 'rsl'].round(2))), 2)
@@ -0,0 +1,149 @@
+# tests/test_session_cache.py
+"""
+Cache de sessões: LRU limitado por tamanho, validade pelo TTL ou pela
+expiração da sessão, invalidação por token e por usuário sem que um
+verify_session concorrente recoloque a sessão, e invalidação por usuário
+chegando aos outros workers pelo canal de NOTIFY.
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import pytest
+from datetime import datetime
+
+from auth import auth_service
+from auth import session_cache as modulo
+from auth.session_cache import SessionCache
+from configuracoes.reference_data import ReferenceDataCache
+
+
+class Relogio:
+    """Módulo time do cache com time() controlável"""
+
+    def __init__(self):
+        self.agora = 1_700_000_000.0
+
+    def time(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(modulo, 'time', relogio)
+    return relogio
+
+
+def usuario(user_id, plano=1):
+    return {'user_id': user_id, 'name': f'U{user_id}', 'email': f'u{user_id}@x', 'plan_name': 'P', 'plan_id': plano}
+
+
+def test_get_devolve_copia_e_conta_hits():
+    cache = SessionCache()
+    cache.set('tok', usuario(1))
+
+    dados = cache.get('tok')
+    dados['plan_id'] = 3
+
+    assert cache.get('tok')['plan_id'] == 1
+    assert cache.get('outro') is None
+    info = cache.get_info()
+    assert (info['hits'], info['misses']) == (2, 1)
+
+
+def test_lru_descarta_o_menos_usado():
+    cache = SessionCache(max_size=2)
+    cache.set('a', usuario(1))
+    cache.set('b', usuario(2))
+    cache.get('a')
+
+    cache.set('c', usuario(3))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.get_info()['evictions'] == 1
+
+
+def test_entrada_vence_no_ttl(relogio):
+    cache = SessionCache(ttl_seconds=60)
+    cache.set('tok', usuario(1))
+
+    relogio.agora += 59
+    assert cache.get('tok') is not None
+    relogio.agora += 1
+    assert cache.get('tok') is None
+
+
+def test_sessao_que_expira_antes_do_ttl(relogio):
+    cache = SessionCache(ttl_seconds=60)
+    cache.set('tok', usuario(1), expires_at=datetime.fromtimestamp(relogio.agora + 10))
+
+    relogio.agora += 10
+    assert cache.get('tok') is None
+
+
+def test_purge_remove_vencidas(relogio):
+    cache = SessionCache(ttl_seconds=60)
+    cache.set('a', usuario(1))
+    relogio.agora += 30
+    cache.set('b', usuario(2))
+    relogio.agora += 30
+
+    assert cache.purge_expired() == 1
+    assert cache.get_info()['currsize'] == 1
+
+
+def test_logout_nao_deixa_recolocar_o_token(relogio):
+    cache = SessionCache(ttl_seconds=60)
+    cache.set('tok', usuario(1))
+
+    cache.invalidate('tok')
+    cache.set('tok', usuario(1))  # verify_session que leu antes do logout
+    assert cache.get('tok') is None
+
+    relogio.agora += 61
+    cache.set('tok', usuario(1))
+    assert cache.get('tok') is not None
+
+
+def test_invalidate_user_remove_todas_as_sessoes():
+    cache = SessionCache()
+    cache.set('a', usuario(1))
+    cache.set('b', usuario(1))
+    cache.set('c', usuario(2))
+
+    cache.invalidate_user(1)
+
+    assert cache.get('a') is None and cache.get('b') is None
+    assert cache.get('c') is not None
+    assert cache.get_info()['invalidations'] == 2
+
+
+def test_leitura_anterior_a_invalidate_user_nao_volta_ao_cache(relogio):
+    cache = SessionCache(ttl_seconds=60)
+    lido_antes = relogio.agora
+    relogio.agora += 1
+    cache.invalidate_user(1)  # troca de plano commitada durante a leitura
+    relogio.agora += 1
+
+    cache.set('tok', usuario(1, plano=1), lido_em=lido_antes)
+    assert cache.get('tok') is None
+
+    cache.set('tok', usuario(1, plano=2), lido_em=relogio.agora)
+    assert cache.get('tok')['plan_id'] == 2
+
+    # Outros usuários não são afetados
+    cache.set('outro', usuario(2), lido_em=lido_antes)
+    assert cache.get('outro') is not None
+
+
+def test_aviso_de_outro_worker_invalida_o_usuario(monkeypatch):
+    cache = SessionCache()
+    cache.set('tok', usuario(7))
+    monkeypatch.setattr(auth_service, 'session_cache', cache)
+    referencia = ReferenceDataCache(max_age=60, listen=False)
+
+    referencia._despachar(f'{auth_service.PREFIXO_SESSOES}:7')
+    referencia._despachar('prefixo_desconhecido:7')
+
+    assert cache.get('tok') is None
+    assert referencia.get_info()['notifies'] == 2
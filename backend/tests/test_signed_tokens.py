@@ -0,0 +1,167 @@
+# tests/test_signed_tokens.py
+"""
+Tokens assinados: o payload volta igual, qualquer byte adulterado ou segredo
+diferente é recusado, o token vence em `exp`, e a lista de revogação recusa
+tokens emitidos antes do logout, de usuários desativados e, se o banco falha,
+todos (falha fechada).
+
+Uso: python -m pytest tests (a partir de backend/)
+"""
+import time
+
+import pytest
+
+from auth import signed_tokens
+from auth.signed_tokens import (
+    InvalidTokenError, RevocationList, decode_token, encode_token, is_signed_token
+)
+
+SEGREDO = 'segredo-de-teste'
+
+
+class FakeBanco:
+    """Só as consultas que RevocationList faz, guardadas em memória"""
+
+    def __init__(self):
+        self.epochs = {}
+        self.inativos = set()
+        self.fora_do_ar = False
+
+    def connect(self):
+        if self.fora_do_ar:
+            raise ConnectionError('banco fora do ar')
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self):
+        return FakeCursor(self.banco)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, banco):
+        self.banco = banco
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if 'INSERT INTO user_logout_epochs' in sql:
+            user_id, epoch = params
+            self.banco.epochs[user_id] = epoch
+        elif 'FROM user_logout_epochs' in sql:
+            self.rows = [(u, e) for u, e in self.banco.epochs.items() if e > params[0]]
+        elif 'FROM users' in sql:
+            self.rows = [(u,) for u in self.banco.inativos]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    banco = FakeBanco()
+    monkeypatch.setattr(signed_tokens, 'get_local_db_connection', banco.connect)
+    return banco
+
+
+def test_payload_volta_igual():
+    payload = {'user_id': 7, 'plan_id': 2, 'iat': 1000.0, 'exp': time.time() + 60}
+
+    token = encode_token(payload, SEGREDO)
+
+    assert is_signed_token(token)
+    assert decode_token(token, SEGREDO) == payload
+
+
+def trocar_primeiro(texto):
+    return ('B' if texto[0] == 'A' else 'A') + texto[1:]
+
+
+def test_token_adulterado_e_recusado():
+    token = encode_token({'user_id': 7, 'plan_id': 1, 'exp': time.time() + 60}, SEGREDO)
+    body, assinatura = token.split('.')
+    # Outro plano com a assinatura original
+    forjado = encode_token({'user_id': 7, 'plan_id': 3, 'exp': time.time() + 60}, SEGREDO).split('.')[0]
+
+    for adulterado in (f'{forjado}.{assinatura}',
+                       f'{body}.{trocar_primeiro(assinatura)}',
+                       f'{body[:-1]}.{assinatura}',
+                       'sem-ponto', f'{body}.'):
+        with pytest.raises(InvalidTokenError):
+            decode_token(adulterado, SEGREDO)
+
+    with pytest.raises(InvalidTokenError):
+        decode_token(token, 'outro-segredo')
+
+
+def test_segredo_vazio_recusa_gerar_e_validar():
+    with pytest.raises(InvalidTokenError):
+        encode_token({'exp': time.time() + 60}, '')
+    with pytest.raises(InvalidTokenError):
+        decode_token('a.b', '')
+
+
+def test_token_vence_em_exp():
+    token = encode_token({'user_id': 7, 'exp': 1000.0}, SEGREDO)
+
+    assert decode_token(token, SEGREDO, now=999.9)['user_id'] == 7
+    with pytest.raises(InvalidTokenError, match='expirada'):
+        decode_token(token, SEGREDO, now=1000.0)
+
+
+def test_logout_revoga_tokens_emitidos_antes(banco):
+    revogacoes = RevocationList()
+    antes = time.time() - 1
+
+    assert not revogacoes.is_revoked(7, antes)
+    revogacoes.revoke_user(7)
+
+    assert revogacoes.is_revoked(7, antes)
+    assert not revogacoes.is_revoked(7, time.time() + 1)
+    assert not revogacoes.is_revoked(8, antes)
+
+
+def test_logout_em_outro_worker_vale_na_recarga(banco):
+    outro_worker = RevocationList()
+    revogacoes = RevocationList(refresh_seconds=30)
+    emitido = time.time() - 1
+    assert not revogacoes.is_revoked(7, emitido)
+
+    outro_worker.revoke_user(7)
+    assert not revogacoes.is_revoked(7, emitido)  # ainda não recarregou
+
+    revogacoes._next_refresh = 0
+    assert revogacoes.is_revoked(7, emitido)
+
+
+def test_usuario_desativado_e_recusado(banco):
+    banco.inativos.add(7)
+
+    assert RevocationList().is_revoked(7, time.time())
+
+
+def test_falha_na_recarga_recusa_todos_os_tokens(banco):
+    revogacoes = RevocationList()
+    assert not revogacoes.is_revoked(7, time.time())
+
+    banco.fora_do_ar = True
+    revogacoes._next_refresh = 0
+    assert revogacoes.is_revoked(7, time.time())
+    assert revogacoes.is_revoked(8, time.time())
+    # Nova tentativa só depois de RETRY_SECONDS
+    assert revogacoes._next_refresh <= time.time() + RevocationList.RETRY_SECONDS
+
+    banco.fora_do_ar = False
+    revogacoes._next_refresh = 0
+    assert not revogacoes.is_revoked(7, time.time())